@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark do caminho fuzzy do EntityMatchingAgent.
+Compara a Levenshtein completa (levenshtein_distance) com a versão limitada
+pelo threshold (bounded_levenshtein) em nomes reais de empresas/ferramentas,
+e com o score em lote (batch_fuzzy_scores) quando NumPy está instalado.
+
+Uso:
+    python benchmark_levenshtein.py [--threshold 0.7] [--repeat 5] [--typos 3]
+"""
+
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+# Permite importar o pacote src/ a partir de scripts/
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.pipelines.ingestion.entity_matching_agent import EntityMatchingAgent  # noqa: E402
+from src.pipelines.ingestion.edit_distance import bounded_levenshtein, max_distance_for  # noqa: E402
+from src.pipelines.ingestion.vector_scoring import HAS_NUMPY, batch_fuzzy_scores  # noqa: E402
+
+# Nomes típicos do grafo (Organization / Tool / Product)
+NAMES = [
+    "CoCreateAI", "Montreal Ventures", "Companhia Vale do Rio Doce", "Itaú Unibanco",
+    "Banco do Brasil", "Petróleo Brasileiro S.A.", "Natura &Co", "Magazine Luiza",
+    "Localiza Hertz", "TOTVS", "Ambev", "Embraer", "Nubank", "Stone Pagamentos",
+    "Conta Azul", "RD Station", "Pipefy", "Hotmart", "iFood", "Mercado Livre",
+    "Grupo Boticário", "Raízen", "Suzano Papel e Celulose", "Gerdau", "WEG Equipamentos",
+    "Cielo", "PagSeguro", "Loft", "QuintoAndar", "Creditas", "Neoenergia", "Sabesp",
+    "Secretaria da Fazenda de São Paulo", "Fundação Getúlio Vargas", "Sebrae",
+    "Notion", "Slack", "Microsoft Teams", "Power BI", "Google Workspace", "Jira",
+    "Confluence", "Salesforce", "HubSpot", "Azure OpenAI", "Neo4j Aura", "Miro",
+    "Trello", "Monday.com", "Zoho CRM", "SAP S/4HANA", "Oracle NetSuite",
+    "Gestão de Inovação Aberta", "Transformação Digital", "Governança de Dados",
+    "Inteligência Artificial Generativa", "Corporate Venture Capital",
+]
+
+
+def with_typos(name: str, typos: int, rng: random.Random) -> str:
+    """Simula erros de transcrição (substituição, remoção, inserção)"""
+    chars = list(name)
+    for _ in range(rng.randint(0, typos)):
+        if not chars:
+            break
+        position = rng.randrange(len(chars))
+        operation = rng.random()
+        if operation < 0.4:
+            chars[position] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+        elif operation < 0.7:
+            del chars[position]
+        else:
+            chars.insert(position, rng.choice("abcdefghijklmnopqrstuvwxyz"))
+    return "".join(chars)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Levenshtein completa vs limitada")
+    parser.add_argument("--threshold", type=float, default=0.7, help="fuzzy_threshold")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetições de cada medição")
+    parser.add_argument("--typos", type=int, default=3, help="Máximo de typos por termo")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    agent = EntityMatchingAgent(fuzzy_threshold=args.threshold)
+
+    targets = [agent.normalize(name) for name in NAMES]
+    terms = [agent.normalize(with_typos(name, args.typos, rng)) for name in NAMES]
+    pairs = [(term, target) for term in terms for target in targets]
+
+    def run_full():
+        accepted = 0
+        for term, target in pairs:
+            max_len = max(len(term), len(target))
+            if 1 - agent.levenshtein_distance(term, target) / max_len >= args.threshold:
+                accepted += 1
+        return accepted
+
+    def run_bounded():
+        accepted = 0
+        for term, target in pairs:
+            max_len = max(len(term), len(target))
+            max_distance = max_distance_for(args.threshold, max_len)
+            if bounded_levenshtein(term, target, max_distance) <= max_distance:
+                accepted += 1
+        return accepted
+
+    def run_vector():
+        accepted = 0
+        for term in terms:
+            scores = batch_fuzzy_scores(term, targets, args.threshold)
+            accepted += sum(1 for target in targets if scores[target] >= args.threshold)
+        return accepted
+
+    def measure(func):
+        best = float("inf")
+        result = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - start)
+        return best, result
+
+    full_time, full_accepted = measure(run_full)
+    bounded_time, bounded_accepted = measure(run_bounded)
+
+    print(f"Pares comparados: {len(pairs)} (threshold={args.threshold})")
+    print(f"Aceitos: completa={full_accepted}  limitada={bounded_accepted}")
+    print(f"Levenshtein completa: {full_time * 1000:8.1f} ms  ({full_time / len(pairs) * 1e6:.2f} µs/par)")
+    print(f"Levenshtein limitada: {bounded_time * 1000:8.1f} ms  ({bounded_time / len(pairs) * 1e6:.2f} µs/par)")
+    print(f"Speedup: {full_time / bounded_time:.1f}x")
+
+    vector_accepted = bounded_accepted
+    if HAS_NUMPY:
+        vector_time, vector_accepted = measure(run_vector)
+        print(f"Lote NumPy:           {vector_time * 1000:8.1f} ms  ({vector_time / len(pairs) * 1e6:.2f} µs/par)")
+        print(f"Speedup (lote): {full_time / vector_time:.1f}x")
+
+    if not full_accepted == bounded_accepted == vector_accepted:
+        print("❌ Resultados divergentes!")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ Uses Pydantic AI framework with Azure OpenAI
 """
 import os
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import Optional, List
 from pydantic_ai import Agent, RunContext
 from pydantic_ai.models.openai import OpenAIModel
@@ -13,6 +13,7 @@ from openai import AsyncAzureOpenAI
 
 from src.config import settings
 from src.utils.neo4j_client import neo4j_client
+from src.utils.ttl_cache import AsyncTTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -51,7 +52,36 @@ class PromptType:
     CONTINUATION = "continuation" # Message in existing conversation
 
 
+# Profiles rarely change mid-conversation; updates go through invalidate_user_context
+user_context_cache: AsyncTTLCache[UserContext] = AsyncTTLCache(
+    ttl_seconds=settings.user_context_cache_ttl_seconds,
+    max_entries=settings.user_context_cache_max_entries,
+)
+
+
 async def load_user_context(user_id: str) -> Optional[UserContext]:
+    """Load user context, from the cache when available (unknown users are not cached)"""
+    user_context = await user_context_cache.get(user_id, lambda: _fetch_user_context(user_id))
+    if user_context is None:
+        return None
+    # Callers get their own copy; the cached instance is shared between requests
+    return replace(
+        user_context,
+        competencies=list(user_context.competencies) if user_context.competencies is not None else None,
+    )
+
+
+def invalidate_user_context(user_id: str) -> bool:
+    """
+    Drop the cached context of a user (call after onboarding or AI profile updates)
+
+    Returns:
+        True if a cached context was removed
+    """
+    return user_context_cache.invalidate(user_id)
+
+
+async def _fetch_user_context(user_id: str) -> Optional[UserContext]:
     """Load user context from Neo4j graph database"""
     query = """
     MATCH (u:User {id: $userId})
@@ -18,6 +18,13 @@ class Settings(BaseSettings):
     neo4j_uri: str = Field(alias="NEO4J_URI")
     neo4j_user: str = Field(alias="NEO4J_USERNAME")
     neo4j_password: str = Field(alias="NEO4J_PASSWORD")
+    neo4j_database: str = Field(default="neo4j", alias="NEO4J_DATABASE")  # Pinned database ("" = server home database)
+    neo4j_max_connection_pool_size: int = 100  # Max connections per host in the driver pool
+    neo4j_connection_acquisition_timeout: float = 60.0  # Seconds to wait for a pooled connection
+    neo4j_max_connection_lifetime: float = 3600.0  # Seconds before a pooled connection is recycled
+    neo4j_max_transaction_retry_time: float = 30.0  # Seconds managed transactions retry transient errors
+    neo4j_fetch_size: int = 1000  # Records fetched per batch when consuming results
+    neo4j_slow_query_ms: float = 1000.0  # Log queries slower than this with their parameter shapes (0 = off)
     
     # Azure OpenAI
     azure_openai_endpoint: str = Field(alias="AZURE_OPENAI_ENDPOINT")
@@ -25,6 +32,31 @@ class Settings(BaseSettings):
     azure_openai_api_version: str = Field(default="2024-08-01-preview", alias="AZURE_OPENAI_API_VERSION")
     azure_openai_deployment_name: str = Field(default="gpt-4o-mini-aion", alias="AZURE_OPENAI_DEPLOYMENT_NAME")
     
+    # Personal agent - user context cache
+    user_context_cache_ttl_seconds: float = 300.0  # Seconds a loaded user context is reused (0 = off)
+    user_context_cache_max_entries: int = 1000  # Users kept in the cache (least recently used are evicted)
+    
+    # Ingestion - entity matching cache
+    ingestion_node_page_size: int = 2000  # Nodes per keyset page when loading the matcher cache
+    ingestion_warm_cache_on_startup: bool = False  # Load the matcher cache during server startup
+    ingestion_refresh_interval_seconds: float = 0  # Background delta refresh interval (0 = disabled)
+    ingestion_refresh_detect_deletes: bool = True  # Reconcile node ids (deletes, undated nodes) during refreshes
+    ingestion_refresh_reconcile_interval_seconds: float = 3600  # Min seconds between id reconciliations (0 = every refresh)
+    ingestion_match_workers: int = 0  # Process pool size for batch matching (0 = one worker thread, off the event loop)
+    ingestion_match_chunk_size: int = 64  # Terms per batch matching task
+    ingestion_vector_min_candidates: int = 256  # Candidates per term before NumPy batch scoring kicks in (0 = off)
+    ingestion_typo_max_distance: int = 2  # Max edits covered by the typo (deletion) index for short terms (0 = off)
+    ingestion_phonetic_score: float = 0.75  # Score for phonetic-only matches (0 = off; < 0.9 means review)
+    ingestion_snapshot_path: str = ""  # On-disk matcher index snapshot for warm start ("" = disabled)
+    ingestion_snapshot_max_age_seconds: float = 0  # Ignore older snapshots and do a full load (0 = no limit)
+    ingestion_write_batch_size: int = 500  # Rows per UNWIND statement when writing links/nodes
+    ingestion_pipeline_queue_size: int = 2  # Matched chunks buffered ahead of the Neo4j writer
+    ingestion_job_workers: int = 2  # Ingestion jobs processed concurrently by the background queue
+    ingestion_job_store_path: str = ""  # SQLite file for durable ingestion jobs ("" = in-memory)
+    ingestion_job_max_attempts: int = 3  # Runs (including ones cut short by a restart) before a job is failed
+    ingestion_job_retention_seconds: float = 86400  # Finished jobs kept for polling (0 = no age limit)
+    ingestion_job_max_finished: int = 1000  # Finished jobs kept at most (oldest evicted first)
+    
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -2,15 +2,24 @@
 EKS Agents - FastAPI Server
 Main entry point for the agent orchestration system
 """
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from src.config import settings
-from src.utils.neo4j_client import neo4j_client
+from src.utils.neo4j_client import neo4j_client, query_metrics
 from src.routers.chat_router import router as chat_router
-from src.routers.ingestion_router import router as ingestion_router
+from src.routers.ingestion_router import (
+    router as ingestion_router,
+    run_periodic_refresh,
+    shutdown_entity_matching_agent,
+    start_ingestion_jobs,
+    stop_ingestion_jobs,
+    warm_entity_matching_agent,
+)
 from src.routers.schema_router import router as schema_router
 
 # Configure logging
@@ -34,12 +43,42 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"⚠️ Neo4j connection failed: {e}. Chat will work with limited personalization.")
     
+    # Warm the entity matching cache in the background; early requests share the same load
+    warm_task = None
+    if settings.ingestion_warm_cache_on_startup:
+        warm_task = asyncio.create_task(warm_entity_matching_agent())
+    
+    # Incremental refresh of the entity matching cache (optional)
+    refresh_task = None
+    if settings.ingestion_refresh_interval_seconds > 0:
+        refresh_task = asyncio.create_task(run_periodic_refresh(
+            settings.ingestion_refresh_interval_seconds,
+            detect_deletes=settings.ingestion_refresh_detect_deletes,
+            reconcile_interval_seconds=settings.ingestion_refresh_reconcile_interval_seconds
+        ))
+        logger.info(
+            f"✅ Entity cache refresh every {settings.ingestion_refresh_interval_seconds}s"
+        )
+    
+    # Background ingestion jobs (resumes pending jobs from the durable store)
+    try:
+        await start_ingestion_jobs()
+    except Exception as e:
+        logger.warning(f"⚠️ Ingestion job queue failed to start: {e}")
+    
     logger.info("✅ Server started successfully")
     
     yield
     
     # Shutdown
     logger.info("Shutting down EKS Agents server...")
+    background = [task for task in (warm_task, refresh_task) if task]
+    for task in background:
+        task.cancel()
+    # Wait for the cancellation so no refresh is mid-query when the driver closes
+    await asyncio.gather(*background, return_exceptions=True)
+    await stop_ingestion_jobs()
+    await shutdown_entity_matching_agent()
     try:
         await neo4j_client.close()
     except Exception:
@@ -74,6 +113,15 @@ async def health_check():
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Neo4j query metrics in Prometheus text format"""
+    return PlainTextResponse(
+        query_metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
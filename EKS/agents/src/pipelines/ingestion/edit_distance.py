@@ -0,0 +1,90 @@
+"""
+Edit Distance - Distância de Levenshtein limitada (banded / Ukkonen)
+Usada no caminho fuzzy do EntityMatchingAgent, que só precisa saber se a
+similaridade atinge o fuzzy_threshold
+
+Para similaridade = 1 - d / max_len, atingir o threshold equivale a
+d <= (1 - threshold) * max_len. Com esse limite k basta calcular a faixa
+diagonal |i - j| <= k da matriz de programação dinâmica e abortar assim que
+o mínimo de uma linha ultrapassa k.
+"""
+
+
+def max_distance_for(threshold: float, max_len: int) -> int:
+    """Maior distância de edição que ainda atinge o threshold de similaridade"""
+    # Epsilon compensa erro de ponto flutuante (ex: 0.3 * 10 = 3.0000000000000004)
+    return max(0, int((1 - threshold) * max_len + 1e-9))
+
+
+def bounded_levenshtein(s1: str, s2: str, max_distance: int) -> int:
+    """
+    Distância de Levenshtein limitada a max_distance.
+
+    Retorna a distância exata quando ela é <= max_distance e
+    max_distance + 1 caso contrário (sem calcular o valor real).
+    """
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    len1, len2 = len(s1), len(s2)
+    over = max_distance + 1
+
+    # Rejeição pela diferença de tamanho, antes de alocar qualquer coisa
+    if len1 - len2 > max_distance:
+        return over
+    if s1 == s2:
+        return 0
+
+    # Prefixo e sufixo comuns não alteram a distância
+    start = 0
+    while start < len2 and s1[start] == s2[start]:
+        start += 1
+    end1, end2 = len1, len2
+    while end2 > start and s1[end1 - 1] == s2[end2 - 1]:
+        end1 -= 1
+        end2 -= 1
+    s1 = s1[start:end1]
+    s2 = s2[start:end2]
+    len1, len2 = len(s1), len(s2)
+    if len2 == 0:
+        return len1 if len1 <= max_distance else over
+
+    k = max_distance
+    # Linha 0: distância até o prefixo vazio, fora da faixa vale "over"
+    previous = [j if j <= k else over for j in range(len2 + 1)]
+    current = [over] * (len2 + 1)
+
+    for i in range(1, len1 + 1):
+        c1 = s1[i - 1]
+        low = max(1, i - k)
+        high = min(len2, i + k)
+
+        # Célula à esquerda da faixa (coluna 0 ou fora da diagonal)
+        current[low - 1] = i if low == 1 else over
+        row_min = current[low - 1]
+
+        for j in range(low, high + 1):
+            value = previous[j - 1] + (c1 != s2[j - 1])
+            insertion = current[j - 1] + 1
+            if insertion < value:
+                value = insertion
+            deletion = previous[j] + 1
+            if deletion < value:
+                value = deletion
+            if value > over:
+                value = over
+            current[j] = value
+            if value < row_min:
+                row_min = value
+
+        # Célula à direita da faixa, lida pela próxima linha
+        if high < len2:
+            current[high + 1] = over
+
+        # O mínimo de uma linha nunca diminui nas linhas seguintes
+        if row_min > k:
+            return over
+
+        previous, current = current, previous
+
+    distance = previous[len2]
+    return distance if distance <= k else over
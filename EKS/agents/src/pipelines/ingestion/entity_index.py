@@ -0,0 +1,340 @@
+"""
+Entity Index - Estruturas em memória usadas no matching de entidades
+Tabela de nomes normalizados, mapas de match exato e índice de trigramas
+
+O índice é construído de forma incremental (node a node), o que permite
+alimentá-lo página a página durante o carregamento do grafo e só publicá-lo
+para o EntityMatchingAgent quando estiver completo. Também aceita upsert e
+remoção in place, usados pelo refresh incremental (delta desde o watermark).
+
+Os nodes ficam em NodeRecord (__slots__, tuplas e strings internadas), não em
+modelos Pydantic: GraphNode só é materializado para os candidatos retornados.
+"""
+
+from typing import Optional, List, Dict, Any, Tuple, Set, Iterable, Union
+from pydantic import BaseModel, Field
+from dataclasses import dataclass
+import unicodedata
+import sys
+import re
+
+from .ngram_index import NGramIndex
+from .typo_index import DeletionIndex
+from .phonetic import phonetic_key
+
+
+class GraphNode(BaseModel):
+    """Node existente no grafo Neo4j"""
+    id: str
+    label: str
+    name: str
+    canonical_name: Optional[str] = None
+    aliases: List[str] = Field(default_factory=list)
+    context: Optional[str] = None
+
+
+class NodeRecord:
+    """
+    Node do grafo no cache de matching (forma compacta do GraphNode).
+
+    Labels são internados (poucos valores distintos); canonical_name igual ao
+    nome reaproveita a mesma string; aliases vivem numa tupla.
+    """
+
+    __slots__ = ('id', 'label', 'name', 'canonical_name', 'aliases', 'context')
+
+    def __init__(
+        self,
+        id: str,
+        label: str,
+        name: str,
+        canonical_name: Optional[str] = None,
+        aliases: Tuple[str, ...] = (),
+        context: Optional[str] = None
+    ):
+        self.id = id
+        self.label = sys.intern(label)
+        self.name = name
+        self.canonical_name = name if canonical_name == name else canonical_name
+        self.aliases = aliases
+        self.context = context
+
+    @classmethod
+    def from_record(cls, r: Dict[str, Any]) -> "NodeRecord":
+        """Registro retornado pelas queries do graph_loader (sem validação Pydantic)"""
+        aliases = r['aliases']
+        return cls(
+            id=r['id'],
+            label=r['label'],
+            name=r['name'],
+            canonical_name=r['canonical_name'],
+            aliases=tuple(a for a in aliases if isinstance(a, str)) if isinstance(aliases, list) else (),
+            context=r['context']
+        )
+
+    @classmethod
+    def from_graph_node(cls, node: GraphNode) -> "NodeRecord":
+        return cls(
+            id=node.id,
+            label=node.label,
+            name=node.name,
+            canonical_name=node.canonical_name,
+            aliases=tuple(node.aliases),
+            context=node.context
+        )
+
+    def same_as(self, other: "NodeRecord") -> bool:
+        """Mesmos campos indexados (o refresh pula nodes reenviados sem mudança)"""
+        return (
+            self.id == other.id
+            and self.label == other.label
+            and self.name == other.name
+            and self.canonical_name == other.canonical_name
+            and self.aliases == other.aliases
+            and self.context == other.context
+        )
+
+    def to_graph_node(self) -> GraphNode:
+        """Materializa o GraphNode (apenas para nodes devolvidos ao chamador)"""
+        return GraphNode(
+            id=self.id,
+            label=self.label,
+            name=self.name,
+            canonical_name=self.canonical_name,
+            aliases=list(self.aliases),
+            context=self.context
+        )
+
+
+@dataclass(slots=True)
+class NormalizedNode:
+    """
+    Entrada do cache de matching: node do grafo + textos pré-normalizados.
+    Calculada uma única vez no load para não re-normalizar a cada comparação.
+    """
+    node: NodeRecord
+    name: str                               # Nome canônico normalizado
+    aliases: Tuple[str, ...]                # Aliases normalizados (mesma ordem de node.aliases)
+    name_tokens: Tuple[str, ...]            # Palavras distintas do nome canônico
+    alias_tokens: Tuple[Tuple[str, ...], ...]  # Palavras distintas de cada alias
+    name_key: str                           # Chave fonética do nome ("" se curta demais)
+    alias_keys: Tuple[str, ...]             # Chave fonética de cada alias
+
+
+def _tokens(text: str) -> Tuple[str, ...]:
+    """Palavras distintas (na ordem) de um texto normalizado"""
+    return tuple(dict.fromkeys(text.split()))
+
+
+def normalize_text(text: str) -> str:
+    """Normaliza texto para comparação (lowercase, sem acentos, sem pontuação)"""
+    if not text:
+        return ""
+    # Lowercase
+    text = text.lower().strip()
+    # Remove acentos
+    text = unicodedata.normalize('NFD', text)
+    text = ''.join(c for c in text if unicodedata.category(c) != 'Mn')
+    # Remove pontuação e espaços extras
+    text = re.sub(r'[^\w\s]', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text
+
+
+class EntityIndex:
+    """
+    Snapshot das estruturas de matching para um conjunto de nodes.
+
+    - nodes / entries: nodes na ordem de carga e seus textos normalizados
+    - exact_names / exact_aliases: fast path de match exato (O(1))
+    - ngrams: índice invertido de trigramas para geração de candidatos
+    - label_positions: partição das posições por label (matching restrito a um tipo)
+    - typos: deleções simétricas dos textos curtos (candidatos fuzzy por distância)
+    - phonetic: chave fonética -> (posição, índice do alias ou -1 para o nome)
+
+    As posições são densas: a remoção move o último node para a posição liberada.
+    """
+
+    def __init__(self, typo_max_distance: int = 0, typo_max_length: int = 0):
+        self.nodes: List[NodeRecord] = []
+        self.entries: List[NormalizedNode] = []
+        self.positions: Dict[str, int] = {}  # node.id -> posição
+        self.ngrams = NGramIndex()
+        # Nome canônico / alias normalizado -> posições (e índice do alias)
+        self.exact_names: Dict[str, List[int]] = {}
+        self.exact_aliases: Dict[str, List[Tuple[int, int]]] = {}
+        self.label_positions: Dict[str, Set[int]] = {}
+        self.phonetic: Dict[str, List[Tuple[int, int]]] = {}
+        self.typos = DeletionIndex(typo_max_distance, typo_max_length)
+        self.normalized_bytes = 0
+        self.node_bytes = 0
+
+    @classmethod
+    def build(cls, nodes: Iterable[Union[GraphNode, NodeRecord]], **options: int) -> "EntityIndex":
+        """Constrói um índice completo a partir de uma lista de nodes"""
+        index = cls(**options)
+        for node in nodes:
+            index.add(node)
+        return index
+
+    def add(self, node: Union[GraphNode, NodeRecord]) -> int:
+        """Adiciona um node a todas as estruturas e retorna sua posição"""
+        if isinstance(node, GraphNode):
+            node = NodeRecord.from_graph_node(node)
+        position = len(self.entries)
+        entry = self._normalize_node(node)
+        self.nodes.append(node)
+        self.entries.append(entry)
+        self.positions[node.id] = position
+        self.normalized_bytes += self._entry_size(entry)
+        self.node_bytes += self._record_size(node)
+        self._index_entry(position, entry)
+        # Indexado por texto (não por posição): não muda quando nodes são movidos
+        self.typos.add([entry.name, *entry.aliases])
+        return position
+
+    def upsert(self, node: Union[GraphNode, NodeRecord]) -> int:
+        """Insere ou substitui (pelo id) um node já indexado"""
+        self.remove(node.id)
+        return self.add(node)
+
+    def remove(self, node_id: str) -> bool:
+        """Remove um node de todas as estruturas; retorna False se não estava indexado"""
+        position = self.positions.pop(node_id, None)
+        if position is None:
+            return False
+
+        entry = self.entries[position]
+        self._unindex_entry(position, entry)
+        self.typos.remove([entry.name, *entry.aliases])
+        self.normalized_bytes -= self._entry_size(entry)
+        self.node_bytes -= self._record_size(entry.node)
+
+        # Move o último node para a posição liberada (mantém posições densas)
+        last = len(self.entries) - 1
+        if position != last:
+            moved = self.entries[last]
+            self._unindex_entry(last, moved)
+            self.entries[position] = moved
+            self.nodes[position] = moved.node
+            self.positions[moved.node.id] = position
+            self._index_entry(position, moved)
+        self.entries.pop()
+        self.nodes.pop()
+        return True
+
+    def _index_entry(self, position: int, entry: NormalizedNode) -> None:
+        self.ngrams.add(position, [entry.name, *entry.aliases])
+        self.label_positions.setdefault(entry.node.label, set()).add(position)
+        if entry.name_key:
+            self.phonetic.setdefault(entry.name_key, []).append((position, -1))
+        for alias_index, alias_key in enumerate(entry.alias_keys):
+            if alias_key:
+                self.phonetic.setdefault(alias_key, []).append((position, alias_index))
+        if entry.name:
+            self.exact_names.setdefault(entry.name, []).append(position)
+        for alias_index, n_alias in enumerate(entry.aliases):
+            if n_alias:
+                self.exact_aliases.setdefault(n_alias, []).append((position, alias_index))
+
+    def _unindex_entry(self, position: int, entry: NormalizedNode) -> None:
+        self.ngrams.remove(position, [entry.name, *entry.aliases])
+        label_positions = self.label_positions.get(entry.node.label)
+        if label_positions is not None:
+            label_positions.discard(position)
+            if not label_positions:
+                del self.label_positions[entry.node.label]
+        if entry.name_key:
+            self._discard(self.phonetic, entry.name_key, (position, -1))
+        for alias_index, alias_key in enumerate(entry.alias_keys):
+            if alias_key:
+                self._discard(self.phonetic, alias_key, (position, alias_index))
+        if entry.name:
+            self._discard(self.exact_names, entry.name, position)
+        for alias_index, n_alias in enumerate(entry.aliases):
+            if n_alias:
+                self._discard(self.exact_aliases, n_alias, (position, alias_index))
+
+    @staticmethod
+    def _discard(mapping: Dict[str, list], key: str, value: Any) -> None:
+        values = mapping.get(key)
+        if values is None:
+            return
+        if value in values:
+            values.remove(value)
+        if not values:
+            del mapping[key]
+
+    def positions_for_labels(self, labels: Iterable[str]) -> Set[int]:
+        """
+        Posições dos nodes com algum dos labels informados.
+        Aceita o label do grafo ou o entity_type do NER (ex: "organization").
+        """
+        by_key = {label.lower(): label for label in self.label_positions}
+        positions: Set[int] = set()
+        for label in labels:
+            key = by_key.get(label.lower())
+            if key is not None:
+                positions |= self.label_positions[key]
+        return positions
+
+    def graph_node(self, position: int) -> GraphNode:
+        """GraphNode materializado do node na posição"""
+        return self.nodes[position].to_graph_node()
+
+    def graph_nodes(self, limit: Optional[int] = None) -> List[GraphNode]:
+        """GraphNodes materializados (todos ou os primeiros limit)"""
+        return [record.to_graph_node() for record in self.nodes[:limit]]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def _normalize_node(node: NodeRecord) -> NormalizedNode:
+        """Pré-normaliza nome canônico e aliases de um node"""
+        name = normalize_text(node.canonical_name or node.name)
+        aliases = tuple(normalize_text(alias) for alias in node.aliases)
+        return NormalizedNode(
+            node=node,
+            name=name,
+            aliases=aliases,
+            name_tokens=_tokens(name),
+            alias_tokens=tuple(_tokens(alias) for alias in aliases),
+            name_key=phonetic_key(name),
+            alias_keys=tuple(phonetic_key(alias) for alias in aliases)
+        )
+
+    @staticmethod
+    def _entry_size(entry: NormalizedNode) -> int:
+        """Estimativa (bytes) do overhead da tabela normalizada para um node"""
+        size = sys.getsizeof(entry.name) + sys.getsizeof(entry.name_tokens)
+        size += sys.getsizeof(entry.aliases) + sys.getsizeof(entry.alias_tokens)
+        size += sum(sys.getsizeof(alias) for alias in entry.aliases)
+        size += sum(sys.getsizeof(tokens) for tokens in entry.alias_tokens)
+        size += sys.getsizeof(entry.name_key) + sum(sys.getsizeof(key) for key in entry.alias_keys)
+        return size
+
+    @staticmethod
+    def _record_size(record: NodeRecord) -> int:
+        """Estimativa (bytes) de um NodeRecord (label internado não conta)"""
+        size = sys.getsizeof(record) + sys.getsizeof(record.id) + sys.getsizeof(record.name)
+        if record.canonical_name is not record.name and record.canonical_name:
+            size += sys.getsizeof(record.canonical_name)
+        if record.context:
+            size += sys.getsizeof(record.context)
+        size += sys.getsizeof(record.aliases) + sum(sys.getsizeof(alias) for alias in record.aliases)
+        return size
+
+    def stats(self) -> Dict[str, Any]:
+        """Tamanho das estruturas (exposto no endpoint de debug)"""
+        return {
+            "nodes": len(self.entries),
+            "normalized_strings": sum(1 + len(entry.aliases) for entry in self.entries),
+            "normalized_bytes": self.normalized_bytes,
+            "node_bytes": self.node_bytes,
+            "ngram_postings": len(self.ngrams),
+            "typo_variants": len(self.typos),
+            "phonetic_keys": len(self.phonetic),
+            "exact_keys": len(self.exact_names) + len(self.exact_aliases),
+            "labels": {label: len(positions) for label, positions in self.label_positions.items()},
+        }
@@ -0,0 +1,501 @@
+"""
+Entity Index Service - Snapshot único do grafo para os agentes de ingestão
+Carregado uma vez, atualizado uma vez e consultado tanto pelo EntityMatchingAgent
+quanto pelo NERAgent (mesma memória, mesmo snapshot para os dois pipelines)
+
+Responsável por:
+- Carga completa paginada (swap atômico do EntityIndex ao final)
+- Refresh incremental in place (delta desde o watermark + remoções)
+- Single-flight: cargas/refreshes concorrentes compartilham a mesma execução
+- Gate de leitores: batches que leem o índice fora do event loop (threads)
+  impedem que o delta seja aplicado no meio da leitura
+- Snapshot em disco (opcional): warm start a partir do arquivo + delta
+"""
+
+from typing import Optional, List, Dict, Any, Callable, Awaitable, AsyncIterator, Union, Tuple
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+import time
+
+from .entity_index import EntityIndex, GraphNode, NodeRecord
+from .typo_index import typo_coverage
+from . import index_snapshot
+from .graph_loader import (
+    iter_graph_node_pages,
+    iter_graph_node_ids,
+    iter_graph_nodes_by_id,
+    DEFAULT_PAGE_SIZE,
+    ProgressCallback,
+)
+
+logger = logging.getLogger(__name__)
+
+# Deltas guardados para réplicas do índice (workers); acima disso o log é descartado
+# e as réplicas recebem o índice inteiro de novo
+MAX_CHANGE_LOG = 50000
+
+# (versão resultante, 'upsert' | 'remove', NodeRecord | node id)
+IndexChange = Tuple[int, str, Any]
+
+
+class EntityIndexService:
+    """
+    Dono do EntityIndex em memória e do seu ciclo de vida (carga, refresh, stats).
+
+    Configurações:
+    - labels: Labels carregados do grafo (default: DEFAULT_LABELS do graph_loader)
+    - page_size: Nodes por página/query no carregamento
+    - fuzzy_threshold / typo_max_distance: dimensionam o índice de deleções
+      (textos curtos o bastante para o EntityMatchingAgent usá-lo sem perder matches)
+    - snapshot_path: Arquivo do snapshot em disco (None = desativado); gravado
+      após cada carga/refresh com mudanças e lido na primeira carga
+    - snapshot_max_age_seconds: Idade máxima de um snapshot aceito (0 = sem limite)
+    """
+
+    def __init__(
+        self,
+        neo4j_driver=None,
+        labels: Optional[List[str]] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        fuzzy_threshold: float = 0.7,
+        typo_max_distance: int = 2,
+        snapshot_path: Optional[str] = None,
+        snapshot_max_age_seconds: float = 0
+    ):
+        self.neo4j_driver = neo4j_driver
+        # Snapshot atual (substituído inteiro na carga completa; criado em configure)
+        self.index: Optional[EntityIndex] = None
+        # Incrementada a cada troca de snapshot ou delta aplicado (cópias em workers)
+        self.version = 0
+        # Deltas aplicados in place desde a última troca de snapshot (versão > _changes_base)
+        self._changes: List[IndexChange] = []
+        self._changes_base = 0
+        self.loaded = False
+        # Serializa carga completa e refresh incremental (nunca rodam ao mesmo tempo)
+        self._write_lock = asyncio.Lock()
+        self.configure(
+            labels=labels,
+            page_size=page_size,
+            fuzzy_threshold=fuzzy_threshold,
+            typo_max_distance=typo_max_distance,
+            snapshot_path=snapshot_path,
+            snapshot_max_age_seconds=snapshot_max_age_seconds
+        )
+        # Maior changed_at (epoch ms) já aplicado ao cache: base do refresh incremental
+        self.watermark: Optional[int] = None
+        # Single-flight: uma carga/refresh em andamento é compartilhada pelos chamadores
+        # com os mesmos argumentos (chave: operação + labels / detect_deletes)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Callbacks de progresso dos chamadores da execução em andamento de cada chave
+        # (lista criada junto com a execução: nunca passa para a próxima)
+        self._progress_listeners: Dict[str, List[ProgressCallback]] = {}
+        # Batches em threads leem o índice vivo: o delta só é aplicado sem leitores ativos
+        self._active_readers = 0
+        self._readers_idle = asyncio.Event()
+        self._readers_idle.set()
+        # Delta aplicado em background depois de um warm start pelo snapshot
+        self._catch_up: Optional[asyncio.Task] = None
+
+    def configure(
+        self,
+        labels: Optional[List[str]] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        fuzzy_threshold: float = 0.7,
+        typo_max_distance: int = 2,
+        snapshot_path: Optional[str] = None,
+        snapshot_max_age_seconds: float = 0
+    ) -> None:
+        """
+        Define as opções do serviço (ver docstring da classe). Só antes da
+        primeira carga: o índice carregado foi construído com as opções anteriores.
+        """
+        if self.loaded or self._write_lock.locked():
+            raise RuntimeError("EntityIndexService options cannot change after the index is loaded")
+        self.options: Dict[str, Any] = {
+            'labels': labels,
+            'page_size': page_size,
+            'fuzzy_threshold': fuzzy_threshold,
+            'typo_max_distance': typo_max_distance,
+            'snapshot_path': snapshot_path,
+            'snapshot_max_age_seconds': snapshot_max_age_seconds,
+        }
+        self.labels = labels
+        self.page_size = page_size
+        self.snapshot_path = snapshot_path
+        self.snapshot_max_age_seconds = snapshot_max_age_seconds
+        _, typo_max_length = typo_coverage(fuzzy_threshold, typo_max_distance)
+        self._index_options = {
+            'typo_max_distance': typo_max_distance if typo_max_length else 0,
+            'typo_max_length': typo_max_length,
+        }
+        if self.index is None:
+            self.index = self.new_index()
+        else:
+            # Nodes definidos em memória (set_nodes) são reindexados com as novas opções
+            self.publish(self.new_index(self.index.nodes))
+
+    def new_index(self, nodes: Optional[List[Union[GraphNode, NodeRecord]]] = None) -> EntityIndex:
+        """EntityIndex vazio (ou construído a partir de nodes) com as opções do serviço"""
+        return EntityIndex.build(nodes or [], **self._index_options)
+
+    def publish(self, index: EntityIndex) -> None:
+        """Publica um novo snapshot (troca atômica da referência)"""
+        self.index = index
+        self.version += 1
+        self._changes = []
+        self._changes_base = self.version
+
+    def set_nodes(self, nodes: List[Union[GraphNode, NodeRecord]]) -> None:
+        """Substitui o snapshot por um índice construído a partir de nodes em memória"""
+        self.publish(self.new_index(nodes))
+
+    def changes_since(self, version: int) -> Optional[List[IndexChange]]:
+        """
+        Deltas aplicados depois de version, em ordem (réplicas do índice os reaplicam).
+        None se houve troca de snapshot desde version (a réplica precisa do índice inteiro).
+        """
+        if version < self._changes_base:
+            return None
+        return [change for change in self._changes if change[0] > version]
+
+    @asynccontextmanager
+    async def reading(self) -> AsyncIterator[EntityIndex]:
+        """Marca um leitor do índice vivo fora do event loop (bloqueia a aplicação de deltas)"""
+        self._active_readers += 1
+        self._readers_idle.clear()
+        try:
+            yield self.index
+        finally:
+            self._active_readers -= 1
+            if self._active_readers == 0:
+                self._readers_idle.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Tamanho do snapshot e estado do ciclo de vida (exposto no endpoint de debug)"""
+        return {
+            **self.index.stats(),
+            "loaded": self.loaded,
+            "version": self.version,
+            "watermark": self.watermark,
+            "snapshot_path": self.snapshot_path,
+        }
+
+    @staticmethod
+    def node_from_record(r: Dict[str, Any]) -> NodeRecord:
+        return NodeRecord.from_record(r)
+
+    @staticmethod
+    def _load_key(labels: Optional[List[str]]) -> str:
+        return f"load:{sorted(labels) if labels is not None else None}"
+
+    async def _single_flight(
+        self,
+        key: str,
+        factory: Callable[[ProgressCallback], Awaitable[Any]],
+        on_progress: Optional[ProgressCallback] = None
+    ) -> Any:
+        """
+        Executa factory(report) uma única vez por chave enquanto estiver em andamento;
+        chamadores concorrentes aguardam o mesmo resultado (ou a mesma exceção).
+        report repassa o progresso ao on_progress de todos os chamadores dessa execução.
+        O shield impede que o cancelamento de um chamador cancele a carga compartilhada.
+        """
+        task = self._inflight.get(key)
+        if task is None or task.done():
+            listeners: List[ProgressCallback] = []
+
+            def report(loaded: int, label: str) -> None:
+                for callback in list(listeners):
+                    callback(loaded, label)
+
+            # A execução só começa no próximo ciclo do loop: o on_progress de quem
+            # a criou é registrado antes do primeiro report
+            task = asyncio.ensure_future(factory(report))
+            self._inflight[key] = task
+            self._progress_listeners[key] = listeners
+            task.add_done_callback(lambda _: self._drop_listeners(key, listeners))
+        if on_progress:
+            self._progress_listeners[key].append(on_progress)
+        return await asyncio.shield(task)
+
+    def _drop_listeners(self, key: str, listeners: List[ProgressCallback]) -> None:
+        """Descarta os callbacks de uma execução finalizada (se outra ainda não a substituiu)"""
+        if self._progress_listeners.get(key) is listeners:
+            del self._progress_listeners[key]
+
+    async def aclose(self) -> None:
+        """Cancela cargas/refreshes em andamento e espera terminarem (antes de fechar o driver)"""
+        tasks = [t for t in (*self._inflight.values(), self._catch_up) if t is not None and not t.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._inflight.clear()
+        self._progress_listeners.clear()
+
+    async def ensure_loaded(self) -> None:
+        """Garante o snapshot carregado; requisições concorrentes compartilham a mesma carga"""
+        if self.loaded or not self.neo4j_driver:
+            return
+        if not self.snapshot_path:
+            await self.load(labels=self.labels)
+            return
+
+        # Mesma chave de load(self.labels): uma carga completa em andamento é reaproveitada
+        key = self._load_key(self.labels)
+
+        async def warm_start(report: ProgressCallback) -> List[NodeRecord]:
+            async with self._write_lock:
+                if self.loaded:
+                    return self.index.nodes
+                if await self._restore_snapshot():
+                    # Serve o snapshot já; o delta desde o watermark vem em background
+                    self._catch_up = asyncio.ensure_future(self.refresh())
+                    self._catch_up.add_done_callback(self._log_catch_up)
+                    return self.index.nodes
+                nodes = await self._load(self.labels, report)
+            await self.save_snapshot()
+            return nodes
+
+        await self._single_flight(key, warm_start)
+
+    async def _restore_snapshot(self) -> bool:
+        """Publica o índice do snapshot em disco, se existir e for compatível"""
+        started = time.perf_counter()
+        restored = await asyncio.to_thread(
+            index_snapshot.load_snapshot,
+            self.snapshot_path,
+            self.labels,
+            self._index_options,
+            self.snapshot_max_age_seconds
+        )
+        if restored is None:
+            return False
+
+        index, watermark = restored
+        self.publish(index)
+        self.watermark = watermark
+        self.loaded = True
+        logger.info(
+            f"Entity index restored from snapshot: {len(index)} nodes in "
+            f"{time.perf_counter() - started:.2f}s (watermark {watermark})"
+        )
+        return True
+
+    @staticmethod
+    def _log_catch_up(task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            logger.warning(f"⚠️ Failed to apply delta after snapshot restore: {error}")
+
+    async def save_snapshot(self) -> Optional[int]:
+        """
+        Grava o snapshot atual em disco (fora do event loop).
+        Segura o gate de leitores para que nenhum delta seja aplicado durante a escrita.
+
+        Returns:
+            Tamanho do arquivo em bytes (None se desativado ou se a escrita falhar)
+        """
+        if not self.snapshot_path or not self.loaded:
+            return None
+        try:
+            async with self.reading() as index:
+                return await asyncio.to_thread(
+                    index_snapshot.save_snapshot,
+                    self.snapshot_path,
+                    index,
+                    self.watermark,
+                    self.labels,
+                    self._index_options
+                )
+        except OSError as e:
+            logger.warning(f"⚠️ Failed to save index snapshot {self.snapshot_path}: {e}")
+            return None
+
+    async def load(
+        self,
+        labels: Optional[List[str]] = None,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> List[NodeRecord]:
+        """
+        Carga completa dos nodes do Neo4j.
+
+        A carga é paginada (keyset por elementId) e sem limite total; o índice
+        é construído página a página e só substitui o atual ao final (swap
+        atômico), então buscas concorrentes continuam usando o snapshot anterior.
+        Chamadores concorrentes com os mesmos labels compartilham a carga e todos
+        recebem o progresso; com labels diferentes, as cargas rodam em sequência.
+        """
+        if not self.neo4j_driver:
+            return []
+
+        async def load(report: ProgressCallback) -> List[NodeRecord]:
+            async with self._write_lock:
+                nodes = await self._load(labels, report)
+            await self.save_snapshot()
+            return nodes
+
+        return await self._single_flight(self._load_key(labels), load, on_progress)
+
+    async def _load(
+        self,
+        labels: Optional[List[str]],
+        on_progress: Optional[ProgressCallback]
+    ) -> List[NodeRecord]:
+        index = self.new_index()
+        watermark = 0
+        async for records in iter_graph_node_pages(
+            self.neo4j_driver,
+            labels=labels,
+            page_size=self.page_size,
+            on_progress=on_progress
+        ):
+            for r in records:
+                watermark = max(watermark, r.get('changed_at') or 0)
+                if not r['name']:  # Ignora nodes sem nome
+                    continue
+                index.add(self.node_from_record(r))
+
+        self.publish(index)
+        self.labels = labels
+        self.watermark = watermark
+        self.loaded = True
+        logger.info(f"Entity index loaded: {len(index)} nodes (version {self.version})")
+        return index.nodes
+
+    async def refresh(self, detect_deletes: bool = True) -> Dict[str, int]:
+        """
+        Refresh incremental: aplica in place apenas o delta desde o watermark.
+
+        - Nodes com updatedAt/createdAt >= watermark são inseridos ou atualizados
+          (os que voltam iguais ao que já está no índice não contam como mudança)
+        - Nodes que perderam o nome saem do índice
+        - Com detect_deletes, os elementIds atuais do grafo são comparados com o
+          índice (query leve, só ids): nodes apagados saem e nodes que faltam
+          (sem timestamp, invisíveis para o delta) são carregados por id
+
+        Sem carga prévia, faz a carga completa. Refreshes concorrentes
+        compartilham a mesma execução.
+
+        Returns:
+            Contagem de nodes inseridos/atualizados, removidos e total em cache
+        """
+        if not self.neo4j_driver:
+            return {'upserted': 0, 'removed': 0, 'total': len(self.index)}
+
+        if not self.loaded or self.watermark is None:
+            await self.load(labels=self.labels)
+            return {'upserted': len(self.index), 'removed': 0, 'total': len(self.index)}
+
+        async def refresh(report: ProgressCallback) -> Dict[str, int]:
+            async with self._write_lock:
+                counts = await self._refresh(detect_deletes)
+            if counts['upserted'] or counts['removed']:
+                await self.save_snapshot()
+            return counts
+
+        return await self._single_flight(f"refresh:{detect_deletes}", refresh)
+
+    async def _refresh(self, detect_deletes: bool) -> Dict[str, int]:
+        watermark = self.watermark
+        changed: List[Dict[str, Any]] = []
+
+        # >= no watermark (com a margem de fuso do graph_loader): nodes já aplicados
+        # voltam no delta e são pulados abaixo se nada mudou
+        async for records in iter_graph_node_pages(
+            self.neo4j_driver,
+            labels=self.labels,
+            page_size=self.page_size,
+            since=self.watermark
+        ):
+            changed.extend(records)
+
+        graph_ids = None
+        if detect_deletes:
+            graph_ids = set()
+            async for ids in iter_graph_node_ids(
+                self.neo4j_driver,
+                labels=self.labels,
+                page_size=self.page_size
+            ):
+                graph_ids.update(ids)
+
+            seen = set(self.index.positions)
+            seen.update(r['id'] for r in changed)
+            missing = [i for i in graph_ids if i not in seen]
+            async for records in iter_graph_nodes_by_id(
+                self.neo4j_driver,
+                missing,
+                page_size=self.page_size
+            ):
+                changed.extend(records)
+
+        # Aplica o delta de uma vez (sem await) quando nenhum batch em thread está lendo
+        await self._readers_idle.wait()
+        index = self.index
+        upserted = 0
+        removed = 0
+        log: List[Tuple[str, Any]] = []
+        for r in changed:
+            watermark = max(watermark, r.get('changed_at') or 0)
+            if not r['name']:
+                if index.remove(r['id']):
+                    removed += 1
+                    log.append(('remove', r['id']))
+                continue
+            node = self.node_from_record(r)
+            position = index.positions.get(node.id)
+            if position is not None and index.nodes[position].same_as(node):
+                continue
+            index.upsert(node)
+            upserted += 1
+            log.append(('upsert', node))
+
+        if graph_ids is not None:
+            for node_id in [i for i in index.positions if i not in graph_ids]:
+                if index.remove(node_id):
+                    removed += 1
+                    log.append(('remove', node_id))
+
+        if upserted or removed:
+            self.version += 1
+            self._changes.extend((self.version, op, value) for op, value in log)
+            if len(self._changes) > MAX_CHANGE_LOG:
+                self._changes = []
+                self._changes_base = self.version
+        self.watermark = watermark
+        return {'upserted': upserted, 'removed': removed, 'total': len(index)}
+
+
+# Instância compartilhada pelo processo (EntityMatchingAgent do router, NERAgent, ...)
+_shared_service: Optional[EntityIndexService] = None
+
+
+def get_entity_index_service(neo4j_driver=None, **options: Any) -> EntityIndexService:
+    """
+    Retorna o EntityIndexService do processo, criando-o na primeira chamada.
+
+    Um driver informado depois é adotado se faltava. Opções informadas depois
+    (ex.: o router configurando um serviço criado antes pelo NERAgent, sem opções)
+    são aplicadas enquanto o índice não foi carregado; depois disso, opções
+    divergentes são ignoradas com um aviso.
+    """
+    global _shared_service
+
+    if _shared_service is None:
+        _shared_service = EntityIndexService(neo4j_driver=neo4j_driver, **options)
+        return _shared_service
+
+    if neo4j_driver is not None and _shared_service.neo4j_driver is None:
+        _shared_service.neo4j_driver = neo4j_driver
+    changed = sorted(k for k, v in options.items() if _shared_service.options.get(k) != v)
+    if changed:
+        if _shared_service.loaded or _shared_service._write_lock.locked():
+            logger.warning(
+                f"⚠️ Entity index service already loaded; ignoring options {', '.join(changed)}"
+            )
+        else:
+            _shared_service.configure(**{**_shared_service.options, **options})
+    return _shared_service
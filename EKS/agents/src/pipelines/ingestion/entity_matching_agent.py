@@ -8,28 +8,35 @@ Este agente é responsável por:
 3. Retornar sugestões de vinculação com scores de confiança
 """
 
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, Collection, Set, Callable
 from pydantic import BaseModel, Field
-from dataclasses import dataclass
-import unicodedata
-import re
+from functools import lru_cache
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
 
+from .ngram_index import NGRAM_SIZE
+from .edit_distance import bounded_levenshtein, max_distance_for
+from .vector_scoring import HAS_NUMPY, batch_fuzzy_scores
+from .typo_index import typo_coverage, typo_distance_for
+from .phonetic import phonetic_key
+from .entity_index import EntityIndex, GraphNode, NodeRecord, NormalizedNode, normalize_text
+from .entity_index_service import EntityIndexService, IndexChange
+from .graph_loader import DEFAULT_PAGE_SIZE, ProgressCallback
 
-class GraphNode(BaseModel):
-    """Node existente no grafo Neo4j"""
-    id: str
-    label: str
-    name: str
-    canonical_name: Optional[str] = None
-    aliases: List[str] = Field(default_factory=list)
-    context: Optional[str] = None
+# Máximo de candidatos retornados por termo
+MAX_CANDIDATES = 5
+
+# Réplicas do índice no pool recebem os deltas junto com cada chunk; acima deste
+# número de deltas acumulados o pool é recriado com uma cópia nova do índice
+POOL_RESEED_CHANGES = 2000
 
 
 class MatchCandidate(BaseModel):
     """Candidato de match encontrado"""
     node: GraphNode
     score: float = Field(ge=0, le=1, description="Score de similaridade 0-1")
-    match_type: str = Field(description="exact, alias, fuzzy, partial")
+    match_type: str = Field(description="exact, alias, fuzzy, partial, phonetic")
     matched_term: str = Field(description="Termo que deu match")
 
 
@@ -49,39 +56,159 @@ class EntityMatchingAgent:
     Estratégias de matching (em ordem de prioridade):
     1. Match exato no nome canônico
     2. Match exato em aliases (thesaurus)
-    3. Match fuzzy usando distância de Levenshtein
+    3. Match fuzzy usando distância de Levenshtein (limitada pelo fuzzy_threshold)
     4. Match parcial (contém)
     
     Configurações:
     - fuzzy_threshold: Score mínimo para considerar match fuzzy (default: 0.7)
     - partial_threshold: Score mínimo para match parcial (default: 0.6)
+    
+    O cache de nodes é um EntityIndex (tabela normalizada, mapas de match exato e
+    índice de trigramas) que limita a pontuação aos nodes que compartilham algum
+    trigrama com o termo. Para termos curtos, o índice de deleções (typo_max_distance)
+    entrega direto os textos a poucas edições, sem Levenshtein contra cada candidato.
+    Nodes com a mesma chave fonética do termo (grafias que soam igual) entram como
+    candidatos extras com score phonetic_score.
+    
+    O índice pertence a um EntityIndexService: sem index_service, o agente cria um
+    serviço próprio; o router passa o serviço compartilhado do processo, o mesmo
+    consultado pelo NERAgent.
     """
     
     def __init__(
         self, 
         neo4j_driver=None,
         fuzzy_threshold: float = 0.7,
-        partial_threshold: float = 0.6
+        partial_threshold: float = 0.6,
+        term_cache_size: int = 10000,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        match_workers: int = 0,
+        match_chunk_size: int = 64,
+        vector_min_candidates: int = 256,
+        typo_max_distance: int = 2,
+        phonetic_score: float = 0.75,
+        index_service: Optional[EntityIndexService] = None
     ):
         self.neo4j_driver = neo4j_driver
         self.fuzzy_threshold = fuzzy_threshold
         self.partial_threshold = partial_threshold
-        self.graph_nodes: List[GraphNode] = []
-        self._loaded = False
+        self.page_size = page_size
+        # Batch matching: processos (> 0) ou uma thread fora do event loop (0), em chunks de termos
+        self.match_workers = match_workers
+        self.match_chunk_size = max(1, match_chunk_size)
+        # Acima deste número de candidatos o score fuzzy é calculado em lote (NumPy)
+        self.vector_min_candidates = vector_min_candidates
+        # Índice de deleções: termos até _typo_term_length têm todos os matches fuzzy
+        # dentro de typo_max_distance
+        self.typo_max_distance = typo_max_distance
+        self._typo_term_length, _ = typo_coverage(fuzzy_threshold, typo_max_distance)
+        # Score de um match só fonético (0 desativa); abaixo de 0.9 vai para revisão
+        self.phonetic_score = phonetic_score
+        # Snapshot, carga e refresh do grafo (possivelmente compartilhado com outros agentes)
+        self.index_service = index_service or EntityIndexService(
+            neo4j_driver=neo4j_driver,
+            page_size=page_size,
+            fuzzy_threshold=fuzzy_threshold,
+            typo_max_distance=typo_max_distance
+        )
+        # Termos de entrada se repetem muito entre batches: normalização memoizada
+        self._normalize_term = lru_cache(maxsize=term_cache_size)(self._normalize_text)
+        # Pool de processos com cópia do índice na versão _pool_version
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_version = -1
+    
+    @property
+    def _index(self) -> EntityIndex:
+        """Snapshot atual do serviço de índice"""
+        return self.index_service.index
+    
+    @property
+    def _loaded(self) -> bool:
+        return self.index_service.loaded
+    
+    @_loaded.setter
+    def _loaded(self, loaded: bool) -> None:
+        self.index_service.loaded = loaded
+    
+    @property
+    def graph_nodes(self) -> List[GraphNode]:
+        """
+        Nodes em cache materializados como GraphNode (atribuir uma nova lista
+        reconstrói o índice). Materializa o cache inteiro: prefira node_count e
+        list_graph_nodes.
+        """
+        return self._index.graph_nodes()
+    
+    @graph_nodes.setter
+    def graph_nodes(self, nodes: List[GraphNode]) -> None:
+        self.index_service.set_nodes(nodes)
+    
+    @property
+    def node_count(self) -> int:
+        return len(self._index)
+    
+    def list_graph_nodes(self, limit: Optional[int] = None) -> List[GraphNode]:
+        """Primeiros nodes do cache como GraphNode (debug/listagens)"""
+        return self._index.graph_nodes(limit)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Estatísticas do cache de normalização (memória e hit rate do LRU de termos)"""
+        info = self._normalize_term.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            **self.index_service.stats(),
+            "term_cache": {
+                "hits": info.hits,
+                "misses": info.misses,
+                "size": info.currsize,
+                "max_size": info.maxsize,
+                "hit_rate": round(info.hits / lookups, 4) if lookups else 0.0
+            }
+        }
+    
+    def _index_is_lossless(self) -> bool:
+        """
+        O filtro por trigramas só é exato quando os thresholds garantem que todo
+        match válido compartilha um trigrama com o termo (ver ngram_index).
+        Com thresholds mais permissivos, find_matches volta ao scan completo.
+        """
+        return (
+            self.fuzzy_threshold >= 1 - 1 / NGRAM_SIZE
+            and self.partial_threshold > 0.5
+        )
+    
+    def _candidate_entries(
+        self,
+        index: EntityIndex,
+        n_term: str,
+        allowed: Optional[Set[int]] = None,
+        extra: Optional[Set[int]] = None
+    ) -> List[NormalizedNode]:
+        """
+        Entradas que precisam ser pontuadas para o termo normalizado.
+        allowed restringe às posições da partição de labels pedida;
+        extra são posições de outros geradores (ex: match fonético).
+        """
+        if not self._index_is_lossless():
+            if allowed is None:
+                return index.entries
+            positions = allowed
+        else:
+            positions = index.ngrams.candidates(n_term)
+            if allowed is not None:
+                positions &= allowed
+            if extra:
+                positions |= extra
+        return [index.entries[p] for p in sorted(positions)]
         
     def normalize(self, text: str) -> str:
+        """Normaliza texto para comparação (memoizado via LRU de termos)"""
+        return self._normalize_term(text)
+    
+    @staticmethod
+    def _normalize_text(text: str) -> str:
         """Normaliza texto para comparação (lowercase, sem acentos, sem pontuação)"""
-        if not text:
-            return ""
-        # Lowercase
-        text = text.lower().strip()
-        # Remove acentos
-        text = unicodedata.normalize('NFD', text)
-        text = ''.join(c for c in text if unicodedata.category(c) != 'Mn')
-        # Remove pontuação e espaços extras
-        text = re.sub(r'[^\w\s]', '', text)
-        text = re.sub(r'\s+', ' ', text)
-        return text
+        return normalize_text(text)
     
     def levenshtein_distance(self, s1: str, s2: str) -> int:
         """Calcula distância de Levenshtein entre duas strings"""
@@ -104,7 +231,10 @@ class EntityMatchingAgent:
     
     def fuzzy_score(self, term1: str, term2: str) -> float:
         """Calcula score de similaridade fuzzy (0-1)"""
-        n1, n2 = self.normalize(term1), self.normalize(term2)
+        return self._fuzzy_normalized(self.normalize(term1), self.normalize(term2))
+    
+    def _fuzzy_normalized(self, n1: str, n2: str) -> float:
+        """Score fuzzy exato entre textos já normalizados"""
         if not n1 or not n2:
             return 0.0
         if n1 == n2:
@@ -114,14 +244,79 @@ class EntityMatchingAgent:
         max_len = max(len(n1), len(n2))
         return 1 - (distance / max_len)
     
+    def _fuzzy_within_threshold(self, n1: str, n2: str) -> float:
+        """
+        Score fuzzy entre textos já normalizados, limitado ao fuzzy_threshold.
+        
+        Usa Levenshtein banded com a distância máxima derivada do threshold;
+        retorna 0.0 sem calcular a matriz completa quando o par não atinge o threshold.
+        """
+        if not n1 or not n2:
+            return 0.0
+        if n1 == n2:
+            return 1.0
+        
+        max_len = max(len(n1), len(n2))
+        max_distance = max_distance_for(self.fuzzy_threshold, max_len)
+        distance = bounded_levenshtein(n1, n2, max_distance)
+        if distance > max_distance:
+            return 0.0
+        return 1 - (distance / max_len)
+    
+    def _fuzzy_scorer(
+        self,
+        index: EntityIndex,
+        n_term: str,
+        entries: List[NormalizedNode]
+    ) -> Callable[[str], float]:
+        """
+        Função de score fuzzy do termo contra um alvo normalizado.
+        
+        Termos curtos usam o índice de deleções: só os textos a até k edições podem
+        atingir o threshold, os demais valem 0.0. Com muitos candidatos (e NumPy
+        disponível), nomes e aliases distintos são pontuados de uma vez em lote;
+        caso contrário, par a par com a Levenshtein limitada.
+        """
+        if 0 < len(n_term) <= self._typo_term_length:
+            max_distance, max_length = typo_distance_for(self.fuzzy_threshold, len(n_term))
+            # O índice pode ter sido dimensionado por outro serviço: só usa se cobre o termo
+            typo_covered = (
+                index.typos.max_distance >= max_distance
+                and index.typos.max_length >= max_length
+            )
+        else:
+            typo_covered = False
+        if typo_covered:
+            scores = {
+                n_target: self._fuzzy_within_threshold(n_term, n_target)
+                for n_target in index.typos.lookup(n_term, max_distance)
+            }
+            return lambda n_target: scores.get(n_target, 0.0)
+        if HAS_NUMPY and len(entries) >= self.vector_min_candidates > 0:
+            targets = set()
+            for entry in entries:
+                targets.add(entry.name)
+                targets.update(entry.aliases)
+            return batch_fuzzy_scores(n_term, targets, self.fuzzy_threshold).__getitem__
+        return lambda n_target: self._fuzzy_within_threshold(n_term, n_target)
+    
     def partial_match_score(self, term: str, target: str) -> float:
         """
         Score para match parcial (um contém o outro).
         Melhorado para lidar com casos como "Montreal" em "Montreal Ventures".
         """
-        n_term = self.normalize(term)
         n_target = self.normalize(target)
-        
+        return self._partial_normalized(
+            self.normalize(term), n_target, frozenset(n_target.split())
+        )
+    
+    def _partial_normalized(
+        self,
+        n_term: str,
+        n_target: str,
+        target_words: Collection[str]
+    ) -> float:
+        """Score parcial entre textos já normalizados (target_words: palavras distintas do target)"""
         if not n_term or not n_target:
             return 0.0
         if n_term == n_target:
@@ -145,90 +340,157 @@ class EntityMatchingAgent:
         
         # Word-based matching: verifica se todas as palavras do term estão no target
         term_words = [w for w in n_term.split() if len(w) > 2]  # Ignora palavras muito curtas
-        target_words = set(n_target.split())
         
         if term_words and all(word in target_words for word in term_words):
             # Todas as palavras do term estão no target
-            matched_ratio = len(term_words) / max(len(term_words), len(target_words.split()))
+            matched_ratio = len(term_words) / max(len(term_words), len(target_words))
             return min(0.8, 0.6 + (matched_ratio * 0.2))
         
         return 0.0
     
-    async def load_graph_nodes(self, labels: List[str] = None) -> List[GraphNode]:
+    async def ensure_loaded(self) -> None:
+        """Garante o cache carregado; requisições concorrentes compartilham a mesma carga"""
+        await self.index_service.ensure_loaded()
+    
+    async def load_graph_nodes(
+        self,
+        labels: List[str] = None,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> List[NodeRecord]:
         """
-        Carrega nodes do Neo4j para cache local.
+        Carrega nodes do Neo4j para cache local (carga completa do EntityIndexService).
+        
+        A carga é paginada (keyset por elementId) e sem limite total; o índice
+        é construído página a página e só substitui o atual ao final (swap
+        atômico), então buscas concorrentes continuam usando o snapshot anterior.
+        Chamadas concorrentes compartilham a mesma carga em andamento.
         
         Args:
             labels: Lista de labels a carregar (default: Organization, Tool, Concept, Product, Person)
+            on_progress: Callback (nodes carregados, label) chamado a cada página
         """
-        if not self.neo4j_driver:
-            return []
-        
-        if labels is None:
-            labels = ['Organization', 'Tool', 'Concept', 'Product', 'Person', 'ExternalParticipant']
-        
-        label_filter = ' OR '.join([f'n:{label}' for label in labels])
-        
-        query = f"""
-        MATCH (n)
-        WHERE {label_filter}
-        RETURN 
-            elementId(n) as id,
-            labels(n)[0] as label,
-            COALESCE(n.name, '') as name,
-            COALESCE(n.canonicalName, n.name, '') as canonical_name,
-            COALESCE(n.aliases, []) as aliases,
-            COALESCE(n.context, n.description, '') as context
-        LIMIT 1000
+        return await self.index_service.load(labels=labels, on_progress=on_progress)
+    
+    async def refresh_graph_nodes(self, detect_deletes: bool = True) -> Dict[str, int]:
         """
+        Refresh incremental do cache (delta desde o watermark, ver EntityIndexService.refresh).
         
-        async with self.neo4j_driver.session() as session:
-            result = await session.run(query)
-            records = await result.data()
-        
-        self.graph_nodes = [
-            GraphNode(
-                id=r['id'],
-                label=r['label'],
-                name=r['name'],
-                canonical_name=r['canonical_name'],
-                aliases=r['aliases'] if isinstance(r['aliases'], list) else [],
-                context=r['context']
-            )
-            for r in records
-            if r['name']  # Ignora nodes sem nome
-        ]
+        Returns:
+            Contagem de nodes inseridos/atualizados, removidos e total em cache
+        """
+        return await self.index_service.refresh(detect_deletes=detect_deletes)
+    
+    def _exact_matches(
+        self,
+        index: EntityIndex,
+        n_term: str,
+        allowed: Optional[Set[int]] = None
+    ) -> List[MatchCandidate]:
+        """
+        Matches exatos (nome canônico) e de alias via lookup nos mapas de hash.
         
-        self._loaded = True
-        return self.graph_nodes
+        Mesmos scores do scan: 1.0 para exact e 0.95 para alias; um node que
+        casa pelo nome não é repetido como alias.
+        """
+        candidates: List[MatchCandidate] = []
+        exact_positions = index.exact_names.get(n_term, [])
+        if allowed is not None:
+            exact_positions = [p for p in exact_positions if p in allowed]
+        for position in exact_positions[:MAX_CANDIDATES]:
+            node = index.nodes[position]
+            candidates.append(MatchCandidate(
+                node=node.to_graph_node(),
+                score=1.0,
+                match_type="exact",
+                matched_term=node.canonical_name or node.name
+            ))
+        
+        seen = set(exact_positions)
+        for position, alias_index in index.exact_aliases.get(n_term, []):
+            if len(candidates) >= MAX_CANDIDATES:
+                break
+            if position in seen or (allowed is not None and position not in allowed):
+                continue
+            seen.add(position)
+            node = index.nodes[position]
+            candidates.append(MatchCandidate(
+                node=node.to_graph_node(),
+                score=0.95,
+                match_type="alias",
+                matched_term=node.aliases[alias_index]
+            ))
+        
+        return candidates
     
-    def find_matches(self, term: str) -> List[MatchCandidate]:
+    def _phonetic_matches(
+        self,
+        index: EntityIndex,
+        n_term: str,
+        allowed: Optional[Set[int]] = None
+    ) -> Dict[int, int]:
+        """Posição -> índice do alias (-1 = nome) dos nodes com a chave fonética do termo"""
+        if self.phonetic_score <= 0:
+            return {}
+        key = phonetic_key(n_term)
+        if not key:
+            return {}
+        hits: Dict[int, int] = {}
+        for position, alias_index in index.phonetic.get(key, []):
+            if allowed is not None and position not in allowed:
+                continue
+            # O nome tem prioridade sobre aliases do mesmo node
+            if alias_index == -1 or position not in hits:
+                hits[position] = alias_index
+        return hits
+    
+    def find_matches(self, term: str, labels: Optional[List[str]] = None) -> List[MatchCandidate]:
         """
         Busca matches para um termo no cache de nodes.
         
+        Matches exatos/alias são resolvidos por lookup em O(1) e retornados
+        diretamente; só os demais termos passam pelo scoring fuzzy/parcial.
+        Com labels, apenas nodes desses labels (ou entity_types do NER) são pontuados.
         Retorna lista ordenada por score (melhor primeiro).
         """
         if not term:
             return []
         
-        candidates: List[MatchCandidate] = []
         n_term = self.normalize(term)
-        
-        for node in self.graph_nodes:
+        # Referência local: um reload concorrente não altera o snapshot em uso
+        index = self._index
+        allowed = index.positions_for_labels(labels) if labels else None
+        
+        # Fast path: termo idêntico a um nome canônico ou alias conhecido
+        exact = self._exact_matches(index, n_term, allowed)
+        if exact:
+            return exact
+        
+        # Top-k em heap de tamanho fixo: (score, -ordem) na raiz é o pior dos mantidos;
+        # empates preservam a ordem de scan, como no sort estável
+        top: List[Tuple[float, int, NormalizedNode, str, str]] = []
+        
+        # Apenas nodes que compartilham trigramas com o termo
+        phonetic = self._phonetic_matches(index, n_term, allowed)
+        entries = self._candidate_entries(index, n_term, allowed, set(phonetic))
+        phonetic_ids = {index.nodes[p].id: alias_index for p, alias_index in phonetic.items()}
+        score_fuzzy = self._fuzzy_scorer(index, n_term, entries)
+        for order, entry in enumerate(entries):
+            node = entry.node
+            node_name = node.canonical_name or node.name
             best_score = 0.0
             best_type = ""
             matched_term = ""
             
             # 1. Match exato no nome canônico
-            if self.normalize(node.canonical_name or node.name) == n_term:
+            if entry.name == n_term:
                 best_score = 1.0
                 best_type = "exact"
-                matched_term = node.canonical_name or node.name
+                matched_term = node_name
             
             # 2. Match exato em aliases
             if best_score < 1.0:
-                for alias in node.aliases:
-                    if self.normalize(alias) == n_term:
+                for alias, n_alias in zip(node.aliases, entry.aliases):
+                    if n_alias == n_term:
                         best_score = 0.95
                         best_type = "alias"
                         matched_term = alias
@@ -236,16 +498,16 @@ class EntityMatchingAgent:
             
             # 3. Match fuzzy no nome
             if best_score < 0.9:
-                fuzzy = self.fuzzy_score(term, node.canonical_name or node.name)
+                fuzzy = score_fuzzy(entry.name)
                 if fuzzy >= self.fuzzy_threshold and fuzzy > best_score:
                     best_score = fuzzy
                     best_type = "fuzzy"
-                    matched_term = node.canonical_name or node.name
+                    matched_term = node_name
             
             # 4. Match fuzzy em aliases
             if best_score < 0.9:
-                for alias in node.aliases:
-                    fuzzy = self.fuzzy_score(term, alias)
+                for alias, n_alias in zip(node.aliases, entry.aliases):
+                    fuzzy = score_fuzzy(n_alias)
                     if fuzzy >= self.fuzzy_threshold and fuzzy > best_score:
                         best_score = fuzzy
                         best_type = "fuzzy_alias"
@@ -253,48 +515,73 @@ class EntityMatchingAgent:
             
             # 5. Match parcial (substring/word-based)
             if best_score < self.fuzzy_threshold:
-                partial = self.partial_match_score(term, node.canonical_name or node.name)
+                partial = self._partial_normalized(n_term, entry.name, entry.name_tokens)
                 if partial >= self.partial_threshold and partial > best_score:
                     best_score = partial
                     best_type = "partial"
-                    matched_term = node.canonical_name or node.name
+                    matched_term = node_name
             
             # 6. Match parcial em aliases
             if best_score < self.fuzzy_threshold:
-                for alias in node.aliases:
-                    partial = self.partial_match_score(term, alias)
+                for alias, n_alias, alias_tokens in zip(node.aliases, entry.aliases, entry.alias_tokens):
+                    partial = self._partial_normalized(n_term, n_alias, alias_tokens)
                     if partial >= self.partial_threshold and partial > best_score:
                         best_score = partial
                         best_type = "partial_alias"
                         matched_term = alias
             
+            # 7. Match fonético (nome ou alias com a mesma chave)
+            if best_score < self.fuzzy_threshold and self.phonetic_score > best_score:
+                alias_index = phonetic_ids.get(node.id)
+                if alias_index is not None:
+                    best_score = self.phonetic_score
+                    if alias_index == -1:
+                        best_type = "phonetic"
+                        matched_term = node_name
+                    else:
+                        best_type = "phonetic_alias"
+                        matched_term = node.aliases[alias_index]
+            
             if best_score >= self.partial_threshold:
-                candidates.append(MatchCandidate(
-                    node=node,
-                    score=best_score,
-                    match_type=best_type,
-                    matched_term=matched_term
-                ))
-        
-        # Ordena por score decrescente
-        candidates.sort(key=lambda c: c.score, reverse=True)
-        return candidates[:5]  # Top 5
-    
-    async def match_entity(self, term: str) -> MatchResult:
+                item = (best_score, -order, entry, best_type, matched_term)
+                if len(top) < MAX_CANDIDATES:
+                    heapq.heappush(top, item)
+                elif item[:2] > top[0][:2]:
+                    heapq.heapreplace(top, item)
+        
+        # Ordena só os top-k por score decrescente
+        top.sort(key=lambda item: item[:2], reverse=True)
+        return [
+            MatchCandidate(
+                node=entry.node.to_graph_node(),
+                score=score,
+                match_type=match_type,
+                matched_term=matched_term
+            )
+            for score, _, entry, match_type, matched_term in top
+        ]
+    
+    async def match_entity(self, term: str, labels: Optional[List[str]] = None) -> MatchResult:
         """
         Processa um termo e retorna resultado do matching.
         
         Args:
             term: Termo/entidade a buscar no grafo
+            labels: Restringe o matching a estes labels/entity_types (opcional)
             
         Returns:
             MatchResult com candidatos e sugestão de ação
         """
-        # Carrega nodes se ainda não carregou
-        if not self._loaded and self.neo4j_driver:
-            await self.load_graph_nodes()
+        # Carrega nodes se ainda não carregou (single-flight)
+        await self.ensure_loaded()
         
-        candidates = self.find_matches(term)
+        # Scoring fora do event loop; o gate de leitores segura os deltas enquanto pontua
+        async with self.index_service.reading():
+            return await asyncio.to_thread(self._match_term, term, labels)
+    
+    def _match_term(self, term: str, labels: Optional[List[str]] = None) -> MatchResult:
+        """Matching síncrono de um termo (também executado em threads/processos)"""
+        candidates = self.find_matches(term, labels)
         
         if not candidates:
             return MatchResult(
@@ -323,23 +610,150 @@ class EntityMatchingAgent:
             suggested_action=action
         )
     
-    async def match_entities(self, terms: List[str]) -> List[MatchResult]:
-        """Processa múltiplos termos em batch"""
-        if not self._loaded and self.neo4j_driver:
-            await self.load_graph_nodes()
+    def _match_chunk(self, terms: List[str], labels: Optional[List[str]] = None) -> List[MatchResult]:
+        return [self._match_term(term, labels) for term in terms]
+    
+    async def match_entities(
+        self,
+        terms: List[str],
+        labels: Optional[List[str]] = None
+    ) -> List[MatchResult]:
+        """
+        Processa múltiplos termos em batch.
+        
+        Termos repetidos são pontuados uma única vez, em chunks: em paralelo num
+        pool de processos quando match_workers > 0; senão numa thread, fora do
+        event loop (o GIL não deixa pontuar em paralelo, mas o loop continua
+        atendendo outras requisições). Resultados voltam na ordem de entrada.
+        labels (opcional) restringe o matching a esses labels.
+        """
+        await self.ensure_loaded()
         
-        results = []
-        for term in terms:
-            result = await self.match_entity(term)
-            results.append(result)
+        unique_terms = list(dict.fromkeys(terms))
+        chunks = [
+            unique_terms[i:i + self.match_chunk_size]
+            for i in range(0, len(unique_terms), self.match_chunk_size)
+        ]
+        
+        if self.match_workers > 0 and len(chunks) > 1:
+            chunk_results = await self._match_chunks_in_pool(chunks, labels)
+        else:
+            chunk_results = await self._match_chunks_in_thread(chunks, labels)
         
-        return results
+        by_term: Dict[str, MatchResult] = {}
+        for chunk, results in zip(chunks, chunk_results):
+            by_term.update(zip(chunk, results))
+        return [by_term[term] for term in terms]
+    
+    async def _match_chunks_in_thread(
+        self,
+        chunks: List[List[str]],
+        labels: Optional[List[str]]
+    ) -> List[List[MatchResult]]:
+        """
+        Chunks em sequência numa thread (fora do event loop), inclusive um chunk só.
+        O gate de leitores impede que um delta seja aplicado no meio do batch.
+        """
+        async with self.index_service.reading():
+            return await asyncio.to_thread(
+                lambda: [self._match_chunk(chunk, labels) for chunk in chunks]
+            )
+    
+    async def _match_chunks_in_pool(
+        self,
+        chunks: List[List[str]],
+        labels: Optional[List[str]]
+    ) -> List[List[MatchResult]]:
+        """Chunks em paralelo no pool de processos (cada worker tem uma réplica do índice)"""
+        pool, changes = self._get_pool()
+        version = self.index_service.version
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*[
+            loop.run_in_executor(pool, _match_chunk_in_worker, chunk, labels, version, changes)
+            for chunk in chunks
+        ])
+    
+    def _get_pool(self) -> Tuple[ProcessPoolExecutor, List[IndexChange]]:
+        """
+        Pool de processos e os deltas do índice desde a criação do pool.
+
+        Os workers recebem o índice inteiro só na criação do pool; depois, cada
+        chunk leva os deltas (refresh incremental) e o worker aplica os que ainda
+        não aplicou. O pool é recriado numa troca de snapshot (carga completa) ou
+        quando os deltas acumulados passam de POOL_RESEED_CHANGES.
+        """
+        changes = None
+        if self._pool is not None:
+            changes = self.index_service.changes_since(self._pool_version)
+        if changes is None or len(changes) > POOL_RESEED_CHANGES:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=False)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.match_workers,
+                initializer=_init_match_worker,
+                initargs=(self._scoring_options(), self._index, self.index_service.version)
+            )
+            self._pool_version = self.index_service.version
+            changes = []
+        return self._pool, changes
+    
+    def _scoring_options(self) -> Dict[str, Any]:
+        """Parâmetros de scoring repassados aos agentes dos workers"""
+        return {
+            'fuzzy_threshold': self.fuzzy_threshold,
+            'partial_threshold': self.partial_threshold,
+            'vector_min_candidates': self.vector_min_candidates,
+            'typo_max_distance': self.typo_max_distance,
+            'phonetic_score': self.phonetic_score,
+        }
+    
+    def shutdown(self) -> None:
+        """Encerra o pool de processos de matching (se houver)"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Estado de cada processo do pool de matching
+_worker_agent: Optional[EntityMatchingAgent] = None
+
+
+# Versão do índice do processo pai refletida pela réplica do worker
+_worker_version = -1
+
+
+def _init_match_worker(options: Dict[str, Any], index: EntityIndex, version: int) -> None:
+    """Initializer do pool: agente local com o snapshot do índice recebido"""
+    global _worker_agent, _worker_version
+    _worker_agent = EntityMatchingAgent(**options)
+    _worker_agent.index_service.publish(index)
+    _worker_agent._loaded = True
+    _worker_version = version
+
+
+def _match_chunk_in_worker(
+    terms: List[str],
+    labels: Optional[List[str]],
+    version: int,
+    changes: List[IndexChange]
+) -> List[MatchResult]:
+    """Aplica os deltas ainda não vistos por este worker (na ordem do pai) e pontua o chunk"""
+    global _worker_version
+    if version > _worker_version:
+        index = _worker_agent.index_service.index
+        for change_version, op, value in changes:
+            if change_version <= _worker_version:
+                continue
+            if op == 'upsert':
+                index.upsert(value)
+            else:
+                index.remove(value)
+        _worker_version = version
+    return _worker_agent._match_chunk(terms, labels)
 
 
 # Exemplo de uso
 if __name__ == "__main__":
-    import asyncio
-    
     async def test():
         agent = EntityMatchingAgent()
         
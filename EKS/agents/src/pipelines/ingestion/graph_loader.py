@@ -0,0 +1,250 @@
+"""
+Graph Loader - Carregamento paginado de nodes do Neo4j para os caches de matching
+Substitui as queries únicas com LIMIT fixo (1000/500), que deixavam a maior
+parte do grafo invisível para o matching
+
+Paginação por keyset (elementId) dentro de cada label: cada página é uma query
+curta com memória limitada ao tamanho da página, e o consumidor processa os
+registros à medida que chegam.
+
+Cada registro traz changed_at (epoch ms de updatedAt/createdAt, 0 quando ausente
+ou ilegível), usado como watermark para o refresh incremental (apenas nodes
+alterados desde a última carga).
+"""
+
+from typing import Optional, List, Dict, Any, AsyncIterator, Callable
+from datetime import date, datetime, timedelta, timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LABELS = ['Organization', 'Tool', 'Concept', 'Product', 'Person', 'ExternalParticipant']
+DEFAULT_PAGE_SIZE = 2000
+
+# (nodes carregados até agora, label da página atual)
+ProgressCallback = Callable[[int, str], None]
+
+# Um node com vários labels da lista só é retornado no scan do primeiro deles,
+# evitando duplicatas sem manter um set de ids em memória.
+# updatedAt/createdAt voltam crus (changed): a conversão para epoch ms é feita em
+# Python (changed_at_millis), então um valor malformado nunca derruba a carga.
+_NODE_COLUMNS = """
+RETURN
+    elementId(n) as id,
+    labels(n)[0] as label,
+    COALESCE(n.name, '') as name,
+    COALESCE(n.canonicalName, n.name, '') as canonical_name,
+    COALESCE(n.aliases, []) as aliases,
+    COALESCE(n.context, n.description, '') as context,
+    COALESCE(n.updatedAt, n.createdAt) as changed
+"""
+
+PAGE_QUERY = """
+MATCH (n:`{label}`)
+WHERE ($cursor IS NULL OR elementId(n) > $cursor)
+  AND head([l IN labels(n) WHERE l IN $labels]) = $label
+WITH n
+ORDER BY elementId(n)
+LIMIT $pageSize
+""" + _NODE_COLUMNS
+
+# Delta: o timestamp é comparado no seu próprio tipo, sem conversão (que falharia
+# numa string malformada). Comparações entre tipos diferentes dão null e não casam.
+# - epoch ms (número) e ZONED DATETIME: comparação exata
+# - LOCAL DATETIME, DATE e strings ISO: fuso desconhecido, comparados com folga
+#   de ZONE_MARGIN_MS (releitura de um mesmo node é idempotente)
+# Nodes sem timestamp (ou com string que não é ISO) não aparecem no delta; entram
+# na carga completa ou na reconciliação de ids do refresh (detect_deletes).
+DELTA_PAGE_QUERY = """
+MATCH (n:`{label}`)
+WHERE ($cursor IS NULL OR elementId(n) > $cursor)
+  AND head([l IN labels(n) WHERE l IN $labels]) = $label
+WITH n, COALESCE(n.updatedAt, n.createdAt) as changed
+WHERE changed >= $since
+   OR changed >= $sinceTime
+   OR changed >= $sinceLocal
+   OR changed >= $sinceDate
+   OR changed >= $sinceText
+WITH n
+ORDER BY elementId(n)
+LIMIT $pageSize
+""" + _NODE_COLUMNS
+
+NODES_BY_ID_QUERY = """
+MATCH (n)
+WHERE elementId(n) IN $ids
+""" + _NODE_COLUMNS
+
+# Maior diferença de fuso possível (UTC-12 a UTC+14)
+ZONE_MARGIN_MS = 14 * 3600 * 1000
+
+# Nodes sem nome não entram no índice: também ficam fora da reconciliação de ids
+ID_PAGE_QUERY = """
+MATCH (n:`{label}`)
+WHERE ($cursor IS NULL OR elementId(n) > $cursor)
+  AND head([l IN labels(n) WHERE l IN $labels]) = $label
+  AND COALESCE(n.name, '') <> ''
+WITH n
+ORDER BY elementId(n)
+LIMIT $pageSize
+RETURN elementId(n) as id
+"""
+
+
+def changed_at_millis(value: Any) -> int:
+    """
+    updatedAt/createdAt em epoch ms. Aceita número (epoch ms), datetime/date do
+    driver e string ISO; sem fuso conta como UTC. Qualquer outro valor vira 0.
+    """
+    if value is None or isinstance(value, bool):
+        return 0
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.strip())
+        except ValueError:
+            return 0
+    elif hasattr(value, 'to_native'):  # neo4j.time.DateTime/Date
+        try:
+            value = value.to_native()
+        except (ValueError, OverflowError):
+            return 0
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp() * 1000)
+    if isinstance(value, date):
+        return int(datetime(value.year, value.month, value.day, tzinfo=timezone.utc).timestamp() * 1000)
+    return 0
+
+
+def _since_parameters(since: int) -> Dict[str, Any]:
+    """Watermark nos tipos comparados pela DELTA_PAGE_QUERY"""
+    since_time = datetime.fromtimestamp(since / 1000, tz=timezone.utc)
+    # Sem tzinfo o driver envia LOCAL DATETIME
+    since_local = (since_time - timedelta(milliseconds=ZONE_MARGIN_MS)).replace(tzinfo=None)
+    return {
+        'since': since,
+        'sinceTime': since_time,
+        'sinceLocal': since_local,
+        'sinceDate': since_local.date(),
+        'sinceText': since_local.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def _with_changed_at(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    for r in records:
+        r['changed_at'] = changed_at_millis(r.pop('changed', None))
+    return records
+
+
+async def iter_graph_node_pages(
+    neo4j_driver,
+    labels: Optional[List[str]] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    on_progress: Optional[ProgressCallback] = None,
+    since: Optional[int] = None
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Itera sobre os nodes dos labels informados, uma página por vez.
+
+    Args:
+        neo4j_driver: AsyncDriver do Neo4j
+        labels: Labels a carregar (default: DEFAULT_LABELS)
+        page_size: Máximo de registros por página/query
+        on_progress: Callback chamado após cada página
+        since: Se informado, apenas nodes alterados desde since (epoch ms; ver DELTA_PAGE_QUERY)
+
+    Yields:
+        Lista de registros (dicts) de no máximo page_size itens
+    """
+    if labels is None:
+        labels = DEFAULT_LABELS
+
+    loaded = 0
+    template = PAGE_QUERY if since is None else DELTA_PAGE_QUERY
+    since_parameters = {} if since is None else _since_parameters(since)
+    for label in labels:
+        cursor = None
+        query = template.format(label=label.replace('`', ''))
+
+        while True:
+            async with neo4j_driver.session() as session:
+                result = await session.run(query, {
+                    'cursor': cursor,
+                    'labels': labels,
+                    'label': label,
+                    'pageSize': page_size,
+                    **since_parameters
+                })
+                records = _with_changed_at(await result.data())
+
+            if not records:
+                break
+
+            loaded += len(records)
+            cursor = records[-1]['id']
+            logger.debug(f"Loaded {len(records)} {label} nodes ({loaded} total)")
+            if on_progress:
+                on_progress(loaded, label)
+
+            yield records
+
+            if len(records) < page_size:
+                break
+
+    logger.info(f"Graph node load finished: {loaded} nodes from {len(labels)} labels")
+
+
+async def iter_graph_node_ids(
+    neo4j_driver,
+    labels: Optional[List[str]] = None,
+    page_size: int = DEFAULT_PAGE_SIZE
+) -> AsyncIterator[List[str]]:
+    """
+    Itera sobre os elementIds dos nodes dos labels informados (paginado).
+    Usado pelo refresh incremental para detectar nodes removidos do grafo.
+    """
+    if labels is None:
+        labels = DEFAULT_LABELS
+
+    for label in labels:
+        cursor = None
+        query = ID_PAGE_QUERY.format(label=label.replace('`', ''))
+
+        while True:
+            async with neo4j_driver.session() as session:
+                result = await session.run(query, {
+                    'cursor': cursor,
+                    'labels': labels,
+                    'label': label,
+                    'pageSize': page_size
+                })
+                records = await result.data()
+
+            if not records:
+                break
+
+            cursor = records[-1]['id']
+            yield [r['id'] for r in records]
+
+            if len(records) < page_size:
+                break
+
+
+async def iter_graph_nodes_by_id(
+    neo4j_driver,
+    ids: List[str],
+    page_size: int = DEFAULT_PAGE_SIZE
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Registros completos de nodes por elementId, page_size ids por query.
+    Usado pela reconciliação para trazer nodes que o delta não enxerga (sem timestamp).
+    """
+    for start in range(0, len(ids), page_size):
+        async with neo4j_driver.session() as session:
+            result = await session.run(NODES_BY_ID_QUERY, {'ids': ids[start:start + page_size]})
+            records = await result.data()
+        if records:
+            yield _with_changed_at(records)
@@ -0,0 +1,162 @@
+"""
+Index Snapshot - Cópia do EntityIndex em disco para warm start
+Um worker novo restaura o índice do arquivo (sem paginar o grafo nem
+normalizar/indexar cada node) e depois só aplica o delta desde o watermark
+
+Formato (versionado):
+- MAGIC + versão do formato + tamanho do header (struct)
+- Header JSON: watermark, labels, opções do índice, layout das classes, nodes
+- Payload: EntityIndex em pickle (nomes normalizados, trigramas, mapas de
+  match exato, chaves fonéticas e índice de deleções)
+
+O arquivo é lido via mmap e só é aceito se formato, layout, labels e opções
+baterem com o serviço atual; qualquer divergência faz o serviço cair na carga
+completa. A escrita é atômica (arquivo temporário + rename).
+
+O payload é pickle: só carregue snapshots escritos pelo próprio serviço.
+"""
+
+from typing import Optional, List, Dict, Any, Tuple
+from dataclasses import fields
+import json
+import mmap
+import os
+import pickle
+import struct
+import time
+import gc
+import logging
+
+from .entity_index import EntityIndex, NodeRecord, NormalizedNode
+from .ngram_index import NGramIndex
+from .typo_index import DeletionIndex
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"EKSIDX"
+# Incrementar quando o formato do arquivo mudar
+SNAPSHOT_FORMAT = 1
+
+# magic, versão do formato, tamanho do header JSON
+_PREAMBLE = struct.Struct(f"<{len(SNAPSHOT_MAGIC)}sHI")
+
+
+def index_layout() -> List[str]:
+    """
+    Atributos das classes serializadas no payload.
+    Um snapshot escrito com outro layout (campos novos/removidos) é descartado.
+    """
+    return [
+        "EntityIndex:" + ",".join(sorted(vars(EntityIndex()))),
+        "NodeRecord:" + ",".join(NodeRecord.__slots__),
+        "NormalizedNode:" + ",".join(f.name for f in fields(NormalizedNode)),
+        "NGramIndex:" + ",".join(sorted(vars(NGramIndex()))),
+        "DeletionIndex:" + ",".join(sorted(vars(DeletionIndex()))),
+    ]
+
+
+def save_snapshot(
+    path: str,
+    index: EntityIndex,
+    watermark: Optional[int],
+    labels: Optional[List[str]],
+    options: Dict[str, Any]
+) -> int:
+    """
+    Grava o índice em path (atomicamente). Deve rodar sem deltas sendo aplicados.
+
+    Returns:
+        Tamanho do arquivo em bytes
+    """
+    header = json.dumps({
+        "watermark": watermark,
+        "labels": labels,
+        "options": options,
+        "layout": index_layout(),
+        "nodes": len(index),
+        "created_at": time.time(),
+    }).encode("utf-8")
+    payload = pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT, len(header)))
+        f.write(header)
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return _PREAMBLE.size + len(header) + len(payload)
+
+
+def load_snapshot(
+    path: str,
+    labels: Optional[List[str]],
+    options: Dict[str, Any],
+    max_age_seconds: float = 0
+) -> Optional[Tuple[EntityIndex, Optional[int]]]:
+    """
+    Restaura o índice de path se o snapshot for compatível com o serviço atual.
+
+    Args:
+        labels / options: Labels carregados e opções do índice do serviço
+        max_age_seconds: Snapshots mais antigos são ignorados (0 = sem limite)
+
+    Returns:
+        (índice, watermark) ou None (arquivo ausente, corrompido ou incompatível)
+    """
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return _read_snapshot(path, mm, labels, options, max_age_seconds)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, struct.error, pickle.UnpicklingError, EOFError,
+            AttributeError, ImportError, TypeError) as e:
+        logger.warning(f"⚠️ Ignoring unreadable index snapshot {path}: {e}")
+        return None
+
+
+def _read_snapshot(
+    path: str,
+    mm: mmap.mmap,
+    labels: Optional[List[str]],
+    options: Dict[str, Any],
+    max_age_seconds: float
+) -> Optional[Tuple[EntityIndex, Optional[int]]]:
+    magic, version, header_size = _PREAMBLE.unpack_from(mm, 0)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_FORMAT:
+        logger.info(f"Index snapshot {path} has format {version}, expected {SNAPSHOT_FORMAT}")
+        return None
+
+    start = _PREAMBLE.size
+    header = json.loads(mm[start:start + header_size].decode("utf-8"))
+    mismatch = [
+        key for key, expected in (
+            ("labels", labels),
+            ("options", options),
+            ("layout", index_layout()),
+        )
+        if header.get(key) != expected
+    ]
+    if max_age_seconds and time.time() - header.get("created_at", 0) > max_age_seconds:
+        mismatch.append("created_at")
+    if mismatch:
+        logger.info(f"Index snapshot {path} is stale or incompatible ({', '.join(mismatch)})")
+        return None
+
+    # Milhões de objetos de uma vez: o GC cíclico só atrasaria a leitura
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with memoryview(mm) as view:
+            index = pickle.loads(view[start + header_size:])
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    if not isinstance(index, EntityIndex) or len(index) != header.get("nodes"):
+        raise ValueError("payload does not match header")
+    return index, header.get("watermark")
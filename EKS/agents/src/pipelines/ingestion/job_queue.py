@@ -0,0 +1,347 @@
+"""
+Job Queue - Fila assíncrona em processo para ingestões longas
+Submissão retorna um job id na hora; workers (com limite de concorrência)
+processam os jobs e o cliente consulta estágio, progresso e resultado
+
+Stores:
+- JobStore: em memória (jobs se perdem com o processo)
+- SQLiteJobStore: jobs persistidos em SQLite; no start, jobs pendentes ou
+  interrompidos no meio (queued/running) voltam para a fila e são
+  reprocessados do início (a escrita no grafo é MERGE, então é idempotente)
+
+Progresso: o handler recebe um callback report(stage, progress) que atualiza
+o job em memória; o estado é persistido a cada troca de estágio e no fim.
+
+Um job que derruba ou trava o processo volta para a fila a cada restart: depois
+de max_attempts execuções ele é marcado como failed sem rodar de novo.
+Jobs finalizados perdem o payload (a transcrição) e são removidos do store
+depois de retention_seconds ou além de max_finished jobs.
+"""
+
+from typing import Optional, List, Dict, Any, Callable, Awaitable
+from pydantic import BaseModel, Field
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import uuid
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+FINISHED_STATUSES = (JOB_SUCCEEDED, JOB_FAILED)
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETENTION_SECONDS = 24 * 3600
+DEFAULT_MAX_FINISHED = 1000
+
+# Callback de progresso passado ao handler: (estágio, fração 0-1)
+ReportCallback = Callable[[str, float], None]
+JobHandler = Callable[[Dict[str, Any], ReportCallback], Awaitable[Dict[str, Any]]]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _cutoff(retention_seconds: float) -> Optional[str]:
+    """Instante (ISO, comparável com updated_at) antes do qual jobs finalizados expiram"""
+    if not retention_seconds:
+        return None
+    return (datetime.now(timezone.utc) - timedelta(seconds=retention_seconds)).isoformat()
+
+
+class IngestionJob(BaseModel):
+    """Job de ingestão e seu estado"""
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    kind: str
+    status: str = JOB_QUEUED
+    stage: Optional[str] = None
+    progress: float = 0.0
+    payload: Dict[str, Any] = Field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: str = Field(default_factory=_now)
+    updated_at: str = Field(default_factory=_now)
+
+
+class JobStore:
+    """
+    Store em memória (padrão). Subclasses persistem os jobs em outro lugar.
+
+    Jobs finalizados ficam disponíveis para consulta por retention_seconds
+    (0 = sem limite), no máximo max_finished deles (os mais antigos saem antes).
+    """
+
+    def __init__(
+        self,
+        retention_seconds: float = DEFAULT_RETENTION_SECONDS,
+        max_finished: int = DEFAULT_MAX_FINISHED
+    ):
+        self.retention_seconds = retention_seconds
+        self.max_finished = max(1, max_finished)
+        self._jobs: Dict[str, IngestionJob] = {}
+        # Ids dos jobs finalizados, na ordem em que terminaram
+        self._finished: "OrderedDict[str, str]" = OrderedDict()
+
+    async def save(self, job: IngestionJob) -> None:
+        self._jobs[job.id] = job.model_copy(deep=True)
+        if job.status in FINISHED_STATUSES:
+            self._finished[job.id] = job.updated_at
+            self._finished.move_to_end(job.id)
+            self._evict()
+
+    def _evict(self) -> None:
+        cutoff = _cutoff(self.retention_seconds)
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if len(self._finished) <= self.max_finished and (cutoff is None or finished_at >= cutoff):
+                break
+            del self._finished[job_id]
+            self._jobs.pop(job_id, None)
+
+    async def get(self, job_id: str) -> Optional[IngestionJob]:
+        job = self._jobs.get(job_id)
+        return job.model_copy(deep=True) if job else None
+
+    async def pending(self) -> List[IngestionJob]:
+        """Jobs não finalizados (queued/running), na ordem de criação"""
+        jobs = [j for j in self._jobs.values() if j.status in (JOB_QUEUED, JOB_RUNNING)]
+        return sorted(jobs, key=lambda j: j.created_at)
+
+
+class SQLiteJobStore(JobStore):
+    """
+    Store durável em SQLite (um arquivo local por instância do servidor).
+    As operações rodam fora do event loop (asyncio.to_thread).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        retention_seconds: float = DEFAULT_RETENTION_SECONDS,
+        max_finished: int = DEFAULT_MAX_FINISHED
+    ):
+        super().__init__(retention_seconds, max_finished)
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ingestion_jobs ("
+                " id TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"
+                " created_at TEXT NOT NULL,"
+                " data TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ingestion_jobs_status ON ingestion_jobs (status)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ingestion_jobs_created ON ingestion_jobs (created_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _save(self, job: IngestionJob) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO ingestion_jobs (id, status, created_at, data) VALUES (?, ?, ?, ?)",
+                (job.id, job.status, job.created_at, job.model_dump_json())
+            )
+            if job.status in FINISHED_STATUSES:
+                self._evict_finished(conn)
+
+    def _evict_finished(self, conn: sqlite3.Connection) -> None:
+        """Remove jobs finalizados expirados e os que passam de max_finished (por criação)"""
+        finished = FINISHED_STATUSES
+        cutoff = _cutoff(self.retention_seconds)
+        if cutoff is not None:
+            conn.execute(
+                "DELETE FROM ingestion_jobs WHERE status IN (?, ?) AND created_at < ?",
+                (*finished, cutoff)
+            )
+        conn.execute(
+            "DELETE FROM ingestion_jobs WHERE id IN ("
+            " SELECT id FROM ingestion_jobs WHERE status IN (?, ?)"
+            " ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (*finished, self.max_finished)
+        )
+
+    def _query(self, sql: str, params: tuple) -> List[IngestionJob]:
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [IngestionJob.model_validate(json.loads(data)) for (data,) in rows]
+
+    async def save(self, job: IngestionJob) -> None:
+        await asyncio.to_thread(self._save, job)
+
+    async def get(self, job_id: str) -> Optional[IngestionJob]:
+        jobs = await asyncio.to_thread(
+            self._query, "SELECT data FROM ingestion_jobs WHERE id = ?", (job_id,)
+        )
+        return jobs[0] if jobs else None
+
+    async def pending(self) -> List[IngestionJob]:
+        return await asyncio.to_thread(
+            self._query,
+            "SELECT data FROM ingestion_jobs WHERE status IN (?, ?) ORDER BY created_at",
+            (JOB_QUEUED, JOB_RUNNING)
+        )
+
+
+class JobQueue:
+    """
+    Fila de jobs com workers assíncronos.
+
+    - handlers: tipo do job -> corrotina handler(payload, report) que retorna o resultado
+    - concurrency: jobs processados ao mesmo tempo
+    - store: onde os jobs são persistidos (JobStore em memória por padrão)
+    - max_attempts: execuções de um job antes de desistir (inclui as interrompidas
+      por um restart no meio)
+    """
+
+    def __init__(
+        self,
+        handlers: Dict[str, JobHandler],
+        store: Optional[JobStore] = None,
+        concurrency: int = 1,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    ):
+        self.handlers = handlers
+        self.store = store or JobStore()
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        # Jobs em andamento ficam em memória (progresso sem ida ao store)
+        self._active: Dict[str, IngestionJob] = {}
+        self._started = False
+
+    async def start(self) -> int:
+        """
+        Inicia os workers e recoloca na fila os jobs não finalizados do store.
+
+        Returns:
+            Quantidade de jobs recuperados
+        """
+        if self._started:
+            return 0
+        self._started = True
+        recovered = await self.store.pending()
+        for job in recovered:
+            job.status = JOB_QUEUED
+            self._queue.put_nowait(job.id)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"ingestion-job-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        if recovered:
+            logger.info(f"🔄 Recovered {len(recovered)} pending ingestion jobs")
+        return len(recovered)
+
+    async def stop(self) -> None:
+        """Cancela os workers; jobs em andamento continuam 'running' no store e são retomados no próximo start"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = asyncio.Queue()
+        self._started = False
+
+    async def submit(self, kind: str, payload: Dict[str, Any]) -> IngestionJob:
+        """Registra um job e o coloca na fila (inicia os workers se preciso)"""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        # Start antes de salvar: a recuperação de pendentes não pode enfileirar este job
+        await self.start()
+        job = IngestionJob(kind=kind, payload=payload)
+        await self.store.save(job)
+        self._queue.put_nowait(job.id)
+        return job
+
+    async def get(self, job_id: str) -> Optional[IngestionJob]:
+        job = self._active.get(job_id)
+        if job is not None:
+            return job.model_copy(deep=True)
+        return await self.store.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'queued': self._queue.qsize(),
+            'running': len(self._active),
+            'workers': len(self._workers),
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"❌ Ingestion job {job_id} could not be processed: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        job = await self.store.get(job_id)
+        # Sem await entre o teste e o registro em _active: um mesmo id nunca roda duas vezes
+        if job is None or job.status not in (JOB_QUEUED, JOB_RUNNING) or job_id in self._active:
+            return
+
+        if job.attempts >= self.max_attempts:
+            # Execuções anteriores não terminaram (o processo caiu ou travou no meio)
+            logger.error(f"❌ Ingestion job {job.id} abandoned after {job.attempts} attempts")
+            job.status = JOB_FAILED
+            job.error = f"Job did not finish after {job.attempts} attempts"
+            job.payload = {}
+            job.updated_at = _now()
+            await self.store.save(job)
+            return
+
+        job.status = JOB_RUNNING
+        job.attempts += 1
+        job.stage = None
+        job.progress = 0.0
+        job.updated_at = _now()
+        self._active[job.id] = job
+        await self.store.save(job)
+
+        pending_saves: List[asyncio.Task] = []
+
+        def report(stage: str, progress: float) -> None:
+            changed = stage != job.stage
+            job.stage = stage
+            job.progress = round(min(max(progress, 0.0), 1.0), 4)
+            job.updated_at = _now()
+            if changed:
+                pending_saves.append(asyncio.ensure_future(self.store.save(job.model_copy(deep=True))))
+
+        try:
+            job.result = await self.handlers[job.kind](job.payload, report)
+            job.status = JOB_SUCCEEDED
+            job.progress = 1.0
+        except asyncio.CancelledError:
+            # Shutdown: o job fica 'running' no store e é retomado no próximo start
+            raise
+        except Exception as e:
+            logger.error(f"❌ Ingestion job {job.id} failed: {e}")
+            job.status = JOB_FAILED
+            job.error = str(e)
+        finally:
+            self._active.pop(job.id, None)
+
+        await asyncio.gather(*pending_saves, return_exceptions=True)
+        # Finalizado: a transcrição não é mais necessária
+        job.payload = {}
+        job.updated_at = _now()
+        await self.store.save(job)
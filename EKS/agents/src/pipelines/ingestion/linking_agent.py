@@ -3,8 +3,54 @@ Linking Agent - Vinculação de entidades extraídas ao grafo Neo4j
 Cria relacionamentos e sugere criação de novos nodes
 """
 
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from pydantic import BaseModel, Field
+import uuid
+import re
+
+# Linhas por statement UNWIND (reuniões muito grandes viram vários statements)
+DEFAULT_WRITE_BATCH_SIZE = 500
+
+# Tipos de relacionamento e labels vão interpolados na query (Cypher não parametriza tipos)
+_RELATIONSHIP_TYPE = re.compile(r"^[A-Z][A-Z0-9_]*$")
+_LABEL = re.compile(r"^[A-Z][A-Za-z0-9_]*$")
+
+# Itens de conhecimento extraídos: propriedade de título (a chave natural é título + reunião)
+EXTRACTED_TITLE_PROPERTIES = {
+    'Task': 'title',
+    'Decision': 'value',
+    'Risk': 'value',
+    'Insight': 'value',
+}
+
+# Propriedades copiadas da entidade extraída para o node criado (além de título/nome)
+EXTRACTED_PROPERTIES = {
+    'Task': ('priority', 'assignee', 'deadline', 'impact'),
+    'Decision': ('rationale', 'impact', 'relatedPerson'),
+    'Risk': ('impact', 'priority', 'relatedPerson'),
+    'Insight': ('impact', 'relatedPerson'),
+}
+
+# Nomes no node quando diferem do campo da entidade (mesmo schema do backend)
+_PROPERTY_NAMES = {'deadline': 'dueDate'}
+
+LINK_QUERY = """
+MATCH (m:Meeting) WHERE elementId(m) = $meetingId
+UNWIND $rows AS row
+MATCH (e) WHERE elementId(e) = row.entityId
+MERGE (e)-[r:`{relationship}`]->(m)
+RETURN count(r) AS linked
+"""
+
+# MERGE na chave natural; row.id só é gravado quando o node é criado
+CREATE_QUERY = """
+MATCH (m:Meeting) WHERE elementId(m) = $meetingId
+UNWIND $rows AS row
+MERGE (n:`{label}` {{{key}}})
+ON CREATE SET n += row.props, n.id = row.id, n.createdAt = datetime()
+MERGE (n)-[:`{relationship}`]->(m)
+RETURN count(n) AS total, sum(CASE WHEN n.id = row.id THEN 1 ELSE 0 END) AS created
+"""
 
 class LinkSuggestion(BaseModel):
     """Sugestão de vinculação ao grafo"""
@@ -32,8 +78,9 @@ class LinkingAgent:
     3. Criar relacionamentos apropriados (PARTICIPATED_IN, MENTIONED_IN, etc.)
     """
     
-    def __init__(self, neo4j_driver=None):
+    def __init__(self, neo4j_driver=None, write_batch_size: int = DEFAULT_WRITE_BATCH_SIZE):
         self.neo4j_driver = neo4j_driver
+        self.write_batch_size = write_batch_size
         
     async def link_entities(
         self,
@@ -74,18 +121,25 @@ class LinkingAgent:
                     
             elif entity_type == 'mentionedEntity':
                 # Entidades mencionadas - vincular se existir no grafo
-                to_create.append({
-                    'entity': entity,
-                    'suggested_label': self._get_neo4j_label(entity),
-                    'relationship': 'MENTIONED_IN'
-                })
+                if entity.get('linkedNodeId'):
+                    linked.append({
+                        'entity': entity,
+                        'relationship': 'MENTIONED_IN',
+                        'target_id': meeting_id
+                    })
+                else:
+                    to_create.append({
+                        'entity': entity,
+                        'suggested_label': self._get_neo4j_label(entity),
+                        'relationship': 'MENTIONED_IN'
+                    })
                 
             elif entity_type in ['task', 'decision', 'risk', 'insight']:
                 # Itens de conhecimento - criar como nodes próprios
                 to_create.append({
                     'entity': entity,
                     'suggested_label': entity_type.capitalize(),
-                    'relationship': 'DISCUSSED_IN'
+                    'relationship': 'EXTRACTED_FROM'
                 })
             else:
                 skipped.append({
@@ -114,20 +168,69 @@ class LinkingAgent:
         else:
             return 'Concept'
     
+    def _pending_node(
+        self,
+        item: Dict[str, Any],
+        meeting_id: str
+    ) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+        """
+        (label, chave MERGE, linha do UNWIND) de um item de to_create.
+        Itens extraídos usam título + sourceRef da reunião; entidades usam o nome.
+        """
+        entity = item['entity']
+        label = item['suggested_label']
+        value = (entity.get('value') or '').strip()
+        if not value:
+            return None
+        
+        source_ref = entity.get('sourceRef') or f'meeting:{meeting_id}'
+        props = {
+            'description': entity.get('description') or entity.get('context') or '',
+            'confidence': 0.8 if entity.get('confidence') is None else entity['confidence'],
+            'sourceRef': source_ref,
+        }
+        
+        title_property = EXTRACTED_TITLE_PROPERTIES.get(label)
+        if title_property:
+            for prop in EXTRACTED_PROPERTIES[label]:
+                if entity.get(prop):
+                    props[_PROPERTY_NAMES.get(prop, prop)] = entity[prop]
+            if label == 'Task':
+                props['status'] = 'pending'
+            key = f'{title_property}: row.title, sourceRef: row.sourceRef'
+            row = {'title': value, 'sourceRef': source_ref}
+        else:
+            key = 'name: row.name'
+            row = {'name': value}
+        
+        row.update(id=str(uuid.uuid4()), props=props)
+        return label, key, row
+    
     async def create_relationships(
         self,
         linking_result: LinkingResult,
         meeting_id: str
     ) -> Dict[str, int]:
         """
-        Cria os relacionamentos no Neo4j.
+        Cria os relacionamentos e os nodes pendentes (to_create) no Neo4j.
+        
+        Os itens são agrupados por tipo de relacionamento (e, em to_create, por
+        label) e cada grupo é escrito com UNWIND (um statement por
+        write_batch_size linhas), tudo numa única transação de escrita
+        gerenciada (retry automático em erros transitórios; MERGE torna a
+        repetição idempotente).
+        
+        Nodes de to_create são criados com MERGE na chave natural (nome da
+        entidade, ou título + reunião dos itens extraídos) e ligados à reunião
+        (EXTRACTED_FROM, MENTIONED_IN, PARTICIPATED_IN) no mesmo statement.
         
         Args:
             linking_result: Resultado do processo de linking
             meeting_id: ID do node Meeting
             
         Returns:
-            Contagem de relacionamentos criados por tipo
+            Contagem por tipo: linked, created (nodes novos), merged (nodes que
+            já existiam com a mesma chave) e skipped
         """
         if not self.neo4j_driver:
             return {'error': 'Neo4j driver not configured'}
@@ -135,24 +238,72 @@ class LinkingAgent:
         counts = {
             'linked': 0,
             'created': 0,
+            'merged': 0,
             'skipped': len(linking_result.skipped)
         }
         
-        async with self.neo4j_driver.session() as session:
-            # Criar relacionamentos para entidades já linkadas
-            for item in linking_result.linked:
-                entity = item['entity']
-                if entity.get('linkedNodeId'):
-                    query = f"""
-                    MATCH (m:Meeting) WHERE elementId(m) = $meetingId
-                    MATCH (e) WHERE elementId(e) = $entityId
-                    MERGE (e)-[r:{item['relationship']}]->(m)
-                    RETURN r
-                    """
-                    await session.run(query, {
+        # Agrupa entidades já linkadas por tipo de relacionamento
+        links: Dict[str, List[Dict[str, Any]]] = {}
+        for item in linking_result.linked:
+            entity = item['entity']
+            if entity.get('linkedNodeId'):
+                relationship = self._checked(item['relationship'], _RELATIONSHIP_TYPE)
+                links.setdefault(relationship, []).append({'entityId': entity['linkedNodeId']})
+                counts['linked'] += 1
+        
+        # Agrupa nodes a criar por (label, chave, relacionamento)
+        pending: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {}
+        for item in linking_result.to_create:
+            node = self._pending_node(item, meeting_id)
+            if node is None:
+                counts['skipped'] += 1
+                continue
+            label, key, row = node
+            group = (
+                self._checked(label, _LABEL),
+                key,
+                self._checked(item['relationship'], _RELATIONSHIP_TYPE)
+            )
+            pending.setdefault(group, []).append(row)
+        
+        if not links and not pending:
+            return counts
+        
+        batch_size = max(1, self.write_batch_size)
+        
+        async def write_graph(tx) -> Dict[str, int]:
+            # Contagens locais: a função é reexecutada se a transação for repetida
+            written = {'created': 0, 'merged': 0}
+            for relationship, rows in links.items():
+                query = LINK_QUERY.format(relationship=relationship)
+                for start in range(0, len(rows), batch_size):
+                    result = await tx.run(query, {
                         'meetingId': meeting_id,
-                        'entityId': entity['linkedNodeId']
+                        'rows': rows[start:start + batch_size]
                     })
-                    counts['linked'] += 1
+                    await result.consume()
+            
+            for (label, key, relationship), rows in pending.items():
+                query = CREATE_QUERY.format(label=label, key=key, relationship=relationship)
+                for start in range(0, len(rows), batch_size):
+                    result = await tx.run(query, {
+                        'meetingId': meeting_id,
+                        'rows': rows[start:start + batch_size]
+                    })
+                    record = await result.single()
+                    if record:
+                        written['created'] += record['created']
+                        written['merged'] += record['total'] - record['created']
+            return written
+        
+        async with self.neo4j_driver.session() as session:
+            counts.update(await session.execute_write(write_graph))
                     
         return counts
+    
+    @staticmethod
+    def _checked(name: str, pattern: re.Pattern) -> str:
+        """Valida um label/tipo de relacionamento antes de interpolá-lo na query"""
+        if not pattern.match(name or ''):
+            raise ValueError(f"Invalid label or relationship type: {name!r}")
+        return name
@@ -0,0 +1,265 @@
+"""
+Meeting Pipeline - Ingestão de uma reunião ponta a ponta num único processo
+Encadeia os agentes de ingestão (extração/NER -> matching -> linking -> escrita)
+sem round trips HTTP entre eles
+
+Estágios:
+1. extraction + ner: em paralelo (LLM é I/O; o scan do dicionário roda numa thread)
+2. matching: entidades mencionadas em chunks (CPU, fora do event loop)
+3. linking + write: cada chunk vinculado vai para uma fila limitada e é
+   escrito no Neo4j enquanto o próximo chunk é pontuado
+
+A fila limitada (queue_size) dá backpressure: o matching nunca fica mais do
+que queue_size chunks à frente da escrita. Os tempos por estágio são somados
+(ms); como os estágios se sobrepõem, a soma pode passar do total.
+"""
+
+from typing import Optional, List, Dict, Any, Callable
+from pydantic import BaseModel, Field
+from contextlib import contextmanager
+import asyncio
+import time
+
+from .ner_agent import NERAgent, KnownEntityMention, LABEL_ENTITY_TYPES
+from .extraction_agent import ExtractionAgent
+from .entity_matching_agent import EntityMatchingAgent
+from .linking_agent import LinkingAgent
+
+# Chunks vinculados aguardando escrita (backpressure do matching)
+DEFAULT_QUEUE_SIZE = 2
+
+# Callback de progresso: (estágio, fração 0-1 do pipeline)
+PipelineProgress = Callable[[str, float], None]
+
+# Tipo do NER -> label do grafo (restringe o matching de entidades mencionadas)
+_ENTITY_TYPE_LABELS = {entity_type: label for label, entity_type in LABEL_ENTITY_TYPES.items()}
+
+# Tipos do ExtractionAgent consolidados antes do linking (como no backend)
+_ITEM_TYPES = {'actionItem': 'task'}
+
+# Campos do ExtractedItem com outro nome na entidade do LinkingAgent
+_ITEM_FIELDS = {'related_person': 'relatedPerson', 'related_area': 'relatedArea'}
+
+
+class MeetingPipelineResult(BaseModel):
+    """Resultado da ingestão de uma reunião"""
+    meeting_id: str
+    linked: List[Dict[str, Any]] = Field(default_factory=list)
+    to_create: List[Dict[str, Any]] = Field(default_factory=list)
+    review: List[Dict[str, Any]] = Field(default_factory=list)
+    skipped: List[Dict[str, Any]] = Field(default_factory=list)
+    mentions: List[KnownEntityMention] = Field(default_factory=list)
+    counts: Dict[str, int] = Field(default_factory=dict)
+    timings_ms: Dict[str, float] = Field(default_factory=dict)
+
+
+class MeetingIngestionPipeline:
+    """
+    Orquestra NERAgent, ExtractionAgent, EntityMatchingAgent e LinkingAgent.
+
+    Entidades mencionadas sem linkedNodeId passam pelo matching: 'link' vira
+    vínculo com o node encontrado, 'review' fica de fora da escrita (retornada
+    para revisão) e 'create' segue para to_create. Entidades conhecidas achadas
+    na transcrição e ausentes da lista entram como menções já vinculadas.
+    """
+
+    def __init__(
+        self,
+        ner_agent: NERAgent,
+        matching_agent: EntityMatchingAgent,
+        linking_agent: LinkingAgent,
+        extraction_agent: Optional[ExtractionAgent] = None,
+        chunk_size: int = 64,
+        queue_size: int = DEFAULT_QUEUE_SIZE
+    ):
+        self.ner_agent = ner_agent
+        self.matching_agent = matching_agent
+        self.linking_agent = linking_agent
+        self.extraction_agent = extraction_agent or ExtractionAgent()
+        self.chunk_size = max(1, chunk_size)
+        self.queue_size = max(1, queue_size)
+
+    async def run(
+        self,
+        meeting_id: str,
+        entities: List[Dict[str, Any]],
+        transcript: Optional[str] = None,
+        meeting_context: Optional[Dict[str, Any]] = None,
+        write: bool = True,
+        on_progress: Optional[PipelineProgress] = None
+    ) -> MeetingPipelineResult:
+        """
+        Processa uma reunião.
+
+        Args:
+            meeting_id: elementId do node Meeting
+            entities: Entidades já extraídas (mesmo formato do LinkingAgent.link_entities)
+            transcript: Transcrição (scan de entidades conhecidas e extração)
+            meeting_context: Contexto repassado ao ExtractionAgent
+            write: False para só calcular o linking (sem escrita no Neo4j)
+            on_progress: Chamado ao início de cada estágio e após cada chunk
+                (extraction, matching, write, done)
+        """
+        started = time.perf_counter()
+        result = MeetingPipelineResult(meeting_id=meeting_id)
+        timings = result.timings_ms
+
+        def report(stage: str, progress: float) -> None:
+            if on_progress:
+                on_progress(stage, progress)
+
+        report('extraction', 0.0)
+        await self.matching_agent.ensure_loaded()
+
+        # 1. Extração (LLM) e scan do dicionário em paralelo
+        extracted, mentions = await asyncio.gather(
+            self._extract(transcript, meeting_context, timings),
+            self._scan(transcript, timings)
+        )
+        result.mentions = mentions
+        entities = list(entities) + extracted + self._unlisted_mentions(entities, mentions)
+
+        # 2-3. Matching por chunk -> fila limitada -> escrita
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        counts: Dict[str, int] = {}
+        # Extração/NER contam 10% do progresso; cada chunk, o mesmo peso no restante
+        total_chunks = max(1, -(-len(entities) // self.chunk_size))
+        matched = 0
+        written_chunks = 0
+
+        def report_chunks() -> None:
+            done = (matched + written_chunks) / 2 if write else matched
+            report('write' if write and matched == total_chunks else 'matching', 0.1 + 0.9 * done / total_chunks)
+
+        report('matching', 0.1)
+
+        async def produce() -> None:
+            nonlocal matched
+            for start in range(0, len(entities), self.chunk_size):
+                chunk = entities[start:start + self.chunk_size]
+                with self._timed('matching', timings):
+                    chunk = await self._match(chunk, result.review)
+                with self._timed('linking', timings):
+                    linking = await self.linking_agent.link_entities(chunk, meeting_id)
+                result.linked.extend(linking.linked)
+                result.to_create.extend(linking.to_create)
+                result.skipped.extend(linking.skipped)
+                matched += 1
+                report_chunks()
+                if write:
+                    await queue.put(linking)
+            if write:
+                await queue.put(None)
+
+        async def consume() -> None:
+            nonlocal written_chunks
+            while (linking := await queue.get()) is not None:
+                with self._timed('write', timings):
+                    written = await self.linking_agent.create_relationships(linking, meeting_id)
+                if 'error' in written:
+                    raise RuntimeError(written['error'])
+                for key, value in written.items():
+                    counts[key] = counts.get(key, 0) + value
+                written_chunks += 1
+                report_chunks()
+
+        async with asyncio.TaskGroup() as group:
+            group.create_task(produce())
+            if write:
+                group.create_task(consume())
+
+        result.counts = counts
+        report('done', 1.0)
+        timings['total'] = (time.perf_counter() - started) * 1000
+        for stage, value in timings.items():
+            timings[stage] = round(value, 2)
+        return result
+
+    @staticmethod
+    @contextmanager
+    def _timed(stage: str, timings: Dict[str, float]):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings[stage] = timings.get(stage, 0.0) + (time.perf_counter() - started) * 1000
+
+    async def _extract(
+        self,
+        transcript: Optional[str],
+        meeting_context: Optional[Dict[str, Any]],
+        timings: Dict[str, float]
+    ) -> List[Dict[str, Any]]:
+        """Itens do ExtractionAgent no formato de entidade do LinkingAgent"""
+        if not transcript:
+            return []
+        with self._timed('extraction', timings):
+            extraction = await self.extraction_agent.extract(transcript, meeting_context)
+        entities = []
+        for item in extraction.items:
+            entity = {
+                _ITEM_FIELDS.get(key, key): value
+                for key, value in item.model_dump(exclude_none=True).items()
+            }
+            entity['type'] = _ITEM_TYPES.get(item.type, item.type)
+            entities.append(entity)
+        return entities
+
+    async def _scan(self, transcript: Optional[str], timings: Dict[str, float]) -> List[KnownEntityMention]:
+        """Entidades conhecidas na transcrição (thread; o índice não muda durante a leitura)"""
+        if not transcript:
+            return []
+        with self._timed('ner', timings):
+            async with self.ner_agent.index_service.reading():
+                return await asyncio.to_thread(self.ner_agent.scan_mentions, transcript)
+
+    @staticmethod
+    def _unlisted_mentions(
+        entities: List[Dict[str, Any]],
+        mentions: List[KnownEntityMention]
+    ) -> List[Dict[str, Any]]:
+        """Menções do scan cujo node não está entre as entidades recebidas"""
+        listed = {e.get('linkedNodeId') for e in entities if e.get('linkedNodeId')}
+        return [
+            {
+                'type': 'mentionedEntity',
+                'value': mention.graph_entity.name,
+                'entityType': mention.entity.entity_type,
+                'description': mention.entity.description,
+                'mentions': mention.entity.mentions,
+                'confidence': mention.entity.confidence,
+                'linkedNodeId': mention.graph_entity.id,
+            }
+            for mention in mentions
+            if mention.graph_entity.id not in listed
+        ]
+
+    async def _match(
+        self,
+        chunk: List[Dict[str, Any]],
+        review: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Resolve entidades mencionadas sem linkedNodeId contra o índice.
+        Termos do mesmo tipo são pontuados em um único batch.
+        """
+        by_labels: Dict[Optional[str], List[int]] = {}
+        for i, entity in enumerate(chunk):
+            if entity.get('type') == 'mentionedEntity' and not entity.get('linkedNodeId') and entity.get('value'):
+                label = _ENTITY_TYPE_LABELS.get((entity.get('entityType') or '').lower())
+                by_labels.setdefault(label, []).append(i)
+
+        resolved = list(chunk)
+        for label, positions in by_labels.items():
+            matches = await self.matching_agent.match_entities(
+                [chunk[i]['value'] for i in positions],
+                labels=[label] if label else None
+            )
+            for i, match in zip(positions, matches):
+                if match.suggested_action == 'link' and match.best_match:
+                    resolved[i] = {**chunk[i], 'linkedNodeId': match.best_match.node.id}
+                elif match.suggested_action == 'review':
+                    review.append({'entity': chunk[i], 'match': match.model_dump()})
+                    resolved[i] = None
+
+        return [entity for entity in resolved if entity is not None]
@@ -0,0 +1,206 @@
+"""
+Mention Scanner - Busca de entidades conhecidas direto na transcrição
+Compila os nomes e aliases normalizados do EntityIndex num autômato
+Aho–Corasick e varre a transcrição inteira numa única passada linear
+
+O autômato trabalha por palavra (e não por caractere): os textos normalizados
+já são palavras separadas por um espaço, então os matches caem sempre em
+fronteira de palavra e o número de estados fica na ordem do número de
+palavras distintas dos padrões.
+
+Os offsets retornados são da transcrição original: a normalização é feita
+caractere a caractere guardando a origem de cada caractere normalizado.
+Entre matches sobrepostos vence o que começa antes e, empatado, o mais longo
+("quinto andar" ganha de "andar").
+"""
+
+from typing import Optional, List, Dict, Tuple, Iterable, Iterator
+from dataclasses import dataclass
+import unicodedata
+import re
+
+from .entity_index import EntityIndex
+
+# Textos mais curtos que isso colidem com palavras comuns ("ai", "ia", "go")
+MIN_MENTION_LENGTH = 3
+
+_WORD_CHAR = re.compile(r"\w")
+_WORDS = re.compile(r"\S+")
+
+
+@dataclass(slots=True)
+class Mention:
+    """Ocorrência de um node conhecido na transcrição (offsets da transcrição original)"""
+    position: int        # Posição do node no EntityIndex
+    start: int
+    end: int
+    text: str            # Trecho da transcrição original
+    is_alias: bool       # Casou um alias (e não o nome canônico)
+
+
+def normalize_with_offsets(text: str) -> Tuple[str, List[int]]:
+    """
+    Mesma normalização do índice (lowercase, sem acentos, sem pontuação, espaços
+    colapsados), junto com o offset original de cada caractere normalizado.
+    """
+    chars: List[str] = []
+    offsets: List[int] = []
+    pending_space = False
+    for i, original in enumerate(text):
+        for char in unicodedata.normalize('NFD', original.lower()):
+            if unicodedata.category(char) == 'Mn':
+                continue
+            if char.isspace():
+                pending_space = bool(chars)
+            elif _WORD_CHAR.match(char):
+                if pending_space:
+                    chars.append(' ')
+                    offsets.append(i)
+                    pending_space = False
+                chars.append(char)
+                offsets.append(i)
+    return ''.join(chars), offsets
+
+
+class WordAutomaton:
+    """
+    Autômato Aho–Corasick sobre sequências de palavras.
+
+    - goto: transições (estado, palavra) -> estado
+    - fail: maior sufixo próprio do estado que também é prefixo de algum padrão
+    - output: padrão reconhecido no estado (-1 se nenhum)
+    - report: estado terminal mais próximo na cadeia de fail (0 se nenhum),
+      para listar todos os padrões que terminam numa palavra sem percorrer a cadeia
+    """
+
+    def __init__(self):
+        self.goto: Dict[Tuple[int, str], int] = {}
+        self.fail: List[int] = [0]
+        self.depth: List[int] = [0]
+        self.output: List[int] = [-1]
+        self.report: List[int] = [0]
+        self._children: Optional[List[List[Tuple[str, int]]]] = [[]]
+
+    def add(self, words: Tuple[str, ...], pattern: int) -> None:
+        """Insere um padrão (palavras normalizadas); só antes de build()"""
+        state = 0
+        for word in words:
+            child = self.goto.get((state, word))
+            if child is None:
+                child = len(self.fail)
+                self.goto[(state, word)] = child
+                self.fail.append(0)
+                self.depth.append(self.depth[state] + 1)
+                self.output.append(-1)
+                self.report.append(0)
+                self._children.append([])
+                self._children[state].append((word, child))
+            state = child
+        self.output[state] = pattern
+
+    def build(self) -> None:
+        """Calcula os links de fail/report em largura (BFS)"""
+        queue = [child for _, child in self._children[0]]
+        for child in queue:
+            self.report[child] = child if self.output[child] >= 0 else 0
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for word, child in self._children[state]:
+                fallback = self.fail[state]
+                while fallback and (fallback, word) not in self.goto:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto.get((fallback, word), 0)
+                self.report[child] = (
+                    child if self.output[child] >= 0 else self.report[self.fail[child]]
+                )
+                queue.append(child)
+        self._children = None
+
+    def scan(self, words: Iterable[str]) -> Iterator[Tuple[int, int, int]]:
+        """(índice da última palavra, padrão, nº de palavras) de cada ocorrência"""
+        goto = self.goto
+        state = 0
+        for i, word in enumerate(words):
+            while state and (state, word) not in goto:
+                state = self.fail[state]
+            state = goto.get((state, word), 0)
+            found = self.report[state]
+            while found:
+                yield i, self.output[found], self.depth[found]
+                found = self.report[self.fail[found]]
+
+    def __len__(self) -> int:
+        return len(self.fail)
+
+
+class MentionScanner:
+    """
+    Dicionário de entidades conhecidas de um EntityIndex (opcionalmente restrito
+    a labels), compilado para busca em transcrições.
+
+    Cada texto normalizado aponta para um único node: nome canônico vence alias e,
+    entre nodes com o mesmo texto, vence o primeiro na ordem de carga.
+    As posições valem para a versão do índice usada na construção: resolva os
+    nodes por scanner.index, nunca pelo snapshot atual do serviço (uma carga
+    completa pode ter trocado o índice no meio).
+    """
+
+    def __init__(
+        self,
+        index: EntityIndex,
+        labels: Optional[Iterable[str]] = None,
+        min_length: int = MIN_MENTION_LENGTH
+    ):
+        self.index = index
+        allowed = index.positions_for_labels(labels) if labels else None
+        # Padrão -> (posição do node, é alias)
+        self.targets: List[Tuple[int, bool]] = []
+        self.automaton = WordAutomaton()
+
+        seen: Dict[str, int] = {}
+        sources = (
+            (index.exact_names, False, lambda p: p),
+            (index.exact_aliases, True, lambda p: p[0]),
+        )
+        for mapping, is_alias, position_of in sources:
+            for text, postings in mapping.items():
+                if len(text) < min_length or text in seen:
+                    continue
+                positions = [position_of(p) for p in postings]
+                if allowed is not None:
+                    positions = [p for p in positions if p in allowed]
+                if not positions:
+                    continue
+                seen[text] = len(self.targets)
+                self.targets.append((min(positions), is_alias))
+                self.automaton.add(tuple(text.split()), seen[text])
+        self.automaton.build()
+
+    def scan(self, text: str) -> List[Mention]:
+        """Menções (sem sobreposição) de nodes conhecidos no texto, em ordem"""
+        normalized, offsets = normalize_with_offsets(text)
+        spans = [(m.start(), m.end()) for m in _WORDS.finditer(normalized)]
+
+        # (primeira palavra, -nº de palavras, padrão): ordena por início e, empatado, o mais longo
+        found = sorted(
+            (end - length + 1, -length, pattern)
+            for end, pattern, length in self.automaton.scan(normalized[s:e] for s, e in spans)
+        )
+
+        mentions: List[Mention] = []
+        next_free = 0
+        for first, negative_length, pattern in found:
+            if first < next_free:
+                continue
+            last = first - negative_length - 1
+            next_free = last + 1
+            start = offsets[spans[first][0]]
+            end = offsets[spans[last][1] - 1] + 1
+            position, is_alias = self.targets[pattern]
+            mentions.append(Mention(position, start, end, text[start:end], is_alias))
+        return mentions
+
+    def __len__(self) -> int:
+        return len(self.targets)
@@ -3,11 +3,32 @@ NER Agent - Named Entity Recognition para transcrições de reuniões
 Identifica e vincula entidades mencionadas (organizações, ferramentas, conceitos) ao grafo Neo4j
 """
 
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from pydantic import BaseModel, Field
 from pydantic_ai import Agent
+import asyncio
+import threading
 import os
 
+from .entity_index import NodeRecord, normalize_text
+from .entity_index_service import EntityIndexService, get_entity_index_service
+from .mention_scanner import MentionScanner, Mention
+
+# Labels de entidades mencionáveis em reuniões
+NER_LABELS = ['Organization', 'Tool', 'Concept', 'Product', 'ExternalParticipant']
+
+# entity_type do MentionedEntity para entidades achadas pelo scan do dicionário
+LABEL_ENTITY_TYPES = {
+    'Organization': 'organization',
+    'Tool': 'tool',
+    'Concept': 'concept',
+    'Product': 'product',
+    'ExternalParticipant': 'person',
+}
+
+# Caracteres de contexto de cada lado da primeira menção (description)
+MENTION_CONTEXT_CHARS = 80
+
 # Modelos de dados
 class MentionedEntity(BaseModel):
     """Entidade identificada na transcrição"""
@@ -24,6 +45,12 @@ class GraphEntity(BaseModel):
     name: str
     aliases: List[str] = []
     
+class KnownEntityMention(BaseModel):
+    """Entidade conhecida encontrada diretamente na transcrição (scan do dicionário)"""
+    entity: MentionedEntity
+    graph_entity: GraphEntity
+    offsets: List[Tuple[int, int]] = Field(description="(início, fim) de cada menção na transcrição")
+    
 class NERResult(BaseModel):
     """Resultado da análise NER"""
     entities: List[MentionedEntity]
@@ -38,103 +65,193 @@ class NERAgent:
     1. Identificar entidades mencionadas (organizações, ferramentas, conceitos)
     2. Buscar correspondências no grafo Neo4j
     3. Sugerir vinculações ou criação de novos nodes
+    
+    As entidades conhecidas vêm do EntityIndexService compartilhado do processo
+    (o mesmo snapshot do EntityMatchingAgent), restritas aos NER_LABELS.
+    Com a transcrição, elas também são buscadas diretamente no texto
+    (Aho–Corasick), sem depender de o LLM extraí-las.
     """
     
-    def __init__(self, neo4j_driver=None):
+    def __init__(self, neo4j_driver=None, index_service: Optional[EntityIndexService] = None):
         self.neo4j_driver = neo4j_driver
-        self.known_entities: List[GraphEntity] = []
+        self.index_service = index_service or get_entity_index_service(neo4j_driver)
+        # (chave da versão do índice, autômato): recompilado quando o índice muda.
+        # Uma tupla só, trocada de uma vez: threads nunca veem chave e autômato de versões diferentes
+        self._scanner: Optional[Tuple[Tuple[int, int], MentionScanner]] = None
+        # scan_mentions roda em threads: o autômato de uma versão é compilado uma vez só
+        self._scanner_lock = threading.Lock()
+    
+    @property
+    def known_entities(self) -> List[GraphEntity]:
+        """Entidades conhecidas (NER_LABELS) no snapshot atual"""
+        index = self.index_service.index
+        positions = sorted(index.positions_for_labels(NER_LABELS))
+        return [self._to_graph_entity(index.nodes[p]) for p in positions]
         
     async def load_graph_entities(self) -> List[GraphEntity]:
-        """Carrega entidades conhecidas do grafo para matching local"""
-        if not self.neo4j_driver:
-            return []
-            
-        query = """
-        MATCH (n)
-        WHERE n:Organization OR n:Tool OR n:Concept OR n:Product OR n:ExternalParticipant
-        RETURN 
-            elementId(n) as id,
-            labels(n)[0] as label,
-            COALESCE(n.name, n.canonicalName, '') as name,
-            COALESCE(n.aliases, []) as aliases
-        LIMIT 500
-        """
-        
-        async with self.neo4j_driver.session() as session:
-            result = await session.run(query)
-            records = await result.data()
-            
-        self.known_entities = [
-            GraphEntity(
-                id=r['id'],
-                label=r['label'],
-                name=r['name'],
-                aliases=r['aliases'] if isinstance(r['aliases'], list) else []
-            )
-            for r in records
-        ]
-        
+        """Garante o índice compartilhado carregado (uma carga para todos os agentes)"""
+        await self.index_service.ensure_loaded()
         return self.known_entities
     
+    @staticmethod
+    def _to_graph_entity(node: NodeRecord) -> GraphEntity:
+        return GraphEntity(
+            id=node.id,
+            label=node.label,
+            name=node.name or node.canonical_name or '',
+            aliases=list(node.aliases)
+        )
+    
     def normalize_text(self, text: str) -> str:
-        """Normaliza texto para comparação"""
-        import unicodedata
-        normalized = unicodedata.normalize('NFD', text.lower().strip())
-        return ''.join(c for c in normalized if unicodedata.category(c) != 'Mn')
+        """Normaliza texto para comparação (mesma normalização do índice)"""
+        return normalize_text(text)
+    
+    @property
+    def mention_scanner(self) -> MentionScanner:
+        """Dicionário de entidades conhecidas compilado para a versão atual do índice"""
+        index = self.index_service.index
+        key = (id(index), self.index_service.version)
+        cached = self._scanner
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        with self._scanner_lock:
+            cached = self._scanner
+            if cached is None or cached[0] != key:
+                cached = self._scanner = (key, MentionScanner(index, labels=NER_LABELS))
+            return cached[1]
+    
+    def scan_mentions(self, transcript: str) -> List[KnownEntityMention]:
+        """
+        Encontra entidades conhecidas na transcrição numa única passada.
+        
+        Returns:
+            Uma entrada por node mencionado (ordem da primeira menção), com a
+            contagem de menções e os offsets de cada uma
+        """
+        scanner = self.mention_scanner
+        # Posições do autômato resolvidas no índice em que ele foi compilado
+        index = scanner.index
+        grouped: Dict[int, List[Mention]] = {}
+        for mention in scanner.scan(transcript):
+            grouped.setdefault(mention.position, []).append(mention)
+        
+        results = []
+        for position, mentions in grouped.items():
+            node = index.nodes[position]
+            first = mentions[0]
+            context_start = max(0, first.start - MENTION_CONTEXT_CHARS)
+            context_end = first.end + MENTION_CONTEXT_CHARS
+            results.append(KnownEntityMention(
+                entity=MentionedEntity(
+                    value=first.text,
+                    entity_type=LABEL_ENTITY_TYPES.get(node.label, node.label.lower()),
+                    description=' '.join(transcript[context_start:context_end].split()),
+                    mentions=len(mentions),
+                    confidence=0.95 if all(m.is_alias for m in mentions) else 1.0
+                ),
+                graph_entity=self._to_graph_entity(node),
+                offsets=[(m.start, m.end) for m in mentions]
+            ))
+        return results
     
     def find_graph_match(self, entity_name: str) -> Optional[GraphEntity]:
-        """Busca correspondência no grafo carregado"""
+        """
+        Busca correspondência no índice carregado.
+        
+        Ordem: nome exato, alias exato e, por fim, nome que contém/está contido no
+        termo (apenas entre nodes que compartilham trigramas com ele). Entre vários
+        nodes, vence o primeiro na ordem de carga.
+        """
         normalized_name = self.normalize_text(entity_name)
+        if not normalized_name:
+            return None
         
-        for graph_entity in self.known_entities:
-            # Match exato no nome
-            if self.normalize_text(graph_entity.name) == normalized_name:
-                return graph_entity
-                
-            # Match em aliases
-            for alias in graph_entity.aliases:
-                if self.normalize_text(alias) == normalized_name:
-                    return graph_entity
-                    
-            # Match parcial (contém)
-            if normalized_name in self.normalize_text(graph_entity.name):
-                return graph_entity
-            if self.normalize_text(graph_entity.name) in normalized_name:
-                return graph_entity
-                
-        return None
+        index = self.index_service.index
+        allowed = index.positions_for_labels(NER_LABELS)
+        
+        # Match exato no nome
+        positions = [p for p in index.exact_names.get(normalized_name, []) if p in allowed]
+        
+        # Match em aliases
+        if not positions:
+            positions = [
+                p for p, _ in index.exact_aliases.get(normalized_name, [])
+                if p in allowed
+            ]
+        
+        # Match parcial (contém)
+        if not positions:
+            positions = [
+                p for p in index.ngrams.candidates(normalized_name) & allowed
+                if index.entries[p].name and (
+                    normalized_name in index.entries[p].name
+                    or index.entries[p].name in normalized_name
+                )
+            ]
+        
+        if not positions:
+            return None
+        return self._to_graph_entity(index.nodes[min(positions)])
     
-    async def process(self, entities: List[MentionedEntity]) -> NERResult:
+    async def process(
+        self,
+        entities: List[MentionedEntity],
+        transcript: Optional[str] = None
+    ) -> NERResult:
         """
         Processa entidades identificadas e tenta vinculá-las ao grafo.
         
         Args:
             entities: Lista de entidades identificadas pelo LLM
+            transcript: Transcrição completa (opcional). Entidades conhecidas
+                encontradas nela entram como vinculadas (match_type 'mention')
+                e a contagem de menções do scan substitui a do LLM
             
         Returns:
             NERResult com entidades vinculadas e não vinculadas
         """
-        # Carrega entidades do grafo se ainda não carregou
-        if not self.known_entities and self.neo4j_driver:
-            await self.load_graph_entities()
+        # Carrega o índice compartilhado se ainda não carregou (single-flight)
+        await self.index_service.ensure_loaded()
         
+        resolved = []
         linked = []
         unlinked = []
         
+        scanned: Dict[str, KnownEntityMention] = {}
+        if transcript:
+            # Scan (e compilação do autômato numa versão nova) fora do event loop
+            async with self.index_service.reading():
+                mentions = await asyncio.to_thread(self.scan_mentions, transcript)
+            scanned = {m.graph_entity.id: m for m in mentions}
+        
         for entity in entities:
             graph_match = self.find_graph_match(entity.value)
             
             if graph_match:
-                linked.append({
-                    'mentioned': entity.model_dump(),
+                link = {
                     'graph_entity': graph_match.model_dump(),
                     'match_type': 'exact' if self.normalize_text(graph_match.name) == self.normalize_text(entity.value) else 'partial'
-                })
+                }
+                known = scanned.pop(graph_match.id, None)
+                if known:
+                    entity = entity.model_copy(update={'mentions': known.entity.mentions})
+                    link['offsets'] = known.offsets
+                linked.append({'mentioned': entity.model_dump(), **link})
             else:
                 unlinked.append(entity)
+            resolved.append(entity)
+        
+        # Entidades conhecidas que o LLM não extraiu
+        for known in scanned.values():
+            linked.append({
+                'mentioned': known.entity.model_dump(),
+                'graph_entity': known.graph_entity.model_dump(),
+                'match_type': 'mention',
+                'offsets': known.offsets
+            })
                 
         return NERResult(
-            entities=entities,
+            entities=resolved + [known.entity for known in scanned.values()],
             linked_entities=linked,
             unlinked_entities=unlinked
         )
@@ -0,0 +1,74 @@
+"""
+NGram Index - Índice invertido de q-gramas para geração de candidatos
+Reduz o conjunto de nodes que o EntityMatchingAgent precisa pontuar por termo
+
+Cada texto normalizado é decomposto em trigramas com padding ("$$ab", ...).
+Pelo lema de q-gramas, duas strings com distância de edição d compartilham ao
+menos max(len) + q - 1 - q*d q-gramas. Com q=3 isso garante que qualquer par com
+similaridade fuzzy >= 2/3 (ou match parcial > 0.5) compartilha pelo menos um
+trigrama — logo o filtro por candidatos não perde matches nos thresholds default.
+"""
+
+from typing import Dict, Iterable, Set
+
+# Tamanho do q-grama e caractere de padding (nunca sobrevive ao normalize)
+NGRAM_SIZE = 3
+PAD_CHAR = "$"
+
+
+def ngrams(text: str, n: int = NGRAM_SIZE) -> Set[str]:
+    """Retorna o conjunto de q-gramas (com padding) de um texto já normalizado"""
+    if not text:
+        return set()
+    padding = PAD_CHAR * (n - 1)
+    padded = f"{padding}{text}{padding}"
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class NGramIndex:
+    """
+    Índice invertido q-grama -> chaves (posições de nodes no cache).
+
+    Uma chave pode ser indexada por vários textos (nome canônico + aliases);
+    a busca retorna a união das postings dos q-gramas do termo.
+    """
+
+    def __init__(self, n: int = NGRAM_SIZE):
+        self.n = n
+        self.postings: Dict[str, Set[int]] = {}
+
+    def add(self, key: int, texts: Iterable[str]) -> None:
+        """Indexa uma chave pelos q-gramas de todos os seus textos"""
+        grams: Set[str] = set()
+        for text in texts:
+            grams |= ngrams(text, self.n)
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key: int, texts: Iterable[str]) -> None:
+        """Remove a chave das postings dos q-gramas dos seus textos"""
+        grams: Set[str] = set()
+        for text in texts:
+            grams |= ngrams(text, self.n)
+        for gram in grams:
+            keys = self.postings.get(gram)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self.postings[gram]
+
+    def candidates(self, text: str) -> Set[int]:
+        """Chaves que compartilham pelo menos um q-grama com o texto"""
+        found: Set[int] = set()
+        for gram in ngrams(text, self.n):
+            keys = self.postings.get(gram)
+            if keys:
+                found |= keys
+        return found
+
+    def clear(self) -> None:
+        self.postings.clear()
+
+    def __len__(self) -> int:
+        return len(self.postings)
@@ -0,0 +1,95 @@
+"""
+Phonetic - Chave fonética para português brasileiro (variante de Metaphone)
+Aproxima grafias que soam igual mas ficam distantes em Levenshtein, comuns em
+transcrições (speech-to-text): "Xikinho"/"Chiquinho", "Sielo"/"Cielo",
+"Kinto Andar"/"Quinto Andar", "Gira"/"Jira"
+
+Regras (aplicadas palavra a palavra sobre o texto já normalizado):
+- Dígrafos: ch/sh -> X, lh -> L, nh -> N, ph -> F, th -> T, ck/qu -> K,
+  gu/sc/xc antes de e/i -> G/S/S
+- c/g antes de e/i/y -> S/J; senão K/G. k/q -> K
+- s entre vogais -> Z; z final -> S
+- m/n em fim de sílaba -> N (nasal); l em fim de sílaba é vocalizado (some)
+- h isolado é mudo; vogais (incluindo w/y) só contam no início da palavra
+- Códigos repetidos em sequência são colapsados
+"""
+
+from typing import List
+
+# w/y soam como vogais nas marcas em inglês ("Power", "Sky")
+VOWELS = frozenset("aeiouwy")
+FRONT_VOWELS = frozenset("eiy")
+
+# Chaves muito curtas colidem demais para servir de evidência de match
+MIN_KEY_LENGTH = 3
+
+_DIGRAPHS = {
+    "ch": "X",
+    "sh": "X",
+    "lh": "L",
+    "nh": "N",
+    "ph": "F",
+    "th": "T",
+    "ck": "K",
+    "qu": "K",
+}
+
+
+def _word_key(word: str) -> str:
+    codes: List[str] = []
+    i = 0
+    length = len(word)
+    while i < length:
+        char = word[i]
+        following = word[i + 1] if i + 1 < length else ""
+        after = word[i + 2] if i + 2 < length else ""
+        previous = word[i - 1] if i > 0 else ""
+        step = 1
+
+        pair = char + following
+        if pair in _DIGRAPHS:
+            code = _DIGRAPHS[pair]
+            step = 2
+        elif pair == "gu" and after in FRONT_VOWELS:
+            code = "G"
+            step = 2
+        elif pair in ("sc", "xc") and after in FRONT_VOWELS:
+            code = "S"
+            step = 2
+        elif char in VOWELS:
+            # Vogal inicial (ou depois de h mudo inicial: "Hotmart" ~ "Otmart")
+            code = "A" if i == 0 or (i == 1 and previous == "h") else ""
+        elif char == "h":
+            code = ""
+        elif char == "c":
+            code = "S" if following in FRONT_VOWELS else "K"
+        elif char in "kq":
+            code = "K"
+        elif char == "g":
+            code = "J" if following in FRONT_VOWELS else "G"
+        elif char == "s":
+            code = "Z" if previous in VOWELS and following in VOWELS else "S"
+        elif char == "z":
+            code = "S" if not following else "Z"
+        elif char in "mn":
+            code = char.upper() if following in VOWELS else "N"
+        elif char == "l":
+            code = "L" if following in VOWELS else ""
+        else:
+            code = char.upper()
+
+        if code and (not codes or codes[-1] != code):
+            codes.append(code)
+        i += step
+    return "".join(codes)
+
+
+def phonetic_key(text: str) -> str:
+    """
+    Chave fonética de um texto normalizado (uma chave por palavra, separadas por espaço).
+    Retorna "" quando a chave é curta demais para ser útil.
+    """
+    keys = [key for key in (_word_key(word) for word in text.split()) if key]
+    if sum(len(key) for key in keys) < MIN_KEY_LENGTH:
+        return ""
+    return " ".join(keys)
@@ -0,0 +1,142 @@
+"""
+Typo Index - Dicionário de deleções simétricas (estilo SymSpell)
+Encontra nomes/aliases a poucas edições de um termo ("notiom" -> "notion")
+sem comparar o termo com todo o cache
+
+Se lev(a, b) <= k, existe uma string obtida de a e de b com no máximo k
+deleções em cada uma. Cada texto indexado gera suas variantes com até k
+deleções; a busca gera as variantes do termo e une as postings. Os candidatos
+são um superconjunto: o score fuzzy continua sendo verificado pelo agente.
+
+O número de variantes cresce com C(len, k), então só textos curtos são
+indexados. typo_coverage calcula, para o fuzzy_threshold, até que tamanho de
+termo o índice é exato e qual o maior alvo que esses termos podem atingir.
+"""
+
+from typing import Dict, Iterable, Set, Tuple
+
+from .edit_distance import max_distance_for
+
+# Maior texto indexado (limita a explosão de variantes em thresholds altos)
+MAX_INDEXED_LENGTH = 16
+
+
+def deletes(text: str, max_distance: int) -> Set[str]:
+    """Variantes do texto com até max_distance deleções (inclui o próprio texto)"""
+    variants = {text}
+    level = {text}
+    for _ in range(max_distance):
+        level = {
+            variant[:i] + variant[i + 1:]
+            for variant in level
+            for i in range(len(variant))
+        }
+        if not level:
+            break
+        variants |= level
+    return variants
+
+
+def typo_distance_for(threshold: float, term_length: int) -> Tuple[int, int]:
+    """
+    Maior distância de edição (e maior tamanho de alvo) com que um termo
+    desse tamanho ainda atinge o fuzzy_threshold.
+    """
+    if threshold <= 0:
+        raise ValueError("threshold must be positive")
+    distance = 0
+    max_length = term_length
+    # Alvos mais longos que term_length / threshold nunca atingem o threshold
+    for length in range(1, int(term_length / threshold) + 2):
+        allowed = max_distance_for(threshold, max(term_length, length))
+        if abs(length - term_length) <= allowed:
+            distance = max(distance, allowed)
+            max_length = max(max_length, length)
+    return distance, max_length
+
+
+def typo_coverage(
+    threshold: float,
+    max_distance: int,
+    max_indexed_length: int = MAX_INDEXED_LENGTH
+) -> Tuple[int, int]:
+    """
+    (maior termo coberto, maior alvo a indexar) para um índice com max_distance.
+    Termos até esse tamanho têm todos os matches fuzzy dentro de max_distance
+    e entre textos de no máximo max_indexed_length chars.
+    """
+    if max_distance <= 0 or threshold <= 0:
+        return 0, 0
+    max_term = 0
+    max_target = 0
+    for term_length in range(1, max_indexed_length + 1):
+        distance, max_length = typo_distance_for(threshold, term_length)
+        if distance > max_distance or max_length > max_indexed_length:
+            break
+        max_term = term_length
+        max_target = max(max_target, max_length)
+    return max_term, max_target
+
+
+class DeletionIndex:
+    """
+    Índice variante -> textos normalizados (apenas textos com até max_length chars).
+
+    Um mesmo texto pode pertencer a vários nodes (nomes/aliases repetidos):
+    refs conta as ocorrências para que a remoção de um node não apague o texto.
+    """
+
+    def __init__(self, max_distance: int = 0, max_length: int = 0):
+        self.max_distance = max_distance
+        self.max_length = max_length
+        self.refs: Dict[str, int] = {}
+        self.postings: Dict[str, Set[str]] = {}
+
+    def _indexable(self, text: str) -> bool:
+        return 0 < len(text) <= self.max_length and self.max_distance > 0
+
+    def add(self, texts: Iterable[str]) -> None:
+        """Indexa as variantes de cada texto (textos longos são ignorados)"""
+        for text in texts:
+            if not self._indexable(text):
+                continue
+            count = self.refs.get(text, 0)
+            self.refs[text] = count + 1
+            if count:
+                continue
+            for variant in deletes(text, self.max_distance):
+                self.postings.setdefault(variant, set()).add(text)
+
+    def remove(self, texts: Iterable[str]) -> None:
+        """Remove uma ocorrência de cada texto; as variantes saem com a última"""
+        for text in texts:
+            count = self.refs.get(text)
+            if not count:
+                continue
+            if count > 1:
+                self.refs[text] = count - 1
+                continue
+            del self.refs[text]
+            for variant in deletes(text, self.max_distance):
+                found = self.postings.get(variant)
+                if found is None:
+                    continue
+                found.discard(text)
+                if not found:
+                    del self.postings[variant]
+
+    def lookup(self, term: str, max_distance: int) -> Set[str]:
+        """Textos indexados possivelmente a até max_distance edições do termo"""
+        found: Set[str] = set()
+        for variant in deletes(term, min(max_distance, self.max_distance)):
+            texts = self.postings.get(variant)
+            if texts:
+                found |= texts
+        return found
+
+    def clear(self) -> None:
+        self.refs.clear()
+        self.postings.clear()
+
+    def __len__(self) -> int:
+        return len(self.postings)
@@ -0,0 +1,80 @@
+"""
+Vector Scoring - Score fuzzy em lote com NumPy
+Usado pelo EntityMatchingAgent quando um termo tem muitos candidatos
+(nomes curtos como "MV", "AI" ou palavras comuns em Concepts)
+
+Os alvos são codificados numa matriz de code points (N x L, padding com 0) e a
+Levenshtein é calculada linha a linha da programação dinâmica para todos os
+alvos de uma vez. A dependência da inserção dentro da linha vira um mínimo
+acumulado: D[j] = min(v[j], D[j-1] + 1) equivale a cummin(v[j] - j) + j.
+
+O resultado é o mesmo do caminho escalar (_fuzzy_within_threshold): distância
+exata comparada com max_distance_for e score = 1 - d / max_len.
+
+NumPy é dependência do projeto; num ambiente sem ele, HAS_NUMPY é False e o
+agente usa o caminho escalar.
+"""
+
+from typing import Dict, Iterable
+
+from .edit_distance import max_distance_for
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:  # pragma: no cover - ambiente sem numpy
+    np = None
+    HAS_NUMPY = False
+
+# Padding da matriz de alvos (o normalize remove \x00, então nunca casa com o termo)
+_PAD = "\x00"
+
+
+def batch_fuzzy_scores(term: str, targets: Iterable[str], threshold: float) -> Dict[str, float]:
+    """
+    Score fuzzy de um termo normalizado contra vários alvos normalizados.
+
+    Returns:
+        Dict alvo -> score (0.0 quando não atinge o threshold), para cada alvo distinto
+    """
+    scores = {target: 0.0 for target in targets}
+    if not term or not scores:
+        return scores
+
+    term_len = len(term)
+    # Filtro por tamanho: |len1 - len2| <= distância máxima permitida
+    feasible = []
+    for target in scores:
+        if not target:
+            continue
+        max_len = max(term_len, len(target))
+        if abs(term_len - len(target)) <= max_distance_for(threshold, max_len):
+            feasible.append(target)
+    if not feasible:
+        return scores
+
+    width = max(len(target) for target in feasible)
+    encoded = "".join(target.ljust(width, _PAD) for target in feasible)
+    matrix = np.frombuffer(encoded.encode("utf-32-le"), dtype=np.uint32).reshape(len(feasible), width)
+    lengths = np.fromiter((len(target) for target in feasible), dtype=np.int32, count=len(feasible))
+
+    columns = np.arange(width + 1, dtype=np.int32)
+    previous = np.broadcast_to(columns, (len(feasible), width + 1))
+    current = np.empty((len(feasible), width + 1), dtype=np.int32)
+
+    for i, char in enumerate(term, start=1):
+        # Substituição (diagonal) e remoção (linha anterior), depois inserção via cummin
+        mismatch = matrix != ord(char)
+        np.minimum(previous[:, :-1] + mismatch, previous[:, 1:] + 1, out=current[:, 1:])
+        current[:, 0] = i
+        current -= columns
+        np.minimum.accumulate(current, axis=1, out=current)
+        current += columns
+        previous, current = current, np.empty_like(current)
+
+    distances = previous[np.arange(len(feasible)), lengths]
+    for target, distance in zip(feasible, distances.tolist()):
+        max_len = max(term_len, len(target))
+        if distance <= max_distance_for(threshold, max_len):
+            scores[target] = 1 - (distance / max_len)
+    return scores
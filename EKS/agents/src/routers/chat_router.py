@@ -7,7 +7,13 @@ from typing import List, Optional, Dict, Any
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 
-from src.agents.personal_agent import personal_agent, load_user_context, UserContext
+from src.agents.personal_agent import (
+    personal_agent,
+    load_user_context,
+    invalidate_user_context,
+    user_context_cache,
+    UserContext,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -110,6 +116,8 @@ async def get_welcome_message(request: WelcomeRequest) -> WelcomeResponse:
         
         # Get personalized welcome message
         welcome_message = await personal_agent.get_welcome_message(user_context)
+        # The backend marks the welcome as received; reload the flag next time
+        invalidate_user_context(request.user_id)
         
         return WelcomeResponse(
             success=True,
@@ -134,6 +142,21 @@ async def chat_health():
     return {"status": "healthy", "service": "chat"}
 
 
+@router.post("/user-context/{user_id}/invalidate")
+async def invalidate_user_context_cache(user_id: str):
+    """
+    Drop the cached context of a user
+    Called by the backend after onboarding or AI profile updates
+    """
+    return {"success": True, "user_id": user_id, "invalidated": invalidate_user_context(user_id)}
+
+
+@router.get("/user-context/cache")
+async def user_context_cache_stats():
+    """Hit/miss counters and size of the user context cache"""
+    return user_context_cache.stats()
+
+
 # ===== Frontend Compatible Endpoint (services/api.ts) =====
 
 class FrontendChatRequest(BaseModel):
@@ -225,6 +248,7 @@ async def frontend_chat_welcome(request: FrontendWelcomeRequest) -> FrontendChat
         session_contexts[session_id] = user_context
 
         welcome_text = await personal_agent.get_welcome_message(user_context)
+        invalidate_user_context(request.user_id)
         return FrontendChatResponse(response=welcome_text, session_id=session_id)
     except HTTPException:
         raise
@@ -3,13 +3,21 @@ Ingestion Router - Endpoints para pipeline de ingestão
 Expõe EntityMatchingAgent e outros agentes de ingestão
 """
 
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Depends
+from typing import List, Optional, Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel, Field
+import asyncio
 import logging
+import time
 
+from src.config import settings
 from src.utils.neo4j_client import neo4j_client
 from src.pipelines.ingestion.entity_matching_agent import EntityMatchingAgent, MatchResult
+from src.pipelines.ingestion.entity_index_service import get_entity_index_service
+from src.pipelines.ingestion.ner_agent import NERAgent
+from src.pipelines.ingestion.linking_agent import LinkingAgent
+from src.pipelines.ingestion.meeting_pipeline import MeetingIngestionPipeline
+from src.pipelines.ingestion.job_queue import JobQueue, JobStore, SQLiteJobStore, ReportCallback
 
 logger = logging.getLogger(__name__)
 
@@ -22,10 +30,18 @@ router = APIRouter(
 class MatchEntityRequest(BaseModel):
     """Request para match de uma entidade"""
     term: str = Field(description="Termo a buscar no grafo")
+    labels: Optional[List[str]] = Field(
+        default=None,
+        description="Restringe o matching a estes labels ou tipos do NER (ex: Organization, tool)"
+    )
     
 class MatchEntitiesRequest(BaseModel):
     """Request para match de múltiplas entidades"""
     terms: List[str] = Field(description="Lista de termos a buscar")
+    labels: Optional[List[str]] = Field(
+        default=None,
+        description="Restringe o matching de todos os termos a estes labels ou tipos do NER"
+    )
 
 class MatchEntityResponse(BaseModel):
     """Response do match de entidade"""
@@ -39,30 +55,171 @@ class MatchEntitiesResponse(BaseModel):
     data: Optional[List[dict]] = None
     error: Optional[str] = None
 
+class IngestMeetingRequest(BaseModel):
+    """Request da ingestão de uma reunião (pipeline completo)"""
+    meeting_id: str = Field(description="elementId do node Meeting")
+    transcript: Optional[str] = Field(default=None, description="Transcrição completa")
+    entities: List[Dict[str, Any]] = Field(
+        default_factory=list,
+        description="Entidades extraídas (type, value, entityType, linkedNodeId, ...)"
+    )
+    meeting_context: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="Contexto da reunião (título, projeto, participantes)"
+    )
+    write: bool = Field(default=True, description="False calcula o linking sem escrever no grafo")
+
+class IngestMeetingResponse(BaseModel):
+    """Response da ingestão de uma reunião"""
+    success: bool
+    data: Optional[dict] = None
+    error: Optional[str] = None
+
+class IngestionJobResponse(BaseModel):
+    """Response de um job de ingestão (submissão ou consulta)"""
+    success: bool
+    data: Optional[dict] = None
+    error: Optional[str] = None
+
 
 # Singleton do agent (carrega nodes uma vez)
 _entity_matching_agent: Optional[EntityMatchingAgent] = None
 
-async def get_entity_matching_agent() -> EntityMatchingAgent:
-    """Dependency para obter o EntityMatchingAgent configurado"""
+def _get_or_create_agent() -> EntityMatchingAgent:
+    """Cria o singleton sem await entre o teste e a atribuição (sem corrida)"""
     global _entity_matching_agent
     
     if _entity_matching_agent is None:
+        # Índice compartilhado do processo (também usado pelo NERAgent)
+        index_service = get_entity_index_service(
+            neo4j_client.driver,
+            page_size=settings.ingestion_node_page_size,
+            fuzzy_threshold=0.7,
+            typo_max_distance=settings.ingestion_typo_max_distance,
+            snapshot_path=settings.ingestion_snapshot_path or None,
+            snapshot_max_age_seconds=settings.ingestion_snapshot_max_age_seconds
+        )
         _entity_matching_agent = EntityMatchingAgent(
             neo4j_driver=neo4j_client.driver,
             fuzzy_threshold=0.7,
-            partial_threshold=0.6
+            partial_threshold=0.6,
+            index_service=index_service,
+            page_size=settings.ingestion_node_page_size,
+            match_workers=settings.ingestion_match_workers,
+            match_chunk_size=settings.ingestion_match_chunk_size,
+            vector_min_candidates=settings.ingestion_vector_min_candidates,
+            typo_max_distance=settings.ingestion_typo_max_distance,
+            phonetic_score=settings.ingestion_phonetic_score
         )
-        # Carrega nodes do grafo
-        if neo4j_client.driver:
-            try:
-                await _entity_matching_agent.load_graph_nodes()
-                logger.info(f"✅ EntityMatchingAgent loaded {len(_entity_matching_agent.graph_nodes)} nodes")
-            except Exception as e:
-                logger.warning(f"⚠️ Failed to load graph nodes: {e}")
-    
     return _entity_matching_agent
 
+async def get_entity_matching_agent() -> EntityMatchingAgent:
+    """
+    Dependency para obter o EntityMatchingAgent configurado.
+    
+    A primeira carga é single-flight: requisições simultâneas aguardam a mesma
+    carga em vez de cada uma disparar uma leitura completa do grafo.
+    """
+    agent = _get_or_create_agent()
+    
+    # Carrega nodes do grafo
+    if neo4j_client.driver and not agent._loaded:
+        try:
+            await agent.ensure_loaded()
+            logger.info(f"✅ EntityMatchingAgent loaded {agent.node_count} nodes")
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to load graph nodes: {e}")
+    
+    return agent
+
+
+async def warm_entity_matching_agent():
+    """Pré-carrega o cache do EntityMatchingAgent (chamado no startup do servidor)"""
+    if not neo4j_client.driver:
+        return
+    await get_entity_matching_agent()
+
+
+# Singleton do pipeline de reuniões (reusa o EntityMatchingAgent e o índice compartilhado)
+_meeting_pipeline: Optional[MeetingIngestionPipeline] = None
+
+def _get_or_create_pipeline(agent: EntityMatchingAgent) -> MeetingIngestionPipeline:
+    global _meeting_pipeline
+    
+    if _meeting_pipeline is None:
+        _meeting_pipeline = MeetingIngestionPipeline(
+            ner_agent=NERAgent(neo4j_client.driver, index_service=agent.index_service),
+            matching_agent=agent,
+            linking_agent=LinkingAgent(
+                neo4j_client.driver,
+                write_batch_size=settings.ingestion_write_batch_size
+            ),
+            chunk_size=settings.ingestion_match_chunk_size,
+            queue_size=settings.ingestion_pipeline_queue_size
+        )
+    return _meeting_pipeline
+
+
+# Fila de jobs de ingestão (reuniões longas processadas fora do request)
+MEETING_JOB = 'meeting'
+_job_queue: Optional[JobQueue] = None
+
+async def _run_meeting_job(payload: Dict[str, Any], report: ReportCallback) -> Dict[str, Any]:
+    """Handler dos jobs de reunião: mesmo pipeline do POST /ingestion/meetings"""
+    request = IngestMeetingRequest.model_validate(payload)
+    agent = await get_entity_matching_agent()
+    result = await _get_or_create_pipeline(agent).run(
+        request.meeting_id,
+        request.entities,
+        transcript=request.transcript,
+        meeting_context=request.meeting_context,
+        write=request.write,
+        on_progress=report
+    )
+    return result.model_dump()
+
+def get_job_queue() -> JobQueue:
+    """Fila de jobs do processo (store SQLite se configurado, senão em memória)"""
+    global _job_queue
+    
+    if _job_queue is None:
+        retention = {
+            'retention_seconds': settings.ingestion_job_retention_seconds,
+            'max_finished': settings.ingestion_job_max_finished,
+        }
+        store = (
+            SQLiteJobStore(settings.ingestion_job_store_path, **retention)
+            if settings.ingestion_job_store_path else JobStore(**retention)
+        )
+        _job_queue = JobQueue(
+            handlers={MEETING_JOB: _run_meeting_job},
+            store=store,
+            concurrency=settings.ingestion_job_workers,
+            max_attempts=settings.ingestion_job_max_attempts
+        )
+    return _job_queue
+
+
+async def start_ingestion_jobs():
+    """Inicia os workers e retoma jobs pendentes (chamado no startup do servidor)"""
+    await get_job_queue().start()
+
+
+async def stop_ingestion_jobs():
+    """Para os workers; jobs em andamento são retomados no próximo startup (store SQLite)"""
+    if _job_queue is not None:
+        await _job_queue.stop()
+
+
+async def shutdown_entity_matching_agent():
+    """
+    Interrompe cargas/refreshes do índice em andamento e libera o pool de processos
+    do batch matching (chamado no shutdown do servidor, antes de fechar o driver)
+    """
+    if _entity_matching_agent is not None:
+        await _entity_matching_agent.index_service.aclose()
+        _entity_matching_agent.shutdown()
+
 
 @router.post("/match-entity", response_model=MatchEntityResponse)
 async def match_entity(
@@ -82,7 +239,7 @@ async def match_entity(
         MatchResult com candidatos e sugestão de ação (link/review/create)
     """
     try:
-        result = await agent.match_entity(request.term)
+        result = await agent.match_entity(request.term, labels=request.labels)
         return MatchEntityResponse(
             success=True,
             data=result.model_dump()
@@ -107,7 +264,7 @@ async def match_entities(
         Lista de MatchResult para cada termo
     """
     try:
-        results = await agent.match_entities(request.terms)
+        results = await agent.match_entities(request.terms, labels=request.labels)
         return MatchEntitiesResponse(
             success=True,
             data=[r.model_dump() for r in results]
@@ -120,6 +277,79 @@ async def match_entities(
         )
 
 
+@router.post("/meetings", response_model=IngestMeetingResponse)
+async def ingest_meeting(
+    request: IngestMeetingRequest,
+    agent: EntityMatchingAgent = Depends(get_entity_matching_agent)
+):
+    """
+    Ingestão de uma reunião num único request.
+    
+    Encadeia extração/NER (scan de entidades conhecidas na transcrição),
+    matching das entidades mencionadas e linking/escrita no Neo4j; a escrita
+    de um chunk se sobrepõe ao matching do próximo.
+    
+    Returns:
+        Vínculos, nodes criados, itens para revisão, contagens da escrita e
+        tempos por estágio (timings_ms)
+    """
+    if request.write and not neo4j_client.driver:
+        raise HTTPException(status_code=503, detail="Neo4j not connected")
+    try:
+        result = await _get_or_create_pipeline(agent).run(
+            request.meeting_id,
+            request.entities,
+            transcript=request.transcript,
+            meeting_context=request.meeting_context,
+            write=request.write
+        )
+        return IngestMeetingResponse(
+            success=True,
+            data=result.model_dump()
+        )
+    except Exception as e:
+        logger.error(f"Error ingesting meeting '{request.meeting_id}': {e}")
+        return IngestMeetingResponse(
+            success=False,
+            error=str(e)
+        )
+
+
+@router.post("/jobs", response_model=IngestionJobResponse, status_code=202)
+async def submit_meeting_job(request: IngestMeetingRequest):
+    """
+    Enfileira a ingestão de uma reunião e retorna o job id na hora.
+    
+    Para transcrições longas, que não cabem no timeout de um request:
+    o progresso e o resultado são consultados em GET /ingestion/jobs/{job_id}.
+    """
+    if request.write and not neo4j_client.driver:
+        raise HTTPException(status_code=503, detail="Neo4j not connected")
+    job = await get_job_queue().submit(MEETING_JOB, request.model_dump())
+    return IngestionJobResponse(
+        success=True,
+        data=job.model_dump(include={'id', 'kind', 'status', 'created_at'})
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
+async def get_ingestion_job(job_id: str):
+    """
+    Estado de um job de ingestão.
+    
+    Returns:
+        status (queued, running, succeeded, failed), estágio atual, progresso
+        (0-1), resultado do pipeline quando concluído ou o erro
+    """
+    job = await get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return IngestionJobResponse(
+        success=True,
+        data=job.model_dump(exclude={'payload'})
+    )
+
+
 @router.get("/graph-nodes")
 async def get_graph_nodes(
     agent: EntityMatchingAgent = Depends(get_entity_matching_agent)
@@ -128,11 +358,13 @@ async def get_graph_nodes(
     Lista os nodes carregados do grafo (para debug/verificação).
     
     Returns:
-        Lista de nodes com id, label, name, aliases
+        Lista de nodes com id, label, name, aliases e estatísticas do cache
+        (memória da tabela normalizada, hit rate do LRU de termos)
     """
     return {
         "success": True,
-        "count": len(agent.graph_nodes),
+        "count": agent.node_count,
+        "cache": agent.cache_stats(),
         "nodes": [
             {
                 "id": node.id,
@@ -140,31 +372,81 @@ async def get_graph_nodes(
                 "name": node.name,
                 "aliases": node.aliases[:5] if node.aliases else []  # Limita aliases
             }
-            for node in agent.graph_nodes[:50]  # Limita a 50 nodes
+            for node in agent.list_graph_nodes(limit=50)  # Limita a 50 nodes
         ]
     }
 
 
 @router.post("/reload-nodes")
 async def reload_graph_nodes(
+    mode: str = Query(default="full", pattern="^(full|delta)$", description="full ou delta"),
     agent: EntityMatchingAgent = Depends(get_entity_matching_agent)
 ):
     """
     Recarrega os nodes do grafo Neo4j.
     
     Útil quando novos nodes são adicionados e o cache precisa ser atualizado.
+    - full: descarta o cache e recarrega todos os nodes
+    - delta: aplica apenas nodes criados/alterados desde o último watermark
+      (e remove os apagados do grafo)
     """
     try:
         if not neo4j_client.driver:
             raise HTTPException(status_code=503, detail="Neo4j not connected")
         
-        agent._loaded = False
+        if mode == "delta":
+            counts = await agent.refresh_graph_nodes()
+            return {
+                "success": True,
+                "message": (
+                    f"Refreshed {counts['upserted']} nodes, removed {counts['removed']} "
+                    f"({counts['total']} in cache)"
+                ),
+                "counts": counts
+            }
+        
+        # Novo índice é construído em paralelo às buscas e trocado ao final
         await agent.load_graph_nodes()
         
         return {
             "success": True,
-            "message": f"Reloaded {len(agent.graph_nodes)} nodes from Neo4j"
+            "message": f"Reloaded {agent.node_count} nodes from Neo4j"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error reloading nodes: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+async def run_periodic_refresh(
+    interval_seconds: float,
+    detect_deletes: bool = True,
+    reconcile_interval_seconds: float = 0
+):
+    """
+    Loop de refresh incremental do cache do EntityMatchingAgent.
+    Iniciado como task no lifespan do servidor (main.py) quando configurado.
+    
+    Com detect_deletes, a reconciliação de ids (varre todos os ids do grafo)
+    roda no máximo a cada reconcile_interval_seconds (0 = em todo refresh);
+    os demais refreshes só leem o delta.
+    """
+    last_reconcile = time.monotonic()
+    while True:
+        await asyncio.sleep(interval_seconds)
+        if not neo4j_client.driver:
+            continue
+        reconcile = detect_deletes and time.monotonic() - last_reconcile >= reconcile_interval_seconds
+        try:
+            agent = await get_entity_matching_agent()
+            counts = await agent.refresh_graph_nodes(detect_deletes=reconcile)
+            if reconcile:
+                last_reconcile = time.monotonic()
+            if counts['upserted'] or counts['removed']:
+                logger.info(
+                    f"🔄 EntityMatchingAgent cache refreshed: +{counts['upserted']} "
+                    f"-{counts['removed']} ({counts['total']} nodes)"
+                )
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to refresh graph nodes: {e}")
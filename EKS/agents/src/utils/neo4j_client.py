@@ -1,30 +1,312 @@
 """
 Neo4j client wrapper
 """
+import asyncio
+import itertools
 import logging
-from typing import Any, Dict, List, Optional
-from neo4j import AsyncGraphDatabase, AsyncDriver
+import time
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from neo4j import AsyncGraphDatabase, AsyncDriver, AsyncManagedTransaction, AsyncResult, READ_ACCESS
 
 from src.config import settings
+from src.utils.query_metrics import QueryMetrics
 
 logger = logging.getLogger(__name__)
 
+# Latency/row statistics of every query run on a PinnedDriver session (exposed at /metrics)
+query_metrics = QueryMetrics(slow_query_ms=settings.neo4j_slow_query_ms)
+
+# Summary counters aggregated by bulk_write
+BULK_WRITE_COUNTERS = (
+    "nodes_created",
+    "nodes_deleted",
+    "relationships_created",
+    "relationships_deleted",
+    "properties_set",
+)
+
+# Error messages kept in bulk_write stats (the rest is only counted)
+MAX_REPORTED_ERRORS = 10
+
+
+class InstrumentedResult:
+    """
+    AsyncResult proxy that records the query in query_metrics once the result
+    is exhausted (data/single/consume/iteration). Results left unconsumed are
+    recorded when their session or transaction function ends.
+    """
+    
+    def __init__(self, result: AsyncResult, query: str, parameters: Optional[Dict[str, Any]], started: float):
+        self._result = result
+        self._query = query
+        self._parameters = parameters
+        self._started = started
+        self._rows = 0
+        self.observed = False
+    
+    def observe(self, summary: Any = None, error: bool = False) -> None:
+        if self.observed:
+            return
+        self.observed = True
+        query_metrics.observe(
+            self._query, time.perf_counter() - self._started,
+            rows=self._rows, parameters=self._parameters, summary=summary, error=error
+        )
+    
+    async def _finish(self) -> Any:
+        summary = await self._result.consume()
+        self.observe(summary)
+        return summary
+    
+    async def data(self, *keys: Any) -> List[Dict[str, Any]]:
+        try:
+            records = await self._result.data(*keys)
+            self._rows += len(records)
+            await self._finish()
+        except Exception:
+            self.observe(error=True)
+            raise
+        return records
+    
+    async def single(self, strict: bool = False) -> Any:
+        try:
+            record = await self._result.single(strict=strict)
+            self._rows += int(record is not None)
+            await self._finish()
+        except Exception:
+            self.observe(error=True)
+            raise
+        return record
+    
+    async def consume(self) -> Any:
+        try:
+            return await self._finish()
+        except Exception:
+            self.observe(error=True)
+            raise
+    
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self._iterate()
+    
+    async def _iterate(self) -> AsyncIterator[Any]:
+        try:
+            async for record in self._result:
+                self._rows += 1
+                yield record
+            await self._finish()
+        except Exception:
+            self.observe(error=True)
+            raise
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._result, name)
+
+
+class _InstrumentedRunner:
+    """run() that returns InstrumentedResults (shared by sessions and transactions)"""
+    
+    def __init__(self, target: Any):
+        self._target = target
+        self._results: List[InstrumentedResult] = []
+    
+    async def run(self, query: str, parameters: Optional[Dict[str, Any]] = None, **kwargs: Any) -> InstrumentedResult:
+        started = time.perf_counter()
+        try:
+            result = await self._target.run(query, parameters, **kwargs)
+        except Exception:
+            query_metrics.observe(
+                query, time.perf_counter() - started, parameters=parameters, error=True
+            )
+            raise
+        instrumented = InstrumentedResult(result, query, parameters or kwargs, started)
+        self._results.append(instrumented)
+        return instrumented
+    
+    def _observe_pending(self) -> None:
+        for result in self._results:
+            result.observe()
+        self._results = []
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target, name)
+
+
+class InstrumentedTransaction(_InstrumentedRunner):
+    """Managed transaction proxy passed to transaction functions"""
+
+
+class InstrumentedSession(_InstrumentedRunner):
+    """AsyncSession proxy: queries run directly or in managed transactions are recorded"""
+    
+    async def __aenter__(self) -> "InstrumentedSession":
+        await self._target.__aenter__()
+        return self
+    
+    async def __aexit__(self, *exc_info: Any) -> Any:
+        self._observe_pending()
+        return await self._target.__aexit__(*exc_info)
+    
+    async def close(self) -> None:
+        self._observe_pending()
+        await self._target.close()
+    
+    async def _execute(self, execute: Any, work: Any, *args: Any, **kwargs: Any) -> Any:
+        async def instrumented_work(tx: AsyncManagedTransaction, *a: Any, **kw: Any) -> Any:
+            # One proxy per attempt: retried transactions record each attempt
+            transaction = InstrumentedTransaction(tx)
+            try:
+                return await work(transaction, *a, **kw)
+            finally:
+                transaction._observe_pending()
+        return await execute(instrumented_work, *args, **kwargs)
+    
+    async def execute_read(self, work: Any, *args: Any, **kwargs: Any) -> Any:
+        return await self._execute(self._target.execute_read, work, *args, **kwargs)
+    
+    async def execute_write(self, work: Any, *args: Any, **kwargs: Any) -> Any:
+        return await self._execute(self._target.execute_write, work, *args, **kwargs)
+
+
+class PinnedDriver:
+    """
+    AsyncDriver proxy whose sessions default to the configured database and
+    fetch size. Pinning the database skips the home-database lookup round trip
+    on every new session; callers can still override any session option.
+    
+    Sessions are instrumented: every query run on them (by Neo4jClient or by
+    code using the driver directly, like the ingestion loaders) is recorded in
+    query_metrics.
+    """
+    
+    def __init__(self, driver: AsyncDriver, **session_defaults: Any):
+        self._driver = driver
+        self.session_defaults = session_defaults
+    
+    def session(self, **config: Any) -> InstrumentedSession:
+        return InstrumentedSession(self._driver.session(**{**self.session_defaults, **config}))
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._driver, name)
+
+
+async def bulk_write(
+    driver: Any,
+    query: str,
+    rows: Iterable[Dict[str, Any]],
+    batch_size: int = 500,
+    concurrency: int = 4,
+    max_batch_retries: int = 2,
+    parameters: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Write rows in `UNWIND $rows` batches across concurrent write transactions.
+    
+    `query` must consume the `$rows` list parameter (e.g. "UNWIND $rows AS row
+    MERGE ..."); `parameters` are passed to every batch. Each batch runs in its
+    own managed write transaction (transient errors are retried by the driver),
+    at most `concurrency` at a time. A batch that still fails is retried on its
+    own up to `max_batch_retries` times with backoff and then reported as
+    failed; the other batches are not affected. Rows are consumed lazily, so a
+    generator keeps memory bounded.
+    
+    Returns:
+        Throughput statistics: rows/batches written and failed, retries,
+        elapsed seconds, rows per second, summed summary counters and the
+        first error messages
+    """
+    if "$rows" not in query:
+        raise ValueError("bulk_write query must use the $rows parameter")
+    batch_size = max(1, batch_size)
+    concurrency = max(1, concurrency)
+    
+    stats: Dict[str, Any] = {
+        "rows": 0,
+        "batches": 0,
+        "failed_rows": 0,
+        "failed_batches": 0,
+        "retried_batches": 0,
+        "counters": dict.fromkeys(BULK_WRITE_COUNTERS, 0),
+        "errors": [],
+    }
+    
+    async def write_batch(tx: AsyncManagedTransaction, batch: List[Dict[str, Any]]) -> Any:
+        result = await tx.run(query, {**(parameters or {}), "rows": batch})
+        return await result.consume()
+    
+    async def run_batch(batch: List[Dict[str, Any]]) -> None:
+        for attempt in range(max_batch_retries + 1):
+            try:
+                async with driver.session() as session:
+                    summary = await session.execute_write(write_batch, batch)
+                counters = summary.counters
+            except Exception as e:
+                if attempt < max_batch_retries:
+                    stats["retried_batches"] += 1
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+                    continue
+                stats["failed_batches"] += 1
+                stats["failed_rows"] += len(batch)
+                if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+                    stats["errors"].append(str(e))
+                logger.warning(f"⚠️ Bulk write batch of {len(batch)} rows failed: {e}")
+                return
+            stats["batches"] += 1
+            stats["rows"] += len(batch)
+            for name in BULK_WRITE_COUNTERS:
+                stats["counters"][name] += getattr(counters, name, 0)
+            return
+    
+    # Bounded queue: batches are only sliced from `rows` as workers free up
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    
+    async def worker() -> None:
+        while (batch := await queue.get()) is not None:
+            await run_batch(batch)
+    
+    started = time.perf_counter()
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        iterator = iter(rows)
+        while batch := list(itertools.islice(iterator, batch_size)):
+            await queue.put(batch)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+    
+    elapsed = time.perf_counter() - started
+    stats["elapsed_seconds"] = round(elapsed, 3)
+    stats["rows_per_second"] = round(stats["rows"] / elapsed, 1) if elapsed > 0 else 0.0
+    return stats
+
 
 class Neo4jClient:
     """Neo4j database client"""
     
     def __init__(self):
-        self.driver: Optional[AsyncDriver] = None
+        self.driver: Optional[PinnedDriver] = None
     
     async def connect(self):
         """Connect to Neo4j"""
         try:
-            self.driver = AsyncGraphDatabase.driver(
+            driver = AsyncGraphDatabase.driver(
                 settings.neo4j_uri,
-                auth=(settings.neo4j_user, settings.neo4j_password)
+                auth=(settings.neo4j_user, settings.neo4j_password),
+                max_connection_pool_size=settings.neo4j_max_connection_pool_size,
+                connection_acquisition_timeout=settings.neo4j_connection_acquisition_timeout,
+                max_connection_lifetime=settings.neo4j_max_connection_lifetime,
+                max_transaction_retry_time=settings.neo4j_max_transaction_retry_time,
             )
-            # Verify connection
-            await self.driver.verify_connectivity()
+            session_defaults: Dict[str, Any] = {"fetch_size": settings.neo4j_fetch_size}
+            if settings.neo4j_database:
+                session_defaults["database"] = settings.neo4j_database
+            self.driver = PinnedDriver(driver, **session_defaults)
+            # Verify connection (against the home database unless one is configured)
+            verify_config = {"database": settings.neo4j_database} if settings.neo4j_database else {}
+            await self.driver.verify_connectivity(**verify_config)
             logger.info("✅ Connected to Neo4j")
         except Exception as e:
             logger.error(f"❌ Failed to connect to Neo4j: {e}")
@@ -36,34 +318,124 @@ class Neo4jClient:
             await self.driver.close()
             logger.info("Neo4j connection closed")
     
-    async def execute_query(
-        self,
+    @staticmethod
+    async def _fetch_all(
+        tx: AsyncManagedTransaction,
         query: str,
-        parameters: Optional[Dict[str, Any]] = None
-    ) -> List[Dict[str, Any]]:
-        """Execute a Cypher query"""
+        parameters: Dict[str, Any]
+    ) -> Tuple[List[Dict[str, Any]], Any]:
+        # Consumed inside the transaction function so a retry re-runs the whole read
+        result = await tx.run(query, parameters)
+        records = await result.data()
+        return records, await result.consume()
+    
+    async def _execute(self, query: str, parameters: Dict[str, Any], write: bool) -> List[Dict[str, Any]]:
         if not self.driver:
             raise RuntimeError("Neo4j driver not initialized")
         
         async with self.driver.session() as session:
-            result = await session.run(query, parameters or {})
-            records = await result.data()
-            return records
+            execute = session.execute_write if write else session.execute_read
+            records, _ = await execute(self._fetch_all, query, parameters)
+        return records
+    
+    async def execute_query(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Execute a Cypher query in a managed read transaction (retried on transient errors)"""
+        return await self._execute(query, parameters or {}, write=False)
     
     async def execute_write(
         self,
         query: str,
         parameters: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
-        """Execute a write query"""
+        """Execute a write query in a managed write transaction (retried on transient errors)"""
+        return await self._execute(query, parameters or {}, write=True)
+    
+    async def bulk_write(
+        self,
+        query: str,
+        rows: Iterable[Dict[str, Any]],
+        batch_size: int = 500,
+        concurrency: int = 4,
+        max_batch_retries: int = 2,
+        parameters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Batched, concurrent UNWIND writes (see module-level bulk_write)"""
         if not self.driver:
             raise RuntimeError("Neo4j driver not initialized")
         
-        async with self.driver.session() as session:
+        return await bulk_write(
+            self.driver,
+            query,
+            rows,
+            batch_size=batch_size,
+            concurrency=concurrency,
+            max_batch_retries=max_batch_retries,
+            parameters=parameters
+        )
+    
+    async def stream_query(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        fetch_size: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream the records of a read query as they arrive from the server.
+        
+        The driver pulls `fetch_size` records at a time (default: NEO4J_FETCH_SIZE)
+        and only asks for the next batch when the caller has consumed the
+        current one, so memory stays bounded and a slow consumer applies
+        backpressure to the server.
+        
+        Iterate it inside `contextlib.aclosing` when the loop may end early
+        (break, return or an exception): an abandoned async generator is only
+        finalized when it is garbage collected, and until then its session and
+        pooled connection stay checked out.
+        
+            async with aclosing(neo4j_client.stream_query(query)) as records:
+                async for record in records:
+                    ...
+        
+        Unlike execute_query this is not retried: a stream that fails midway
+        cannot be replayed transparently.
+        """
+        if not self.driver:
+            raise RuntimeError("Neo4j driver not initialized")
+        
+        config: Dict[str, Any] = {"default_access_mode": READ_ACCESS}
+        if fetch_size:
+            config["fetch_size"] = fetch_size
+        # Recorded by the session; the latency includes the consumer's time between records
+        async with self.driver.session(**config) as session:
             result = await session.run(query, parameters or {})
-            records = await result.data()
-            await session.close()
-            return records
+            async for record in result:
+                yield record.data()
+    
+    async def stream_query_batches(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+        fetch_size: Optional[int] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Stream the records of a read query in lists of at most `batch_size`
+        (iterate it inside `contextlib.aclosing` too, see stream_query)
+        """
+        batch: List[Dict[str, Any]] = []
+        records = self.stream_query(query, parameters, fetch_size=fetch_size or batch_size)
+        async with aclosing(records):
+            async for record in records:
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
 
 
 # Global instance
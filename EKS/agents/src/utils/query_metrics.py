@@ -0,0 +1,188 @@
+"""
+Per-query latency metrics for Neo4jClient
+Queries are grouped by fingerprint (literals stripped, whitespace collapsed)
+and exposed in Prometheus text format by the /metrics endpoint
+"""
+import hashlib
+import logging
+import math
+import re
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Latency samples kept per fingerprint for the percentiles (sliding window)
+LATENCY_WINDOW = 1024
+PERCENTILES = (0.5, 0.95, 0.99)
+
+# Statement text shown in metrics labels and logs
+MAX_STATEMENT_LENGTH = 160
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(query: str) -> str:
+    """Query text with literals replaced by ? and whitespace collapsed"""
+    statement = _STRING_LITERAL.sub("?", query)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def fingerprint(query: str) -> str:
+    """Short stable id of a normalized statement"""
+    return hashlib.sha1(normalize_statement(query).encode("utf-8")).hexdigest()[:12]
+
+
+def parameter_shapes(value: Any, depth: int = 0) -> Any:
+    """Types and sizes of query parameters, without their values (safe to log)"""
+    if isinstance(value, dict):
+        if depth >= 2:
+            return f"map[{len(value)}]"
+        return {str(k): parameter_shapes(v, depth + 1) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return "list[0]"
+        return f"list[{len(value)}] of {parameter_shapes(value[0], depth + 1)}"
+    if isinstance(value, str):
+        return f"str[{len(value)}]"
+    return type(value).__name__
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class QueryStats:
+    """Counters and latency window of one query fingerprint"""
+
+    __slots__ = (
+        "statement", "count", "errors", "rows", "total_seconds",
+        "available_after_ms", "consumed_after_ms", "latencies",
+    )
+
+    def __init__(self, statement: str):
+        self.statement = statement
+        self.count = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_seconds = 0.0
+        self.available_after_ms = 0
+        self.consumed_after_ms = 0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def percentiles(self) -> Dict[float, float]:
+        if not self.latencies:
+            return {p: 0.0 for p in PERCENTILES}
+        ordered = sorted(self.latencies)
+        return {p: _percentile(ordered, p) for p in PERCENTILES}
+
+
+class QueryMetrics:
+    """
+    Registry of query statistics by fingerprint.
+
+    Queries slower than slow_query_ms (0 = disabled) are logged with the
+    statement and the shapes of their parameters.
+    """
+
+    def __init__(self, slow_query_ms: float = 0):
+        self.slow_query_ms = slow_query_ms
+        self._stats: Dict[str, QueryStats] = {}
+
+    def observe(
+        self,
+        query: str,
+        seconds: float,
+        rows: int = 0,
+        parameters: Optional[Dict[str, Any]] = None,
+        summary: Any = None,
+        error: bool = False
+    ) -> None:
+        """Record one execution (summary: neo4j ResultSummary, when available)"""
+        key = fingerprint(query)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = QueryStats(normalize_statement(query)[:MAX_STATEMENT_LENGTH])
+
+        stats.count += 1
+        stats.errors += int(error)
+        stats.rows += rows
+        stats.total_seconds += seconds
+        stats.latencies.append(seconds)
+        if summary is not None:
+            stats.available_after_ms += summary.result_available_after or 0
+            stats.consumed_after_ms += summary.result_consumed_after or 0
+
+        if self.slow_query_ms and seconds * 1000 >= self.slow_query_ms:
+            logger.warning(
+                f"🐢 Slow query {key} took {seconds * 1000:.0f}ms ({rows} rows): "
+                f"{stats.statement} params={parameter_shapes(parameters or {})}"
+            )
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Current statistics by fingerprint"""
+        return {
+            key: {
+                "statement": stats.statement,
+                "count": stats.count,
+                "errors": stats.errors,
+                "rows": stats.rows,
+                "total_seconds": stats.total_seconds,
+                "result_available_after_ms": stats.available_after_ms,
+                "result_consumed_after_ms": stats.consumed_after_ms,
+                "latency_seconds": {
+                    f"p{int(p * 100)}": value for p, value in stats.percentiles().items()
+                },
+            }
+            for key, stats in self._stats.items()
+        }
+
+    def reset(self) -> None:
+        self._stats.clear()
+
+    def render_prometheus(self) -> str:
+        """Statistics in the Prometheus text exposition format"""
+        families = [
+            ("neo4j_query_total", "counter", "Queries executed"),
+            ("neo4j_query_errors_total", "counter", "Queries that raised an error"),
+            ("neo4j_query_rows_total", "counter", "Records returned"),
+            ("neo4j_query_seconds", "summary", "Client-side query latency"),
+            ("neo4j_query_result_available_after_ms_total", "counter",
+             "Server time until the first record was available"),
+            ("neo4j_query_result_consumed_after_ms_total", "counter",
+             "Server time until all records were consumed"),
+        ]
+        samples: Dict[str, List[str]] = {name: [] for name, _, _ in families}
+        for key, stats in self._stats.items():
+            labels = f'fingerprint="{key}",statement="{_escape_label(stats.statement)}"'
+            samples["neo4j_query_total"].append(f"neo4j_query_total{{{labels}}} {stats.count}")
+            samples["neo4j_query_errors_total"].append(f"neo4j_query_errors_total{{{labels}}} {stats.errors}")
+            samples["neo4j_query_rows_total"].append(f"neo4j_query_rows_total{{{labels}}} {stats.rows}")
+            for p, value in stats.percentiles().items():
+                samples["neo4j_query_seconds"].append(
+                    f'neo4j_query_seconds{{{labels},quantile="{p}"}} {value:.6f}'
+                )
+            samples["neo4j_query_seconds"].append(f"neo4j_query_seconds_sum{{{labels}}} {stats.total_seconds:.6f}")
+            samples["neo4j_query_seconds"].append(f"neo4j_query_seconds_count{{{labels}}} {stats.count}")
+            samples["neo4j_query_result_available_after_ms_total"].append(
+                f"neo4j_query_result_available_after_ms_total{{{labels}}} {stats.available_after_ms}"
+            )
+            samples["neo4j_query_result_consumed_after_ms_total"].append(
+                f"neo4j_query_result_consumed_after_ms_total{{{labels}}} {stats.consumed_after_ms}"
+            )
+
+        lines: List[str] = []
+        for name, kind, help_text in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples[name])
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
@@ -0,0 +1,115 @@
+"""
+Async read-through cache with TTL and LRU eviction
+Concurrent misses for the same key share a single load (single-flight)
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class AsyncTTLCache(Generic[V]):
+    """
+    Read-through cache for an async loader.
+
+    - ttl_seconds: how long a loaded value is served (0 = caching disabled)
+    - max_entries: least recently used entries are evicted past this size
+    - None results and loader errors are not cached
+
+    Invalidating a key while its load is in flight discards that load's
+    result, so a value read before an update is never stored after it.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        # key -> (expires_at, value), oldest first
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        # Loads in progress; invalidate() drops the key so the result is not stored
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Optional[V]]]) -> Optional[V]:
+        """Cached value for key, calling loader() on a miss or after expiry"""
+        if not self.enabled:
+            return await loader()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            # The load runs in its own task: cancelling one caller (client disconnect)
+            # does not cancel the load the other callers are waiting on
+            task = asyncio.ensure_future(loader())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            # Another caller is already loading this key: no extra query
+            self.hits += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future) -> None:
+        """Store the result of a finished load (unless it was invalidated meanwhile)"""
+        # Retrieved even when nobody awaits it, so asyncio does not log it as unhandled
+        failed = task.cancelled() or task.exception() is not None
+        if self._inflight.get(key) is not task:
+            return
+        del self._inflight[key]
+        if failed:
+            return
+        value = task.result()
+        if value is not None:
+            self._store(key, value)
+
+    def _store(self, key: Hashable, value: V) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """
+        Drop the cached value for key and any load in flight for it.
+
+        Returns:
+            True if a cached value was removed
+        """
+        self.invalidations += 1
+        self._inflight.pop(key, None)
+        return self._entries.pop(key, None) is not None
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._inflight.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
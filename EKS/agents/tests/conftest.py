@@ -0,0 +1,15 @@
+"""
+Shared test setup
+The modules under test import src.config, which requires these settings;
+tests never reach Neo4j or Azure OpenAI
+"""
+import os
+
+for name, value in {
+    "NEO4J_URI": "bolt://localhost:7687",
+    "NEO4J_USERNAME": "neo4j",
+    "NEO4J_PASSWORD": "test",
+    "AZURE_OPENAI_ENDPOINT": "https://test.openai.azure.com",
+    "AZURE_OPENAI_KEY": "test",
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,114 @@
+"""
+In-memory stand-in for the neo4j AsyncDriver used by the tests
+Queries are answered by a handler(query, parameters) -> rows; every run is recorded
+"""
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Handler = Callable[[str, Dict[str, Any]], List[Dict[str, Any]]]
+
+
+class FakeRecord(dict):
+    def data(self) -> Dict[str, Any]:
+        return dict(self)
+
+
+class FakeResult:
+    def __init__(self, rows: List[Dict[str, Any]], counters: Optional[Dict[str, int]] = None):
+        self._rows = [FakeRecord(row) for row in rows]
+        self.summary = SimpleNamespace(
+            counters=SimpleNamespace(**(counters or {})), result_available_after=1, result_consumed_after=2
+        )
+        self.consumed = False
+
+    async def data(self) -> List[Dict[str, Any]]:
+        rows, self._rows = self._rows, []
+        return [row.data() for row in rows]
+
+    async def single(self) -> Optional[FakeRecord]:
+        rows, self._rows = self._rows, []
+        return rows[0] if rows else None
+
+    async def consume(self) -> Any:
+        self._rows = []
+        self.consumed = True
+        return self.summary
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        while self._rows:
+            yield self._rows.pop(0)
+
+
+class FakeTransaction:
+    def __init__(self, driver: "FakeDriver"):
+        self.driver = driver
+
+    async def run(self, query: str, parameters: Optional[Dict[str, Any]] = None, **kwargs: Any) -> FakeResult:
+        return self.driver.answer(query, parameters or {})
+
+
+class FakeSession:
+    def __init__(self, driver: "FakeDriver", config: Dict[str, Any]):
+        self.driver = driver
+        self.config = config
+        self.closed = False
+
+    async def __aenter__(self) -> "FakeSession":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        self.closed = True
+
+    async def run(self, query: str, parameters: Optional[Dict[str, Any]] = None, **kwargs: Any) -> FakeResult:
+        return self.driver.answer(query, parameters or {})
+
+    async def _execute(self, work: Any, *args: Any, **kwargs: Any) -> Any:
+        # Like the driver's retry: the work function runs again from scratch
+        for _ in range(self.driver.replays):
+            await work(FakeTransaction(self.driver), *args, **kwargs)
+        return await work(FakeTransaction(self.driver), *args, **kwargs)
+
+    async def execute_read(self, work: Any, *args: Any, **kwargs: Any) -> Any:
+        return await self._execute(work, *args, **kwargs)
+
+    async def execute_write(self, work: Any, *args: Any, **kwargs: Any) -> Any:
+        return await self._execute(work, *args, **kwargs)
+
+
+class FakeDriver:
+    """
+    - handler: rows (or an exception to raise) for each query
+    - replays: extra runs of every transaction function, as after a transient error
+    """
+
+    def __init__(self, handler: Optional[Handler] = None, replays: int = 0):
+        self.handler = handler or (lambda query, parameters: [])
+        self.replays = replays
+        self.queries: List[Tuple[str, Dict[str, Any]]] = []
+        self.sessions: List[FakeSession] = []
+        self.verified: List[Dict[str, Any]] = []
+        self.closed = False
+
+    def session(self, **config: Any) -> FakeSession:
+        session = FakeSession(self, config)
+        self.sessions.append(session)
+        return session
+
+    def answer(self, query: str, parameters: Dict[str, Any]) -> FakeResult:
+        self.queries.append((query, parameters))
+        rows = self.handler(query, parameters)
+        if isinstance(rows, FakeResult):
+            return rows
+        return FakeResult(rows)
+
+    async def verify_connectivity(self, **config: Any) -> None:
+        self.verified.append(config)
+
+    async def close(self) -> None:
+        self.closed = True
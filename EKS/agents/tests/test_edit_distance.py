@@ -0,0 +1,52 @@
+"""Testes da distância de Levenshtein limitada"""
+import random
+
+import pytest
+
+from src.pipelines.ingestion.edit_distance import bounded_levenshtein, max_distance_for
+
+
+def levenshtein(s1: str, s2: str) -> int:
+    """Referência: programação dinâmica completa"""
+    previous = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1, 1):
+        current = [i]
+        for j, c2 in enumerate(s2, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (c1 != c2)))
+        previous = current
+    return previous[-1]
+
+
+@pytest.mark.parametrize("s1, s2, expected", [
+    ("", "", 0),
+    ("notion", "notion", 0),
+    ("notion", "notiom", 1),
+    ("kitten", "sitting", 3),
+    ("", "abc", 3),
+    ("flaw", "lawn", 2),
+])
+def test_exact_distance_within_bound(s1, s2, expected):
+    assert bounded_levenshtein(s1, s2, 5) == expected
+    assert bounded_levenshtein(s2, s1, 5) == expected
+
+
+def test_distance_over_bound_returns_bound_plus_one():
+    assert bounded_levenshtein("kitten", "sitting", 2) == 3
+    assert bounded_levenshtein("a", "abcdef", 1) == 2
+
+
+def test_matches_full_levenshtein_on_random_pairs():
+    rng = random.Random(7)
+    for _ in range(3000):
+        s1 = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 9)))
+        s2 = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 9)))
+        k = rng.randint(0, 5)
+        d = levenshtein(s1, s2)
+        assert bounded_levenshtein(s1, s2, k) == (d if d <= k else k + 1), (s1, s2, k)
+
+
+def test_max_distance_for_threshold():
+    # 1 - 3/10 = 0.7 atinge o threshold apesar do erro de ponto flutuante
+    assert max_distance_for(0.7, 10) == 3
+    assert max_distance_for(0.8, 4) == 0
+    assert max_distance_for(1.0, 20) == 0
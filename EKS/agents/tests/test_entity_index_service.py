@@ -0,0 +1,310 @@
+"""Testes do EntityIndexService (carga, refresh incremental e single-flight)"""
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from src.pipelines.ingestion import entity_index_service
+from src.pipelines.ingestion.entity_index_service import EntityIndexService, get_entity_index_service
+
+
+class FakeGraph:
+    """
+    Grafo em memória no lugar das queries do graph_loader.
+    O delta devolve changed_at >= since, como o DELTA_PAGE_QUERY (sem a margem de fuso).
+    """
+
+    def __init__(self):
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.clock = 1000
+        self.full_loads = 0
+        self.delta_queries = 0
+        self.release: Optional[asyncio.Event] = None
+
+    def put(self, node_id: str, name: Optional[str], label: str = "Tool", aliases=(), **fields):
+        self.clock += 1
+        self.nodes[node_id] = {
+            'id': node_id, 'label': label, 'name': name, 'canonical_name': name,
+            'aliases': list(aliases), 'context': None, 'changed_at': self.clock, **fields,
+        }
+
+    async def pages(self, driver, labels=None, page_size=1000, since=None, on_progress=None):
+        if since is None:
+            self.full_loads += 1
+            if self.release is not None:
+                await self.release.wait()
+        else:
+            self.delta_queries += 1
+        records = [
+            dict(r) for r in self.nodes.values()
+            if (labels is None or r['label'] in labels)
+            and (since is None or (r['changed_at'] is not None and r['changed_at'] >= since))
+        ]
+        for start in range(0, len(records), page_size):
+            page = records[start:start + page_size]
+            if on_progress:
+                on_progress(start + len(page), page[0]['label'])
+            yield page
+
+    async def ids(self, driver, labels=None, page_size=1000):
+        yield [r['id'] for r in self.nodes.values()
+               if r['name'] and (labels is None or r['label'] in labels)]
+
+    async def by_id(self, driver, ids: List[str], page_size=1000):
+        records = [dict(self.nodes[i]) for i in ids if i in self.nodes]
+        if records:
+            yield records
+
+
+@pytest.fixture
+def graph(monkeypatch) -> FakeGraph:
+    graph = FakeGraph()
+    monkeypatch.setattr(entity_index_service, "iter_graph_node_pages", graph.pages)
+    monkeypatch.setattr(entity_index_service, "iter_graph_node_ids", graph.ids)
+    monkeypatch.setattr(entity_index_service, "iter_graph_nodes_by_id", graph.by_id)
+    return graph
+
+
+def names(service: EntityIndexService) -> List[str]:
+    return sorted(node.name for node in service.index.nodes)
+
+
+async def test_full_load_skips_nameless_nodes(graph):
+    graph.put("1", "Notion")
+    graph.put("2", "Jira", aliases=["Atlassian Jira"])
+    graph.put("3", None)
+    service = EntityIndexService(neo4j_driver=object())
+
+    nodes = await service.load()
+
+    assert sorted(n.name for n in nodes) == ["Jira", "Notion"]
+    assert service.loaded
+    assert service.watermark == graph.clock
+
+
+async def test_refresh_applies_delta_in_place(graph):
+    graph.put("1", "Notion")
+    graph.put("2", "Jira")
+    service = EntityIndexService(neo4j_driver=object())
+    await service.load()
+    version = service.version
+
+    graph.put("2", "Jira Software")
+    graph.put("3", "Slack")
+    counts = await service.refresh(detect_deletes=False)
+
+    assert counts == {'upserted': 2, 'removed': 0, 'total': 3}
+    assert names(service) == ["Jira Software", "Notion", "Slack"]
+    assert service.version == version + 1
+    assert [op for _, op, _ in service.changes_since(version)] == ['upsert', 'upsert']
+    assert graph.full_loads == 1
+
+
+async def test_refresh_without_changes_is_a_no_op(graph, tmp_path):
+    graph.put("1", "Notion")
+    graph.put("2", "Jira")
+    service = EntityIndexService(neo4j_driver=object(), snapshot_path=str(tmp_path / "index.bin"))
+    await service.load()
+    version = service.version
+    saved_at = (tmp_path / "index.bin").stat().st_mtime_ns
+
+    # O node do watermark volta no delta (>=) sem mudança nenhuma
+    counts = await service.refresh()
+
+    assert counts == {'upserted': 0, 'removed': 0, 'total': 2}
+    assert service.version == version
+    assert service.changes_since(version) == []
+    assert (tmp_path / "index.bin").stat().st_mtime_ns == saved_at
+
+
+async def test_refresh_removes_renamed_away_and_deleted_nodes(graph):
+    graph.put("1", "Notion")
+    graph.put("2", "Jira")
+    graph.put("3", "Slack")
+    service = EntityIndexService(neo4j_driver=object())
+    await service.load()
+
+    graph.put("2", None)
+    del graph.nodes["3"]
+    assert await service.refresh(detect_deletes=False) == {'upserted': 0, 'removed': 1, 'total': 2}
+    assert await service.refresh(detect_deletes=True) == {'upserted': 0, 'removed': 1, 'total': 1}
+    assert names(service) == ["Notion"]
+
+
+async def test_reconcile_loads_nodes_invisible_to_the_delta(graph):
+    graph.put("1", "Notion")
+    service = EntityIndexService(neo4j_driver=object())
+    await service.load()
+
+    # Node sem timestamp: só a comparação de ids o encontra
+    graph.put("2", "Confluence", changed_at=None)
+    assert (await service.refresh(detect_deletes=False))['upserted'] == 0
+    assert (await service.refresh(detect_deletes=True))['upserted'] == 1
+    assert names(service) == ["Confluence", "Notion"]
+
+
+async def test_refresh_before_load_does_a_full_load(graph):
+    graph.put("1", "Notion")
+    service = EntityIndexService(neo4j_driver=object())
+
+    assert await service.refresh() == {'upserted': 1, 'removed': 0, 'total': 1}
+    assert graph.full_loads == 1
+
+
+async def test_concurrent_loads_share_one_query_and_report_progress_to_all(graph):
+    graph.put("1", "Notion")
+    graph.put("2", "Jira")
+    graph.release = asyncio.Event()
+    service = EntityIndexService(neo4j_driver=object(), page_size=1)
+    first, second = [], []
+
+    loads = [
+        asyncio.create_task(service.load(on_progress=lambda n, label: first.append(n))),
+        asyncio.create_task(service.load(on_progress=lambda n, label: second.append(n))),
+        asyncio.create_task(service.ensure_loaded()),
+    ]
+    await asyncio.sleep(0)
+    graph.release.set()
+    results = await asyncio.gather(*loads)
+
+    assert graph.full_loads == 1
+    assert results[0] is results[1]
+    assert first == second == [1, 2]
+
+
+async def test_loads_with_different_labels_do_not_share_a_result(graph):
+    graph.put("1", "Notion", label="Tool")
+    graph.put("2", "Ana", label="Person")
+    service = EntityIndexService(neo4j_driver=object())
+
+    tools, people = await asyncio.gather(service.load(labels=["Tool"]), service.load(labels=["Person"]))
+
+    assert graph.full_loads == 2
+    assert [n.name for n in tools] == ["Notion"]
+    assert [n.name for n in people] == ["Ana"]
+
+
+async def test_late_joiner_progress_does_not_leak_into_the_next_load(graph):
+    graph.put("1", "Notion")
+    service = EntityIndexService(neo4j_driver=object())
+    saving = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_save():
+        saving.set()
+        await release.wait()
+
+    service.save_snapshot = slow_save
+    late = []
+    first = asyncio.create_task(service.load())
+    await saving.wait()
+    # A carga já passou da paginação: quem entra agora não recebe progresso
+    joined = asyncio.create_task(service.load(on_progress=lambda n, label: late.append(n)))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(first, joined)
+
+    await service.load(on_progress=lambda n, label: None)
+    assert late == []
+    assert graph.full_loads == 2
+
+
+async def test_refresh_is_keyed_on_detect_deletes(graph):
+    graph.put("1", "Notion")
+    service = EntityIndexService(neo4j_driver=object())
+    await service.load()
+
+    await asyncio.gather(service.refresh(detect_deletes=False), service.refresh(detect_deletes=False))
+    assert graph.delta_queries == 1
+
+    await asyncio.gather(service.refresh(detect_deletes=True), service.refresh(detect_deletes=False))
+    assert graph.delta_queries == 3
+
+
+async def test_cancelled_caller_does_not_cancel_the_shared_load(graph):
+    graph.put("1", "Notion")
+    graph.release = asyncio.Event()
+    service = EntityIndexService(neo4j_driver=object())
+
+    cancelled = asyncio.create_task(service.load())
+    waiting = asyncio.create_task(service.load())
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    graph.release.set()
+
+    assert [n.name for n in await waiting] == ["Notion"]
+    assert service.loaded
+    assert graph.full_loads == 1
+
+
+@pytest.fixture
+def no_shared_service(monkeypatch):
+    monkeypatch.setattr(entity_index_service, "_shared_service", None)
+
+
+def test_ner_and_matching_agents_share_the_process_service(no_shared_service):
+    from src.pipelines.ingestion.entity_index import GraphNode
+    from src.pipelines.ingestion.entity_matching_agent import EntityMatchingAgent
+    from src.pipelines.ingestion.ner_agent import NERAgent
+
+    ner = NERAgent()
+    matcher = EntityMatchingAgent(index_service=get_entity_index_service())
+    assert ner.index_service is matcher.index_service
+
+    matcher.graph_nodes = [GraphNode(id="1", label="Tool", name="Notion")]
+    assert [e.name for e in ner.known_entities] == ["Notion"]
+    assert ner.find_graph_match("notion").id == "1"
+
+
+def test_options_passed_after_creation_are_applied_before_load(no_shared_service, graph):
+    driver = object()
+    service = get_entity_index_service()  # Ex.: criado antes pelo NERAgent, sem driver e sem opções
+
+    assert get_entity_index_service(driver, page_size=50, typo_max_distance=1) is service
+    assert service.neo4j_driver is driver
+    assert service.page_size == 50
+    assert service.index.typos.max_distance == 1
+
+
+async def test_options_after_load_are_ignored_with_a_warning(no_shared_service, graph, caplog):
+    graph.put("1", "Notion")
+    service = get_entity_index_service(object(), page_size=50)
+    await service.load()
+
+    assert get_entity_index_service(page_size=10) is service
+    assert service.page_size == 50
+    assert "ignoring options page_size" in caplog.text
+    with pytest.raises(RuntimeError):
+        service.configure(page_size=10)
+
+
+async def test_warm_start_restores_the_snapshot_and_applies_the_delta(graph, tmp_path):
+    path = str(tmp_path / "index.bin")
+    graph.put("1", "Notion")
+    graph.put("2", "Jira")
+    first = EntityIndexService(neo4j_driver=object(), snapshot_path=path)
+    await first.ensure_loaded()
+    assert graph.full_loads == 1
+
+    graph.put("3", "Slack")
+    restarted = EntityIndexService(neo4j_driver=object(), snapshot_path=path)
+    await restarted.ensure_loaded()
+
+    # Servido do arquivo; o delta chega em background
+    assert graph.full_loads == 1
+    assert restarted.loaded
+    await restarted._catch_up
+    assert names(restarted) == ["Jira", "Notion", "Slack"]
+
+
+async def test_incompatible_snapshot_falls_back_to_a_full_load(graph, tmp_path):
+    path = str(tmp_path / "index.bin")
+    graph.put("1", "Notion")
+    await EntityIndexService(neo4j_driver=object(), snapshot_path=path).ensure_loaded()
+
+    other = EntityIndexService(neo4j_driver=object(), snapshot_path=path, typo_max_distance=1)
+    await other.ensure_loaded()
+
+    assert graph.full_loads == 2
+    assert other._catch_up is None
+    assert names(other) == ["Notion"]
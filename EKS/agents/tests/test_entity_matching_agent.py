@@ -0,0 +1,173 @@
+"""Testes do EntityMatchingAgent.find_matches (índice em memória, sem Neo4j)"""
+import random
+import threading
+from typing import List
+
+from src.pipelines.ingestion import entity_matching_agent
+from src.pipelines.ingestion.entity_index import GraphNode
+from src.pipelines.ingestion.entity_matching_agent import MAX_CANDIDATES, EntityMatchingAgent
+
+
+def make_agent(nodes: List[GraphNode], **options) -> EntityMatchingAgent:
+    agent = EntityMatchingAgent(**options)
+    agent.graph_nodes = nodes
+    agent._loaded = True
+    return agent
+
+
+NODES = [
+    GraphNode(id="1", label="Organization", name="CoCreateAI",
+              aliases=["CoCreate", "Co-Create AI", "CVC"]),
+    GraphNode(id="2", label="Organization", name="Montreal Ventures", aliases=["Montreal", "MV"]),
+    GraphNode(id="3", label="Tool", name="Notion"),
+    GraphNode(id="4", label="Tool", name="Notion Calendar", aliases=["Notion"]),
+]
+
+
+def test_exact_name_returns_only_exact_matches():
+    matches = make_agent(NODES).find_matches("  NOTION ")
+
+    # "Notion Calendar" casa pelo alias; o nome canônico vem antes
+    assert [(m.node.id, m.match_type, m.score, m.matched_term) for m in matches] == [
+        ("3", "exact", 1.0, "Notion"),
+        ("4", "alias", 0.95, "Notion"),
+    ]
+
+
+def test_alias_match_uses_the_original_alias_text():
+    matches = make_agent(NODES).find_matches("co-create ai")
+
+    assert [(m.node.id, m.match_type, m.score, m.matched_term) for m in matches] == [
+        ("1", "alias", 0.95, "Co-Create AI"),
+    ]
+
+
+def test_node_matching_by_name_is_not_repeated_as_alias():
+    nodes = [GraphNode(id="1", label="Tool", name="Jira", aliases=["JIRA", "jira"])]
+    matches = make_agent(nodes).find_matches("jira")
+
+    assert [(m.node.id, m.match_type) for m in matches] == [("1", "exact")]
+
+
+def test_non_exact_term_falls_back_to_fuzzy_scoring():
+    matches = make_agent(NODES).find_matches("notiom")
+
+    assert matches[0].node.id == "3"
+    assert matches[0].match_type == "fuzzy"
+    assert 0.7 <= matches[0].score < 1.0
+
+
+async def test_match_entity_suggests_action_from_best_score():
+    agent = make_agent(NODES)
+
+    assert (await agent.match_entity("CVC")).suggested_action == "link"
+    assert (await agent.match_entity("notiom")).suggested_action == "review"
+    created = await agent.match_entity("slack")
+    assert created.found is False
+    assert created.suggested_action == "create"
+
+
+async def test_matching_runs_off_the_event_loop_without_workers():
+    agent = make_agent(NODES, match_chunk_size=2)
+    threads = set()
+    match_term = agent._match_term
+
+    def recording(term, labels=None):
+        threads.add(threading.get_ident())
+        return match_term(term, labels)
+
+    agent._match_term = recording
+    await agent.match_entity("notion")
+    await agent.match_entities(["cvc"])
+    await agent.match_entities(["cvc", "notiom", "montreal", "slack", "cvc"])
+
+    assert threads and threading.get_ident() not in threads
+
+
+async def test_batch_keeps_input_order_and_scores_repeated_terms_once():
+    agent = make_agent(NODES, match_chunk_size=2)
+    terms = ["slack", "Notion", "cvc", "Notion", "montreal"]
+
+    results = await agent.match_entities(terms)
+
+    assert [r.input_term for r in results] == terms
+    assert results[1] is results[3]
+    assert [r.suggested_action for r in results] == ["create", "link", "link", "link", "link"]
+
+
+async def test_process_pool_matches_the_thread_path():
+    terms = ["notion", "notiom", "cvc", "co create", "montreal", "mv", "slack", "calendar"]
+    agent = make_agent(NODES, match_workers=2, match_chunk_size=3)
+    reference = make_agent(NODES, match_chunk_size=3)
+    try:
+        assert await agent.match_entities(terms) == await reference.match_entities(terms)
+
+        # Troca de snapshot: o pool é recriado com o índice novo
+        updated = NODES + [GraphNode(id="5", label="Tool", name="Slack")]
+        agent.graph_nodes = updated
+        reference.graph_nodes = updated
+        assert await agent.match_entities(terms) == await reference.match_entities(terms)
+        assert (await agent.match_entity("slack")).found
+    finally:
+        agent.shutdown()
+
+
+def test_labels_restrict_exact_and_fuzzy_matches():
+    agent = make_agent(NODES + [GraphNode(id="5", label="Concept", name="Notion")])
+
+    assert [m.node.id for m in agent.find_matches("notion", labels=["Concept"])] == ["5"]
+    assert [m.node.id for m in agent.find_matches("notion", labels=["Tool"])] == ["3", "4"]
+    assert [m.node.id for m in agent.find_matches("notiom", labels=["Concept"])] == ["5"]
+    assert agent.find_matches("notion", labels=["Person"]) == []
+
+
+def test_top_k_equals_a_stable_sort_of_all_candidates(monkeypatch):
+    rng = random.Random(13)
+    words = ["data", "dados", "time", "times", "dado", "datas", "tim", "dat"]
+    nodes = [
+        GraphNode(
+            id=str(i),
+            label=rng.choice(["Tool", "Concept"]),
+            name=" ".join(rng.choice(words) for _ in range(rng.randint(1, 2))),
+            aliases=[rng.choice(words) + rng.choice(["", "s", "x"])],
+        )
+        for i in range(120)
+    ]
+    agent = make_agent(nodes)
+    terms = ["data", "dadoz", "tmes", "dat time", "times data"]
+    top = [(term, labels, agent.find_matches(term, labels)) for term in terms for labels in (None, ["Tool"])]
+
+    # Sem limite o heap guarda todos os candidatos, na ordem (score, ordem de scan)
+    monkeypatch.setattr(entity_matching_agent, "MAX_CANDIDATES", 10_000)
+    truncated = 0
+    for term, labels, matches in top:
+        everything = agent.find_matches(term, labels)
+        if everything and everything[0].score == 1.0 and everything[0].match_type in ("exact", "alias"):
+            continue  # Fast path: só matches exatos, sem ranking
+        expected = sorted(everything, key=lambda m: m.score, reverse=True)[:MAX_CANDIDATES]
+        truncated += len(everything) > MAX_CANDIDATES
+        assert matches == expected
+    assert truncated
+
+
+def test_phonetic_key_adds_candidates_fuzzy_scoring_misses():
+    agent = make_agent([
+        GraphNode(id="1", label="Person", name="Chiquinho"),
+        GraphNode(id="2", label="Person", name="Francisco Silva", aliases=["Chiquinho"]),
+        GraphNode(id="3", label="Tool", name="Jira"),
+    ])
+
+    assert agent.fuzzy_score("Xikinho", "Chiquinho") < agent.fuzzy_threshold
+    assert [(m.node.id, m.match_type, m.score, m.matched_term) for m in agent.find_matches("Xikinho")] == [
+        ("1", "phonetic", 0.75, "Chiquinho"),
+        ("2", "phonetic_alias", 0.75, "Chiquinho"),
+    ]
+    assert [m.node.id for m in agent.find_matches("Xikinho", labels=["Tool"])] == []
+
+
+def test_phonetic_matches_can_be_disabled():
+    nodes = [GraphNode(id="1", label="Person", name="Chiquinho")]
+
+    assert make_agent(nodes, phonetic_score=0).find_matches("Xikinho") == []
+    # Só fonético (0.75) fica abaixo do limiar de link: vai para revisão
+    assert make_agent(nodes)._match_term("Xikinho").suggested_action == "review"
@@ -0,0 +1,80 @@
+"""Testes do snapshot do EntityIndex em disco"""
+import time
+
+from src.pipelines.ingestion.entity_index import EntityIndex, GraphNode
+from src.pipelines.ingestion.index_snapshot import load_snapshot, save_snapshot
+
+LABELS = ["Person", "Tool"]
+OPTIONS = {"typo_max_distance": 2, "typo_max_length": 8}
+
+
+def build_index() -> EntityIndex:
+    return EntityIndex.build([
+        GraphNode(id="4:a:1", label="Person", name="Ana Souza", aliases=["Aninha"]),
+        GraphNode(id="4:a:2", label="Tool", name="Notion", canonical_name="Notion", context="docs"),
+        GraphNode(id="4:a:3", label="Tool", name="Jira", aliases=["Atlassian Jira"]),
+    ], **OPTIONS)
+
+
+def test_round_trip_restores_index_and_watermark(tmp_path):
+    path = str(tmp_path / "index" / "snapshot.bin")
+    index = build_index()
+
+    size = save_snapshot(path, index, 1700000000000, LABELS, OPTIONS)
+    assert size == (tmp_path / "index" / "snapshot.bin").stat().st_size
+
+    restored = load_snapshot(path, LABELS, OPTIONS)
+    assert restored is not None
+    loaded, watermark = restored
+    assert watermark == 1700000000000
+    assert [n.to_graph_node() for n in loaded.nodes] == [n.to_graph_node() for n in index.nodes]
+    assert loaded.positions == index.positions
+    assert loaded.exact_names == index.exact_names
+    assert loaded.exact_aliases == index.exact_aliases
+    assert loaded.ngrams.postings == index.ngrams.postings
+    assert loaded.typos.postings == index.typos.postings
+    assert loaded.stats() == index.stats()
+
+
+def test_restored_index_accepts_updates(tmp_path):
+    path = str(tmp_path / "snapshot.bin")
+    save_snapshot(path, build_index(), None, LABELS, OPTIONS)
+    loaded, watermark = load_snapshot(path, LABELS, OPTIONS)
+
+    assert watermark is None
+    loaded.upsert(GraphNode(id="4:a:2", label="Tool", name="Notion Calendar"))
+    assert loaded.remove("4:a:1")
+    assert "notion calendar" in loaded.exact_names
+    assert "ana souza" not in loaded.exact_names
+    assert len(loaded) == 2
+
+
+def test_incompatible_snapshot_is_ignored(tmp_path):
+    path = str(tmp_path / "snapshot.bin")
+    save_snapshot(path, build_index(), 1, LABELS, OPTIONS)
+
+    assert load_snapshot(path, ["Person"], OPTIONS) is None
+    assert load_snapshot(path, LABELS, {**OPTIONS, "typo_max_distance": 1}) is None
+
+
+def test_stale_snapshot_is_ignored(tmp_path, monkeypatch):
+    path = str(tmp_path / "snapshot.bin")
+    save_snapshot(path, build_index(), 1, LABELS, OPTIONS)
+
+    assert load_snapshot(path, LABELS, OPTIONS, max_age_seconds=60) is not None
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert load_snapshot(path, LABELS, OPTIONS, max_age_seconds=60) is None
+
+
+def test_missing_or_corrupted_snapshot_is_ignored(tmp_path):
+    path = tmp_path / "snapshot.bin"
+    assert load_snapshot(str(path), LABELS, OPTIONS) is None
+
+    save_snapshot(str(path), build_index(), 1, LABELS, OPTIONS)
+    data = path.read_bytes()
+    path.write_bytes(data[:len(data) - 20])
+    assert load_snapshot(str(path), LABELS, OPTIONS) is None
+
+    path.write_bytes(b"not a snapshot")
+    assert load_snapshot(str(path), LABELS, OPTIONS) is None
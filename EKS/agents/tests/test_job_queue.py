@@ -0,0 +1,137 @@
+"""Testes da fila de jobs de ingestão (store durável e recuperação após restart)"""
+import asyncio
+
+from src.pipelines.ingestion.job_queue import (
+    JOB_FAILED,
+    JOB_RUNNING,
+    JOB_SUCCEEDED,
+    IngestionJob,
+    JobQueue,
+    JobStore,
+    SQLiteJobStore,
+)
+
+
+async def echo(payload, report):
+    report("echo", 0.5)
+    return {"echo": payload["text"]}
+
+
+async def wait_finished(queue: JobQueue, job_id: str) -> IngestionJob:
+    for _ in range(500):
+        job = await queue.get(job_id)
+        if job is not None and job.status in (JOB_SUCCEEDED, JOB_FAILED):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+async def test_submitted_job_succeeds_and_drops_payload(tmp_path):
+    queue = JobQueue({"echo": echo}, store=SQLiteJobStore(str(tmp_path / "jobs.db")))
+    try:
+        job = await queue.submit("echo", {"text": "oi"})
+        done = await wait_finished(queue, job.id)
+    finally:
+        await queue.stop()
+
+    assert done.result == {"echo": "oi"}
+    assert done.progress == 1.0
+    assert done.attempts == 1
+    assert done.payload == {}
+
+
+async def test_handler_error_fails_job():
+    async def broken(payload, report):
+        raise ValueError("bad transcript")
+
+    queue = JobQueue({"broken": broken})
+    try:
+        job = await queue.submit("broken", {})
+        done = await wait_finished(queue, job.id)
+    finally:
+        await queue.stop()
+
+    assert done.status == JOB_FAILED
+    assert done.error == "bad transcript"
+
+
+async def test_interrupted_job_is_resumed_after_restart(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    started = asyncio.Event()
+
+    async def hangs(payload, report):
+        started.set()
+        await asyncio.Event().wait()
+
+    queue = JobQueue({"ingest": hangs}, store=SQLiteJobStore(path))
+    job = await queue.submit("ingest", {"text": "transcrição"})
+    await asyncio.wait_for(started.wait(), 5)
+    await queue.stop()
+
+    # O processo "caiu": o job continua running no arquivo, com o payload
+    interrupted = await SQLiteJobStore(path).get(job.id)
+    assert interrupted.status == JOB_RUNNING
+    assert interrupted.payload == {"text": "transcrição"}
+
+    async def ingest(payload, report):
+        return {"echo": payload["text"]}
+
+    restarted = JobQueue({"ingest": ingest}, store=SQLiteJobStore(path))
+    try:
+        assert await restarted.start() == 1
+        done = await wait_finished(restarted, job.id)
+    finally:
+        await restarted.stop()
+
+    assert done.status == JOB_SUCCEEDED
+    assert done.result == {"echo": "transcrição"}
+    assert done.attempts == 2
+
+
+async def test_job_that_keeps_crashing_is_abandoned(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    store = SQLiteJobStore(path)
+    job = IngestionJob(kind="echo", payload={"text": "oi"}, status=JOB_RUNNING, attempts=3)
+    await store.save(job)
+
+    queue = JobQueue({"echo": echo}, store=SQLiteJobStore(path), max_attempts=3)
+    try:
+        assert await queue.start() == 1
+        done = await wait_finished(queue, job.id)
+    finally:
+        await queue.stop()
+
+    assert done.status == JOB_FAILED
+    assert done.error == "Job did not finish after 3 attempts"
+    assert done.payload == {}
+    assert done.result is None
+
+
+async def test_finished_jobs_beyond_max_finished_are_evicted(tmp_path):
+    stores = (
+        JobStore(retention_seconds=0, max_finished=2),
+        SQLiteJobStore(str(tmp_path / "jobs.db"), retention_seconds=0, max_finished=2),
+    )
+    for store in stores:
+        jobs = [IngestionJob(kind="echo", created_at=f"2026-01-0{i + 1}T00:00:00+00:00") for i in range(3)]
+        for job in jobs:
+            job.status = JOB_SUCCEEDED
+            await store.save(job)
+
+        assert await store.get(jobs[0].id) is None
+        assert await store.get(jobs[2].id) is not None
+
+        pending = IngestionJob(kind="echo", created_at="2025-01-01T00:00:00+00:00")
+        await store.save(pending)
+        assert [j.id for j in await store.pending()] == [pending.id]
+
+
+async def test_expired_finished_jobs_are_evicted(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.db"), retention_seconds=3600)
+    old = IngestionJob(kind="echo", status=JOB_SUCCEEDED, created_at="2020-01-01T00:00:00+00:00")
+    await store.save(old)
+    recent = IngestionJob(kind="echo", status=JOB_SUCCEEDED)
+    await store.save(recent)
+
+    assert await store.get(old.id) is None
+    assert await store.get(recent.id) is not None
@@ -0,0 +1,165 @@
+"""Testes da escrita em lote do LinkingAgent (driver Neo4j falso)"""
+import pytest
+
+from src.pipelines.ingestion.linking_agent import LinkingAgent, LinkingResult
+from tests.fake_neo4j import FakeDriver
+
+
+class FakeGraph:
+    """Responde LINK/CREATE como o Neo4j: MERGE só cria o que a chave ainda não tem"""
+
+    def __init__(self):
+        self.keys = set()
+
+    def __call__(self, query, parameters):
+        rows = parameters["rows"]
+        if "AS linked" in query:
+            return [{"linked": len(rows)}]
+        created = 0
+        for row in rows:
+            key = (query, row.get("name"), row.get("title"), row.get("sourceRef"))
+            if key not in self.keys:
+                self.keys.add(key)
+                created += 1
+        return [{"total": len(rows), "created": created}]
+
+
+def link(entity_id, relationship="MENTIONED_IN"):
+    return {"entity": {"value": entity_id, "linkedNodeId": entity_id}, "relationship": relationship, "target_id": "m1"}
+
+
+def make_agent(batch_size=2, replays=0):
+    driver = FakeDriver(FakeGraph(), replays=replays)
+    return LinkingAgent(driver, write_batch_size=batch_size), driver
+
+
+async def test_links_are_grouped_by_relationship_and_batched():
+    agent, driver = make_agent(batch_size=2)
+    result = LinkingResult(
+        linked=[link(f"e{i}") for i in range(5)] + [link("p1", "PARTICIPATED_IN")],
+        to_create=[],
+        skipped=[{"entity": {}, "reason": "x"}],
+    )
+
+    counts = await agent.create_relationships(result, "m1")
+
+    assert counts == {"linked": 6, "created": 0, "merged": 0, "skipped": 1}
+    assert len(driver.sessions) == 1
+    batches = [(query.split("[r:`")[1].split("`")[0], [row["entityId"] for row in params["rows"]])
+               for query, params in driver.queries]
+    assert batches == [
+        ("MENTIONED_IN", ["e0", "e1"]),
+        ("MENTIONED_IN", ["e2", "e3"]),
+        ("MENTIONED_IN", ["e4"]),
+        ("PARTICIPATED_IN", ["p1"]),
+    ]
+    assert all(params["meetingId"] == "m1" for _, params in driver.queries)
+
+
+async def test_linked_items_without_node_id_are_not_counted():
+    agent, driver = make_agent()
+    unlinked = {"entity": {"value": "x"}, "relationship": "MENTIONED_IN", "target_id": "m1"}
+
+    counts = await agent.create_relationships(LinkingResult(linked=[link("e1"), unlinked], to_create=[], skipped=[]), "m1")
+
+    assert counts["linked"] == 1
+    assert [params["rows"] for _, params in driver.queries] == [[{"entityId": "e1"}]]
+
+
+async def test_nothing_to_write_opens_no_session():
+    agent, driver = make_agent()
+
+    counts = await agent.create_relationships(LinkingResult(linked=[], to_create=[], skipped=[]), "m1")
+
+    assert counts == {"linked": 0, "created": 0, "merged": 0, "skipped": 0}
+    assert driver.sessions == []
+
+
+async def test_invalid_relationship_type_is_rejected_before_writing():
+    agent, driver = make_agent()
+    result = LinkingResult(linked=[link("e1", "MENTIONED_IN]->(x) DETACH DELETE x //")], to_create=[], skipped=[])
+
+    with pytest.raises(ValueError):
+        await agent.create_relationships(result, "m1")
+    assert driver.queries == []
+
+
+async def test_without_driver_returns_error():
+    counts = await LinkingAgent().create_relationships(LinkingResult(linked=[link("e1")], to_create=[], skipped=[]), "m1")
+
+    assert counts == {"error": "Neo4j driver not configured"}
+
+
+def create(entity, label, relationship):
+    return {"entity": entity, "suggested_label": label, "relationship": relationship}
+
+
+async def test_extracted_items_are_merged_on_title_and_meeting():
+    agent, driver = make_agent(batch_size=10)
+    task = {"type": "task", "value": " Enviar proposta ", "deadline": "2024-06-01", "assignee": "Ana", "confidence": 0.0}
+    result = LinkingResult(linked=[], to_create=[create(task, "Task", "EXTRACTED_FROM")], skipped=[])
+
+    counts = await agent.create_relationships(result, "m1")
+
+    assert counts["created"] == 1
+    [(query, params)] = driver.queries
+    assert "MERGE (n:`Task` {title: row.title, sourceRef: row.sourceRef})" in query
+    assert "MERGE (n)-[:`EXTRACTED_FROM`]->(m)" in query
+    [row] = params["rows"]
+    assert (row["title"], row["sourceRef"]) == ("Enviar proposta", "meeting:m1")
+    assert row["props"] == {
+        "description": "",
+        "confidence": 0.0,
+        "sourceRef": "meeting:m1",
+        "assignee": "Ana",
+        "dueDate": "2024-06-01",
+        "status": "pending",
+    }
+
+
+async def test_mentioned_entities_are_merged_on_name_with_default_confidence():
+    agent, driver = make_agent(batch_size=10)
+    entity = {"type": "mentionedEntity", "value": "Notion", "context": "ferramenta de notas"}
+    result = LinkingResult(linked=[], to_create=[create(entity, "Tool", "MENTIONED_IN")], skipped=[])
+
+    await agent.create_relationships(result, "m1")
+
+    [(query, params)] = driver.queries
+    assert "MERGE (n:`Tool` {name: row.name})" in query
+    [row] = params["rows"]
+    assert row["name"] == "Notion"
+    assert row["props"]["confidence"] == 0.8
+    assert row["props"]["description"] == "ferramenta de notas"
+
+
+async def test_items_without_value_are_skipped():
+    agent, driver = make_agent()
+    result = LinkingResult(linked=[], to_create=[create({"value": "  "}, "Tool", "MENTIONED_IN")], skipped=[])
+
+    counts = await agent.create_relationships(result, "m1")
+
+    assert counts["skipped"] == 1
+    assert driver.queries == []
+
+
+async def test_rerun_merges_existing_nodes_instead_of_creating():
+    agent, driver = make_agent(batch_size=2)
+    items = [create({"value": name}, "Concept", "MENTIONED_IN") for name in ("A", "B", "C")]
+
+    first = await agent.create_relationships(LinkingResult(linked=[], to_create=items, skipped=[]), "m1")
+    items.append(create({"value": "D"}, "Concept", "MENTIONED_IN"))
+    second = await agent.create_relationships(LinkingResult(linked=[], to_create=items, skipped=[]), "m1")
+
+    assert (first["created"], first["merged"]) == (3, 0)
+    assert (second["created"], second["merged"]) == (1, 3)
+
+
+async def test_retried_transaction_does_not_double_count():
+    # Tentativa repetida após erro transitório: a anterior sofreu rollback, nada persiste
+    driver = FakeDriver(lambda query, parameters: [{"linked": 1, "total": len(parameters["rows"]), "created": len(parameters["rows"])}], replays=1)
+    items = [create({"value": name}, "Concept", "MENTIONED_IN") for name in ("A", "B")]
+
+    counts = await LinkingAgent(driver).create_relationships(LinkingResult(linked=[link("e1")], to_create=items, skipped=[]), "m1")
+
+    assert (counts["linked"], counts["created"], counts["merged"]) == (1, 2, 0)
+    assert len(driver.queries) == 4
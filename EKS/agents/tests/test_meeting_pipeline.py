@@ -0,0 +1,127 @@
+"""Testes do MeetingIngestionPipeline (índice em memória, escrita num driver Neo4j falso)"""
+import asyncio
+
+from src.pipelines.ingestion.entity_index import GraphNode
+from src.pipelines.ingestion.entity_index_service import EntityIndexService
+from src.pipelines.ingestion.entity_matching_agent import EntityMatchingAgent
+from src.pipelines.ingestion.linking_agent import LinkingAgent
+from src.pipelines.ingestion.meeting_pipeline import MeetingIngestionPipeline
+from src.pipelines.ingestion.ner_agent import NERAgent
+from tests.fake_neo4j import FakeDriver
+
+NODES = [
+    GraphNode(id="1", label="Tool", name="Notion"),
+    GraphNode(id="2", label="Organization", name="Montreal Ventures"),
+]
+
+
+def written_rows(query, parameters):
+    rows = parameters["rows"]
+    return [{"linked": len(rows), "total": len(rows), "created": len(rows)}]
+
+
+def make_pipeline(linking_agent=None, **options) -> MeetingIngestionPipeline:
+    service = EntityIndexService()
+    service.set_nodes(NODES)
+    service.loaded = True
+    return MeetingIngestionPipeline(
+        NERAgent(index_service=service),
+        EntityMatchingAgent(index_service=service),
+        linking_agent or LinkingAgent(FakeDriver(written_rows)),
+        **options
+    )
+
+
+def mentioned(value, entity_type="tool"):
+    return {"type": "mentionedEntity", "value": value, "entityType": entity_type}
+
+
+async def test_each_chunk_is_linked_and_written_separately():
+    driver = FakeDriver(written_rows)
+    pipeline = make_pipeline(LinkingAgent(driver), chunk_size=2)
+    entities = [
+        mentioned("Notion"),
+        mentioned("Notiom"),
+        mentioned("Airtable"),
+        {"type": "unknown", "value": "?"},
+        {"type": "task", "value": "Enviar proposta"},
+    ]
+
+    result = await pipeline.run("m1", entities)
+
+    # Um session/execute_write por chunk
+    assert len(driver.sessions) == 3
+    assert [item["entity"]["value"] for item in result.linked] == ["Notion"]
+    assert result.linked[0]["entity"]["linkedNodeId"] == "1"
+    assert [item["entity"]["value"] for item in result.to_create] == ["Airtable", "Enviar proposta"]
+    assert [item["entity"]["value"] for item in result.review] == ["Notiom"]
+    assert result.counts == {"linked": 1, "created": 2, "merged": 0, "skipped": 1}
+
+
+async def test_dry_run_does_not_write():
+    driver = FakeDriver(written_rows)
+    pipeline = make_pipeline(LinkingAgent(driver))
+
+    result = await pipeline.run("m1", [mentioned("Notion")], write=False)
+
+    assert driver.sessions == []
+    assert result.counts == {}
+    assert len(result.linked) == 1
+
+
+async def test_transcript_mentions_missing_from_entities_are_linked():
+    pipeline = make_pipeline()
+
+    notion = {**mentioned("Notion"), "linkedNodeId": "1"}
+
+    result = await pipeline.run("m1", [notion], transcript="Usamos o Notion com a Montreal Ventures.")
+
+    assert sorted(item["entity"]["linkedNodeId"] for item in result.linked) == ["1", "2"]
+    assert result.counts["linked"] == 2
+
+
+class GatedLinkingAgent(LinkingAgent):
+    """Conta os chunks vinculados; a escrita só termina quando o gate abre"""
+
+    def __init__(self):
+        super().__init__(FakeDriver(written_rows))
+        self.gate = asyncio.Event()
+        self.linked_chunks = 0
+
+    async def link_entities(self, entities, meeting_id):
+        self.linked_chunks += 1
+        return await super().link_entities(entities, meeting_id)
+
+    async def create_relationships(self, linking_result, meeting_id):
+        await self.gate.wait()
+        return await super().create_relationships(linking_result, meeting_id)
+
+
+async def test_bounded_queue_holds_matching_back_while_writes_are_slow():
+    linking = GatedLinkingAgent()
+    pipeline = make_pipeline(linking, chunk_size=1, queue_size=1)
+    progress = []
+
+    run = asyncio.create_task(pipeline.run(
+        "m1", [mentioned("Notion")] * 6, on_progress=lambda stage, value: progress.append((stage, value))
+    ))
+    try:
+        # O matching roda numa thread: espera o produtor parar na fila cheia
+        for _ in range(200):
+            if linking.linked_chunks == 3:
+                break
+            await asyncio.sleep(0.005)
+        await asyncio.sleep(0.05)
+
+        # 1 chunk em escrita, 1 na fila e 1 esperando vaga: o resto não é pontuado
+        assert linking.linked_chunks == 3
+        assert not run.done()
+    finally:
+        linking.gate.set()
+        result = await run
+
+    assert linking.linked_chunks == 6
+    assert result.counts["linked"] == 6
+    values = [value for _, value in progress]
+    assert values == sorted(values)
+    assert progress[-1] == ("done", 1.0)
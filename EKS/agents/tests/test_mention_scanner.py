@@ -0,0 +1,114 @@
+"""Testes da busca de menções na transcrição (autômato Aho–Corasick)"""
+import random
+from typing import Dict, List, Optional, Tuple
+
+from src.pipelines.ingestion.entity_index import EntityIndex, GraphNode, normalize_text
+from src.pipelines.ingestion.mention_scanner import (
+    MIN_MENTION_LENGTH,
+    MentionScanner,
+    normalize_with_offsets,
+)
+
+WORDS = ["são", "paulo", "quinto", "andar", "notion", "jira", "ana", "go", "ai", "time", "de", "dados"]
+
+
+def brute_force(
+    nodes: List[GraphNode],
+    text: str,
+    labels: Optional[List[str]] = None
+) -> List[Tuple[int, bool, str]]:
+    """Referência: testa cada sequência de palavras contra o dicionário (mais longa primeiro)"""
+    dictionary: Dict[str, Tuple[int, bool]] = {}
+    # Nome canônico vence alias: os nomes entram todos antes
+    for is_alias in (False, True):
+        for position, node in enumerate(nodes):
+            if labels and node.label not in labels:
+                continue
+            for raw in (node.aliases if is_alias else [node.name]):
+                normalized = normalize_text(raw)
+                if len(normalized) < MIN_MENTION_LENGTH or normalized in dictionary:
+                    continue
+                dictionary[normalized] = (position, is_alias)
+    words = normalize_with_offsets(text)[0].split()
+    found = []
+    i = 0
+    while i < len(words):
+        for length in range(len(words) - i, 0, -1):
+            candidate = " ".join(words[i:i + length])
+            if candidate in dictionary:
+                found.append((*dictionary[candidate], candidate))
+                i += length
+                break
+        else:
+            i += 1
+    return found
+
+
+def scanned(scanner: MentionScanner, text: str) -> List[Tuple[int, bool, str]]:
+    return [(m.position, m.is_alias, normalize_text(m.text)) for m in scanner.scan(text)]
+
+
+def test_normalize_with_offsets_maps_to_original_text():
+    text = "  Reunião no 5º-andar, com   JOÃO!"
+    normalized, offsets = normalize_with_offsets(text)
+
+    assert normalized == normalize_text(text)
+    assert len(offsets) == len(normalized)
+    for char, offset in zip(normalized, offsets):
+        if char != " ":
+            assert normalize_text(text[offset]) == char
+
+
+def test_scan_returns_original_offsets():
+    index = EntityIndex.build([
+        GraphNode(id="1", label="Location", name="Quinto Andar"),
+        GraphNode(id="2", label="Location", name="Andar"),
+        GraphNode(id="3", label="Tool", name="Notion", aliases=["Notion App"]),
+    ])
+    text = "Subimos ao QUINTO andar e abrimos o notion  APP."
+    mentions = MentionScanner(index).scan(text)
+
+    assert [(m.position, m.text, m.is_alias) for m in mentions] == [
+        (0, "QUINTO andar", False),
+        (2, "notion  APP", True),
+    ]
+    for mention in mentions:
+        assert text[mention.start:mention.end] == mention.text
+
+
+def test_short_texts_are_ignored():
+    index = EntityIndex.build([GraphNode(id="1", label="Tool", name="AI", aliases=["Go"])])
+    assert MentionScanner(index).scan("AI e Go") == []
+
+
+def test_labels_restrict_the_dictionary():
+    index = EntityIndex.build([
+        GraphNode(id="1", label="Person", name="Ana"),
+        GraphNode(id="2", label="Tool", name="Jira"),
+    ])
+    mentions = MentionScanner(index, labels=["Tool"]).scan("Ana abriu o Jira")
+    assert [m.position for m in mentions] == [1]
+
+
+def test_matches_brute_force_on_random_transcripts():
+    rng = random.Random(5)
+    for _ in range(40):
+        nodes = []
+        for i in range(rng.randint(1, 15)):
+            name = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+            aliases = [
+                " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 2)))
+                for _ in range(rng.randint(0, 2))
+            ]
+            label = rng.choice(["Person", "Tool", "Location"])
+            nodes.append(GraphNode(id=str(i), label=label, name=name.title(), aliases=aliases))
+        index = EntityIndex.build(nodes)
+        scanners = [(None, MentionScanner(index)), (["Tool"], MentionScanner(index, labels=["Tool"]))]
+
+        for _ in range(20):
+            text = " ".join(
+                rng.choice(WORDS).upper() if rng.random() < 0.2 else rng.choice(WORDS)
+                for _ in range(rng.randint(0, 30))
+            ) + rng.choice(["", ".", "!", " ?"])
+            for labels, scanner in scanners:
+                assert scanned(scanner, text) == brute_force(nodes, text, labels), text
@@ -0,0 +1,168 @@
+"""Tests for Neo4jClient and bulk_write against an in-memory fake driver"""
+import importlib
+from contextlib import aclosing
+
+import pytest
+
+from src.utils.neo4j_client import Neo4jClient, PinnedDriver, bulk_write
+from tests.fake_neo4j import FakeDriver, FakeResult
+
+# src.utils re-exports the neo4j_client instance under the module's name
+client_module = importlib.import_module("src.utils.neo4j_client")
+
+
+def connect_with(monkeypatch, database: str) -> FakeDriver:
+    driver = FakeDriver()
+    monkeypatch.setattr(client_module.AsyncGraphDatabase, "driver", lambda *args, **kwargs: driver)
+    monkeypatch.setattr(client_module.settings, "neo4j_database", database)
+    return driver
+
+
+async def test_connect_verifies_home_database_when_none_configured(monkeypatch):
+    driver = connect_with(monkeypatch, "")
+    client = Neo4jClient()
+
+    await client.connect()
+
+    assert driver.verified == [{}]
+    assert "database" not in client.driver.session_defaults
+
+
+async def test_connect_pins_configured_database(monkeypatch):
+    driver = connect_with(monkeypatch, "knowledge")
+    client = Neo4jClient()
+
+    await client.connect()
+    async with client.driver.session():
+        pass
+
+    assert driver.verified == [{"database": "knowledge"}]
+    assert driver.sessions[0].config["database"] == "knowledge"
+
+
+def streaming_client(count: int) -> tuple:
+    driver = FakeDriver(lambda query, parameters: [{"n": n} for n in range(count)])
+    client = Neo4jClient()
+    client.driver = PinnedDriver(driver, fetch_size=1000)
+    return client, driver
+
+
+async def test_stream_query_yields_records_and_closes_session():
+    client, driver = streaming_client(3)
+
+    records = [record async for record in client.stream_query("MATCH (n) RETURN n", fetch_size=2)]
+
+    assert records == [{"n": 0}, {"n": 1}, {"n": 2}]
+    [session] = driver.sessions
+    assert session.config["fetch_size"] == 2
+    assert session.closed
+
+
+async def test_leaving_stream_query_early_closes_session():
+    client, driver = streaming_client(10)
+
+    async with aclosing(client.stream_query("MATCH (n) RETURN n")) as records:
+        async for record in records:
+            if record["n"] == 1:
+                break
+
+    assert driver.sessions[0].closed
+
+
+async def test_leaving_stream_query_batches_early_closes_session():
+    client, driver = streaming_client(10)
+
+    async with aclosing(client.stream_query_batches("MATCH (n) RETURN n", batch_size=4)) as batches:
+        async for batch in batches:
+            assert batch == [{"n": n} for n in range(4)]
+            break
+
+    assert driver.sessions[0].closed
+
+
+async def test_stream_query_batches_keeps_the_last_partial_batch():
+    client, driver = streaming_client(5)
+
+    batches = [batch async for batch in client.stream_query_batches("MATCH (n) RETURN n", batch_size=2)]
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert driver.sessions[0].config["fetch_size"] == 2
+
+
+UPSERT = "UNWIND $rows AS row MERGE (n:Tool {name: row.name})"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Backoff delays requested by bulk_write (without waiting)"""
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(client_module.asyncio, "sleep", sleep)
+    return delays
+
+
+def rows(count: int):
+    return ({"name": f"tool-{i}"} for i in range(count))
+
+
+async def test_bulk_write_batches_rows_and_sums_counters():
+    driver = FakeDriver(lambda query, parameters: FakeResult(
+        [], counters={"nodes_created": len(parameters["rows"]), "properties_set": 2 * len(parameters["rows"])}
+    ))
+
+    stats = await bulk_write(driver, UPSERT, rows(7), batch_size=3, concurrency=2, parameters={"source": "test"})
+
+    assert sorted(len(params["rows"]) for _, params in driver.queries) == [1, 3, 3]
+    assert all(params["source"] == "test" for _, params in driver.queries)
+    assert (stats["rows"], stats["batches"], stats["failed_rows"], stats["failed_batches"]) == (7, 3, 0, 0)
+    assert stats["counters"]["nodes_created"] == 7
+    assert stats["counters"]["properties_set"] == 14
+    assert stats["counters"]["relationships_created"] == 0
+
+
+async def test_bulk_write_retries_a_failed_batch_with_backoff(sleeps):
+    failures = iter([True, True, False])
+
+    def flaky(query, parameters):
+        if next(failures):
+            raise RuntimeError("deadlock")
+        return FakeResult([], counters={"nodes_created": len(parameters["rows"])})
+
+    stats = await bulk_write(FakeDriver(flaky), UPSERT, rows(2), batch_size=5, max_batch_retries=2)
+
+    assert sleeps == [0.5, 1.0]
+    assert (stats["rows"], stats["retried_batches"], stats["failed_batches"]) == (2, 2, 0)
+    assert stats["errors"] == []
+
+
+async def test_bulk_write_reports_batches_that_keep_failing(sleeps):
+    def fails_on_bad_rows(query, parameters):
+        if any(row["name"] == "tool-4" for row in parameters["rows"]):
+            raise RuntimeError("constraint violated")
+        return []
+
+    stats = await bulk_write(
+        FakeDriver(fails_on_bad_rows), UPSERT, rows(6), batch_size=2, concurrency=1, max_batch_retries=1
+    )
+
+    # Only the batch holding tool-4 fails; the others are written
+    assert (stats["rows"], stats["batches"]) == (4, 2)
+    assert (stats["failed_rows"], stats["failed_batches"], stats["retried_batches"]) == (2, 1, 1)
+    assert stats["errors"] == ["constraint violated"]
+    assert sleeps == [0.5]
+
+
+async def test_bulk_write_requires_the_rows_parameter():
+    driver = FakeDriver()
+
+    with pytest.raises(ValueError):
+        await bulk_write(driver, "MERGE (n:Tool {name: $name})", rows(1))
+    assert driver.sessions == []
+
+
+async def test_client_bulk_write_needs_a_connection():
+    with pytest.raises(RuntimeError):
+        await Neo4jClient().bulk_write(UPSERT, rows(1))
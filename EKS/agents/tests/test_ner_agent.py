@@ -0,0 +1,110 @@
+"""Testes do NERAgent com o scan de menções (índice em memória, sem Neo4j)"""
+import threading
+
+from src.pipelines.ingestion.entity_index import GraphNode
+from src.pipelines.ingestion.entity_index_service import EntityIndexService
+from src.pipelines.ingestion.mention_scanner import MentionScanner
+from src.pipelines.ingestion.ner_agent import MentionedEntity, NERAgent
+
+NODES = [
+    GraphNode(id="1", label="Tool", name="Notion", aliases=["Notion App"]),
+    GraphNode(id="2", label="Organization", name="Montreal Ventures", aliases=["MV Capital"]),
+    GraphNode(id="3", label="Person", name="Ana Souza"),
+]
+
+
+def make_agent() -> NERAgent:
+    service = EntityIndexService()
+    service.set_nodes(NODES)
+    return NERAgent(index_service=service)
+
+
+def test_scan_mentions_groups_by_node_with_offsets():
+    transcript = "Falei com a Ana Souza sobre o Notion. Depois o notion app travou e a MV Capital ligou."
+    mentions = make_agent().scan_mentions(transcript)
+
+    # Person não está nos NER_LABELS
+    assert [(m.graph_entity.id, m.entity.mentions) for m in mentions] == [("1", 2), ("2", 1)]
+    notion = mentions[0]
+    assert [transcript[s:e] for s, e in notion.offsets] == ["Notion", "notion app"]
+    assert notion.entity.confidence == 1.0
+    assert mentions[1].entity.confidence == 0.95
+    assert mentions[1].entity.entity_type == "organization"
+
+
+class ReloadingService(EntityIndexService):
+    """Publica outro índice logo depois de uma leitura (carga completa concorrente)"""
+
+    reload_with = None
+
+    @property
+    def index(self):
+        current = self._current
+        if self.reload_with is not None:
+            nodes, self.reload_with = self.reload_with, None
+            self.set_nodes(nodes)
+        return current
+
+    @index.setter
+    def index(self, index):
+        self._current = index
+
+
+def test_scan_resolves_nodes_in_the_index_the_scanner_was_built_from():
+    service = ReloadingService()
+    service.set_nodes(NODES)
+    agent = NERAgent(index_service=service)
+
+    service.reload_with = [GraphNode(id="9", label="Tool", name="Slack")]
+    mentions = agent.scan_mentions("O Notion e a Montreal Ventures")
+
+    assert [m.graph_entity.id for m in mentions] == ["1", "2"]
+
+
+def test_scanner_is_rebuilt_only_when_the_index_changes():
+    agent = make_agent()
+    scanner = agent.mention_scanner
+
+    assert agent.mention_scanner is scanner
+    agent.index_service.set_nodes(NODES[:1])
+    assert agent.mention_scanner is not scanner
+    assert agent.mention_scanner.index is agent.index_service.index
+
+
+def test_scanner_is_built_once_under_concurrent_threads(monkeypatch):
+    agent = make_agent()
+    built = []
+    init = MentionScanner.__init__
+
+    def counting(scanner, *args, **kwargs):
+        built.append(1)
+        init(scanner, *args, **kwargs)
+
+    monkeypatch.setattr(MentionScanner, "__init__", counting)
+    threads = [threading.Thread(target=agent.scan_mentions, args=("Notion",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(built) == 1
+
+
+async def test_process_links_llm_entities_and_adds_scanned_mentions():
+    agent = make_agent()
+    transcript = "Usamos o Notion todo dia; notion app no celular. A MV Capital investiu."
+    result = await agent.process(
+        [
+            MentionedEntity(value="Notion", entity_type="tool", description="", mentions=1),
+            MentionedEntity(value="Figma", entity_type="tool", description="", mentions=1),
+        ],
+        transcript=transcript
+    )
+
+    by_type = {link['match_type']: link for link in result.linked_entities}
+    assert by_type['exact']['graph_entity']['id'] == "1"
+    # A contagem do scan substitui a do LLM
+    assert by_type['exact']['mentioned']['mentions'] == 2
+    assert by_type['mention']['graph_entity']['id'] == "2"
+    assert [e.value for e in result.unlinked_entities] == ["Figma"]
+    assert [e.value for e in result.entities] == ["Notion", "Figma", "MV Capital"]
@@ -0,0 +1,54 @@
+"""Testes do índice de trigramas (geração de candidatos)"""
+import random
+
+from src.pipelines.ingestion.edit_distance import bounded_levenshtein
+from src.pipelines.ingestion.ngram_index import NGRAM_SIZE, NGramIndex, ngrams
+
+
+def test_ngrams_are_padded():
+    assert ngrams("ab") == {"$$a", "$ab", "ab$", "b$$"}
+    assert ngrams("") == set()
+    assert all(len(gram) == NGRAM_SIZE for gram in ngrams("notion"))
+
+
+def test_candidates_share_a_trigram():
+    index = NGramIndex()
+    index.add(0, ["notion"])
+    index.add(1, ["jira", "atlassian jira"])
+    index.add(2, ["slack"])
+
+    assert index.candidates("notiom") == {0}
+    assert index.candidates("jira") == {1}
+    assert index.candidates("xyz") == set()
+
+
+def test_remove_drops_empty_postings():
+    index = NGramIndex()
+    index.add(0, ["notion"])
+    index.add(1, ["notion app"])
+    index.remove(0, ["notion"])
+
+    assert index.candidates("notion") == {1}
+    index.remove(1, ["notion app"])
+    assert len(index) == 0
+
+
+def test_no_fuzzy_match_above_two_thirds_is_lost():
+    """Lema de q-gramas: similaridade >= 2/3 implica pelo menos um trigrama em comum"""
+    rng = random.Random(11)
+    texts = [
+        "".join(rng.choice("abcde ") for _ in range(rng.randint(1, 12))).strip() or "a"
+        for _ in range(300)
+    ]
+    index = NGramIndex()
+    for key, text in enumerate(texts):
+        index.add(key, [text])
+
+    for _ in range(300):
+        term = "".join(rng.choice("abcde") for _ in range(rng.randint(1, 10)))
+        candidates = index.candidates(term)
+        for key, text in enumerate(texts):
+            max_len = max(len(term), len(text))
+            distance = bounded_levenshtein(term, text, max_len)
+            if 1 - distance / max_len >= 2 / 3:
+                assert key in candidates, (term, text)
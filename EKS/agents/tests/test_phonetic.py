@@ -0,0 +1,27 @@
+"""Testes da chave fonética para português"""
+import pytest
+
+from src.pipelines.ingestion.entity_index import normalize_text
+from src.pipelines.ingestion.phonetic import phonetic_key
+
+
+@pytest.mark.parametrize("spoken, written", [
+    ("Xikinho", "Chiquinho"),
+    ("Kinto Andar", "Quinto Andar"),
+    ("Chavier", "Xavier"),
+    ("Rycardo", "Ricardo"),
+])
+def test_spellings_that_sound_alike_share_a_key(spoken, written):
+    key = phonetic_key(normalize_text(spoken))
+    assert key
+    assert key == phonetic_key(normalize_text(written))
+
+
+def test_different_names_have_different_keys():
+    assert phonetic_key("notion") != phonetic_key("nation app")
+    assert phonetic_key("wagner") != phonetic_key("vagner")
+
+
+def test_short_keys_are_discarded():
+    assert phonetic_key("luis") == ""
+    assert phonetic_key("") == ""
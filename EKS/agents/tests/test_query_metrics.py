@@ -0,0 +1,93 @@
+"""Tests for per-query metrics and their Prometheus rendering"""
+import importlib
+import logging
+from types import SimpleNamespace
+
+from src.utils.neo4j_client import PinnedDriver
+from src.utils.query_metrics import QueryMetrics, fingerprint, normalize_statement, parameter_shapes
+from tests.fake_neo4j import FakeDriver
+
+client_module = importlib.import_module("src.utils.neo4j_client")
+
+
+def test_literals_and_whitespace_share_a_fingerprint():
+    first = "MATCH (n:Tool {name: 'Notion'})\n  WHERE n.score > 0.5 RETURN n LIMIT 10"
+    second = 'MATCH (n:Tool {name: "Jira"}) WHERE n.score > 2 RETURN n LIMIT 3'
+
+    assert normalize_statement(first) == "MATCH (n:Tool {name: ?}) WHERE n.score > ? RETURN n LIMIT ?"
+    assert fingerprint(first) == fingerprint(second)
+    assert fingerprint(first) != fingerprint("MATCH (n:Person) RETURN n")
+
+
+def test_parameter_shapes_hide_values():
+    shapes = parameter_shapes({"name": "secret", "rows": [{"id": 1, "tags": ["a"]}], "limit": 5})
+
+    assert shapes == {"name": "str[6]", "rows": "list[1] of map[2]", "limit": "int"}
+
+
+def test_render_prometheus_exposes_counters_and_quantiles():
+    metrics = QueryMetrics()
+    summary = SimpleNamespace(result_available_after=3, result_consumed_after=7)
+    for seconds in (0.1, 0.2, 0.3, 0.4):
+        metrics.observe("MATCH (n) RETURN n", seconds, rows=2, summary=summary)
+    metrics.observe("MATCH (n) RETURN n", 0.5, error=True)
+
+    key = fingerprint("MATCH (n) RETURN n")
+    labels = f'fingerprint="{key}",statement="MATCH (n) RETURN n"'
+    lines = metrics.render_prometheus().splitlines()
+
+    assert "# TYPE neo4j_query_total counter" in lines
+    assert "# TYPE neo4j_query_seconds summary" in lines
+    assert f"neo4j_query_total{{{labels}}} 5" in lines
+    assert f"neo4j_query_errors_total{{{labels}}} 1" in lines
+    assert f"neo4j_query_rows_total{{{labels}}} 8" in lines
+    assert f'neo4j_query_seconds{{{labels},quantile="0.5"}} 0.300000' in lines
+    assert f'neo4j_query_seconds{{{labels},quantile="0.99"}} 0.500000' in lines
+    assert f"neo4j_query_seconds_sum{{{labels}}} 1.500000" in lines
+    assert f"neo4j_query_seconds_count{{{labels}}} 5" in lines
+    assert f"neo4j_query_result_available_after_ms_total{{{labels}}} 12" in lines
+    assert f"neo4j_query_result_consumed_after_ms_total{{{labels}}} 28" in lines
+
+
+def test_label_values_are_escaped():
+    metrics = QueryMetrics()
+    metrics.observe('MATCH (n:`Say"Hi`) RETURN n', 0.1)
+    metrics.observe("MATCH (n:`C:\\Tools`) RETURN n", 0.1)
+
+    text = metrics.render_prometheus()
+
+    assert r'statement="MATCH (n:`Say\"Hi`) RETURN n"' in text
+    assert r'statement="MATCH (n:`C:\\Tools`) RETURN n"' in text
+
+
+def test_slow_queries_are_logged_with_parameter_shapes(caplog):
+    metrics = QueryMetrics(slow_query_ms=100)
+
+    with caplog.at_level(logging.WARNING, logger="src.utils.query_metrics"):
+        metrics.observe("MATCH (n) RETURN n", 0.05)
+        metrics.observe("MATCH (n {name: $name}) RETURN n", 0.25, rows=1, parameters={"name": "secret"})
+
+    [record] = caplog.records
+    assert "250ms" in record.getMessage()
+    assert "{'name': 'str[6]'}" in record.getMessage()
+    assert "secret" not in record.getMessage()
+
+
+async def test_pinned_driver_sessions_record_queries(monkeypatch):
+    metrics = QueryMetrics()
+    monkeypatch.setattr(client_module, "query_metrics", metrics)
+    driver = PinnedDriver(FakeDriver(lambda query, parameters: [{"n": 1}, {"n": 2}]))
+
+    async def read(tx):
+        result = await tx.run("MATCH (n) RETURN n LIMIT 2")
+        return await result.data()
+
+    async with driver.session() as session:
+        await session.execute_read(read)
+        await session.run("MATCH (n) RETURN count(n)")
+
+    stats = metrics.snapshot()
+    assert stats[fingerprint("MATCH (n) RETURN n LIMIT 2")]["rows"] == 2
+    assert stats[fingerprint("MATCH (n) RETURN n LIMIT 2")]["result_consumed_after_ms"] == 2
+    # Never consumed: recorded when the session closes
+    assert stats[fingerprint("MATCH (n) RETURN count(n)")]["count"] == 1
@@ -0,0 +1,138 @@
+"""Tests for the async read-through TTL cache"""
+import asyncio
+
+import pytest
+
+from src.utils.ttl_cache import AsyncTTLCache
+
+
+class Loader:
+    """Counts calls and blocks until released"""
+
+    def __init__(self, value="ctx"):
+        self.value = value
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        return f"{self.value}-{self.calls}"
+
+
+async def test_hit_after_load():
+    cache = AsyncTTLCache(ttl_seconds=60)
+    loader = Loader()
+    loader.release.set()
+
+    assert await cache.get("u1", loader) == "ctx-1"
+    assert await cache.get("u1", loader) == "ctx-1"
+    assert loader.calls == 1
+    assert cache.stats()["hits"] == 1
+
+
+async def test_concurrent_misses_share_one_load():
+    cache = AsyncTTLCache(ttl_seconds=60)
+    loader = Loader()
+
+    waiters = [asyncio.create_task(cache.get("u1", loader)) for _ in range(5)]
+    await asyncio.sleep(0)
+    loader.release.set()
+
+    assert await asyncio.gather(*waiters) == ["ctx-1"] * 5
+    assert loader.calls == 1
+
+
+async def test_cancelled_caller_does_not_cancel_shared_load():
+    cache = AsyncTTLCache(ttl_seconds=60)
+    loader = Loader()
+
+    first = asyncio.create_task(cache.get("u1", loader))
+    second = asyncio.create_task(cache.get("u1", loader))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    loader.release.set()
+
+    assert await second == "ctx-1"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert await cache.get("u1", loader) == "ctx-1"
+    assert loader.calls == 1
+
+
+async def test_invalidate_drops_cached_value():
+    cache = AsyncTTLCache(ttl_seconds=60)
+    loader = Loader()
+    loader.release.set()
+
+    await cache.get("u1", loader)
+    assert cache.invalidate("u1") is True
+    assert cache.invalidate("u1") is False
+    assert await cache.get("u1", loader) == "ctx-2"
+
+
+async def test_invalidate_during_load_discards_its_result():
+    cache = AsyncTTLCache(ttl_seconds=60)
+    loader = Loader()
+
+    stale = asyncio.create_task(cache.get("u1", loader))
+    await asyncio.sleep(0)
+    cache.invalidate("u1")
+    loader.release.set()
+
+    # The caller that started the load still gets it, but it is not stored
+    assert await stale == "ctx-1"
+    assert await cache.get("u1", loader) == "ctx-2"
+    assert await cache.get("u1", loader) == "ctx-2"
+
+
+async def test_errors_and_none_are_not_cached():
+    cache = AsyncTTLCache(ttl_seconds=60)
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        raise RuntimeError("neo4j down")
+
+    async def missing():
+        return None
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            await cache.get("u1", failing)
+    assert calls == 2
+    assert await cache.get("u2", missing) is None
+    assert cache.stats()["size"] == 0
+
+
+async def test_least_recently_used_entry_is_evicted():
+    cache = AsyncTTLCache(ttl_seconds=60, max_entries=2)
+
+    async def load_a():
+        return "a"
+
+    async def load_b():
+        return "b"
+
+    async def load_c():
+        return "c"
+
+    await cache.get("a", load_a)
+    await cache.get("b", load_b)
+    await cache.get("a", load_a)
+    await cache.get("c", load_c)
+
+    assert cache.stats()["evictions"] == 1
+    assert await cache.get("a", load_c) == "a"
+    assert await cache.get("b", load_c) == "c"
+
+
+async def test_disabled_cache_always_loads():
+    cache = AsyncTTLCache(ttl_seconds=0)
+    loader = Loader()
+    loader.release.set()
+
+    assert await cache.get("u1", loader) == "ctx-1"
+    assert await cache.get("u1", loader) == "ctx-2"
@@ -0,0 +1,68 @@
+"""Testes do índice de deleções simétricas"""
+import random
+
+from src.pipelines.ingestion.edit_distance import bounded_levenshtein
+from src.pipelines.ingestion.typo_index import (
+    DeletionIndex,
+    deletes,
+    typo_coverage,
+    typo_distance_for,
+)
+
+
+def test_deletes_includes_text_and_variants():
+    assert deletes("abc", 1) == {"abc", "bc", "ac", "ab"}
+    assert deletes("ab", 3) == {"ab", "a", "b", ""}
+
+
+def test_lookup_finds_typos():
+    index = DeletionIndex(max_distance=2, max_length=16)
+    index.add(["notion", "slack", "jira"])
+
+    assert "notion" in index.lookup("notiom", 1)
+    assert "slack" in index.lookup("slak", 1)
+    assert index.lookup("confluence", 2) == set()
+
+
+def test_lookup_is_superset_of_matches_within_distance():
+    rng = random.Random(3)
+    texts = {"".join(rng.choice("abcd") for _ in range(rng.randint(1, 8))) for _ in range(200)}
+    index = DeletionIndex(max_distance=2, max_length=16)
+    index.add(texts)
+
+    for _ in range(300):
+        term = "".join(rng.choice("abcd") for _ in range(rng.randint(1, 8)))
+        for distance in (1, 2):
+            found = index.lookup(term, distance)
+            expected = {t for t in texts if bounded_levenshtein(term, t, distance) <= distance}
+            assert expected <= found, (term, distance)
+
+
+def test_long_texts_are_not_indexed():
+    index = DeletionIndex(max_distance=1, max_length=5)
+    index.add(["abcdef"])
+    assert index.refs == {}
+    assert index.postings == {}
+
+
+def test_remove_keeps_text_shared_by_other_nodes():
+    index = DeletionIndex(max_distance=1, max_length=16)
+    index.add(["notion"])
+    index.add(["notion"])
+
+    index.remove(["notion"])
+    assert index.lookup("notiom", 1) == {"notion"}
+    index.remove(["notion"])
+    assert index.lookup("notiom", 1) == set()
+    assert index.postings == {}
+
+
+def test_typo_coverage_stays_within_max_distance():
+    for threshold in (0.6, 0.7, 0.8, 0.9):
+        max_term, max_target = typo_coverage(threshold, 2)
+        assert max_term > 0
+        for term_length in range(1, max_term + 1):
+            distance, max_length = typo_distance_for(threshold, term_length)
+            assert distance <= 2
+            assert max_length <= max_target
+    assert typo_coverage(0.7, 0) == (0, 0)
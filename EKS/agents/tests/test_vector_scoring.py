@@ -0,0 +1,70 @@
+"""Testes do score fuzzy em lote (NumPy) contra o caminho escalar"""
+import random
+
+import pytest
+
+from src.pipelines.ingestion.entity_matching_agent import EntityMatchingAgent
+from src.pipelines.ingestion.vector_scoring import HAS_NUMPY, batch_fuzzy_scores
+
+
+def scalar_scores(term, targets, threshold):
+    agent = EntityMatchingAgent(fuzzy_threshold=threshold)
+    return {target: agent._fuzzy_within_threshold(term, target) for target in targets}
+
+
+def test_numpy_is_available():
+    assert HAS_NUMPY
+
+
+@pytest.mark.parametrize("threshold", [0.5, 0.6, 0.7, 0.75, 0.8, 0.9, 1.0])
+def test_matches_scalar_scores_on_random_inputs(threshold):
+    rng = random.Random(int(threshold * 100))
+    alphabet = "abcde ção"
+    for _ in range(200):
+        term = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        targets = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 14))) for _ in range(30)]
+        targets.append(term)
+
+        assert batch_fuzzy_scores(term, targets, threshold) == scalar_scores(term, targets, threshold)
+
+
+def test_threshold_edge_is_inclusive():
+    # 3 edições em 10 chars: similaridade 0.7 exatamente
+    targets = ["abcdefghij", "abcdefgxyz", "abcdefwxyz", "abcdefg"]
+    scores = batch_fuzzy_scores("abcdefghij", targets, 0.7)
+
+    assert scores == scalar_scores("abcdefghij", targets, 0.7)
+    assert scores["abcdefgxyz"] == pytest.approx(0.7)
+    assert scores["abcdefwxyz"] == 0.0
+    assert scores["abcdefg"] == pytest.approx(0.7)
+
+
+def test_empty_strings_score_zero():
+    assert batch_fuzzy_scores("", ["notion", ""], 0.7) == {"notion": 0.0, "": 0.0}
+    assert batch_fuzzy_scores("notion", ["", "notion"], 0.7) == {"": 0.0, "notion": 1.0}
+    assert batch_fuzzy_scores("notion", [], 0.7) == {}
+
+
+def test_find_matches_is_the_same_with_batched_scoring():
+    from src.pipelines.ingestion.entity_index import GraphNode
+
+    rng = random.Random(9)
+    words = ["notion", "jira", "slack", "montreal", "ventures", "dados", "time", "quinto", "andar"]
+    nodes = [
+        GraphNode(
+            id=str(i),
+            label=rng.choice(["Tool", "Organization"]),
+            name=" ".join(rng.sample(words, rng.randint(1, 3))),
+            aliases=[rng.choice(words) + rng.choice(["", "s", "x", " app"])],
+        )
+        for i in range(150)
+    ]
+    # typo_max_distance=0: termos curtos também passam pelo scoring fuzzy
+    batched = EntityMatchingAgent(vector_min_candidates=1, typo_max_distance=0)
+    scalar = EntityMatchingAgent(vector_min_candidates=0, typo_max_distance=0)
+    batched.graph_nodes = nodes
+    scalar.graph_nodes = nodes
+
+    for word in words:
+        for term in (word[:-1], word + "z", word[1:] + " " + rng.choice(words)):
+            assert batched.find_matches(term) == scalar.find_matches(term)
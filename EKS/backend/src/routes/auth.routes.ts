@@ -6,6 +6,7 @@ import { authenticate } from '../middleware/auth';
 import { neo4jConnection } from '../config/neo4j';
 import { env } from '../config/env';
 import { logger } from '../utils/logger';
+import { invalidateAgentUserContext } from '../services/agent-cache.service';
 
 const router = Router();
 
@@ -320,6 +321,7 @@ router.get('/gmail/callback', async (req: Request, res: Response) => {
     );
 
     logger.info(`Gmail connected for user: ${userId}`);
+    await invalidateAgentUserContext(userId as string);
 
     // Close window with success message
     res.send(`
@@ -7,6 +7,7 @@ import { authenticate, requireAdmin } from '../middleware/auth';
 import { neo4jConnection } from '../config/neo4j';
 import { logger } from '../utils/logger';
 import { env } from '../config/env';
+import { invalidateAgentUserContext } from '../services/agent-cache.service';
 
 const router = Router();
 
@@ -391,6 +392,11 @@ router.post('/orgchart', upload.single('file'), async (req: Request, res: Respon
           }
         }
 
+        // Name, company, job title and department feed the agent's user context
+        if (userExists) {
+          await invalidateAgentUserContext(existsResult.records[0].get('id'));
+        }
+
         result.users.push({
           email,
           name,
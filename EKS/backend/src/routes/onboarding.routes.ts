@@ -4,6 +4,7 @@ import { authenticate } from '../middleware/auth';
 import { neo4jConnection } from '../config/neo4j';
 import { logger } from '../utils/logger';
 import { generateUserMetadataInsights, generatePersonaSummary } from '../services/llm.service';
+import { invalidateAgentUserContext } from '../services/agent-cache.service';
 
 const router = Router();
 
@@ -393,6 +394,8 @@ router.post('/complete', async (req: Request, res: Response) => {
 
     logger.info(`First-Run Onboarding completed for user ${userId}: FRO=${froId}, AIProfile=${aiProfileId}, PersonaVersion=${personaVersionId}, LLM=${metadataInsights !== null}`);
 
+    await invalidateAgentUserContext(userId);
+
     res.json({
       success: true,
       data: {
@@ -550,6 +553,8 @@ router.post('/welcome-received', async (req: Request, res: Response) => {
       { userId, now }
     );
 
+    await invalidateAgentUserContext(userId);
+
     res.json({
       success: true,
       data: {
@@ -590,6 +595,8 @@ router.post('/gmail-skip', async (req: Request, res: Response) => {
       { userId, now }
     );
 
+    await invalidateAgentUserContext(userId);
+
     res.json({
       success: true,
       data: {
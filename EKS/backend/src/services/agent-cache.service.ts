@@ -0,0 +1,32 @@
+/**
+ * Agent Cache Service - Invalidation of the agent server's user context cache
+ * Called after any write to fields the Personal Agent reads (onboarding,
+ * AI profile, welcome and Gmail flags, org chart data)
+ */
+
+import { env } from '../config/env';
+import { logger } from '../utils/logger';
+
+// The agent server may be down; never hold a request on it
+const INVALIDATE_TIMEOUT_MS = 2000;
+
+/**
+ * Drop the cached user context on the agent server.
+ * Best effort: failures are logged and the cache falls back to its TTL.
+ */
+export async function invalidateAgentUserContext(userId: string): Promise<void> {
+  const url = `${env.AGENT_SERVER_URL}/user-context/${encodeURIComponent(userId)}/invalidate`;
+
+  try {
+    const response = await fetch(url, {
+      method: 'POST',
+      signal: AbortSignal.timeout(INVALIDATE_TIMEOUT_MS),
+    });
+
+    if (!response.ok) {
+      logger.warn(`Agent user context invalidation failed for ${userId}: ${response.status}`);
+    }
+  } catch (error) {
+    logger.warn(`Agent user context invalidation failed for ${userId}: ${String(error)}`);
+  }
+}